@@ -0,0 +1,291 @@
+import math
+import threading
+import time
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from prewarm import answer_cache_key
+
+# Answers that did not need the full RAG path
+CACHED_SOURCES = {"answer-cache", "prefetch", "faq-router"}
+
+
+class TDigest:
+    """Merging t-digest: streaming quantiles in O(compression) memory.
+
+    Values are buffered and merged into centroids sorted by mean; a centroid near
+    quantile q may hold at most about 4 * n * q * (1 - q) / compression values, so
+    the tails stay precise while the middle is summarized coarsely.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self._buffer: List[float] = []
+        self._buffer_size = int(compression * 5)
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self._buffer.append(value)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_size:
+            self._merge()
+
+    def _merge(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(
+            list(zip(self.means, self.weights)) + [(v, 1.0) for v in self._buffer]
+        )
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        means, weights = [], []
+        cumulative = 0.0
+        mean, weight = points[0]
+        for next_mean, next_weight in points[1:]:
+            q = (cumulative + (weight + next_weight) / 2) / total
+            limit = max(1.0, 4 * total * q * (1 - q) / self.compression)
+            if weight + next_weight <= limit:
+                mean += (next_mean - mean) * next_weight / (weight + next_weight)
+                weight += next_weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cumulative += weight
+                mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights, self.count = means, weights, total
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._merge()
+        if not self.count:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        cumulative = 0.0
+        for i, weight in enumerate(self.weights):
+            # Interpolate between the centres of neighbouring centroids
+            center = cumulative + weight / 2
+            if target < center:
+                if i == 0:
+                    lower, lower_at = self.min, 0.0
+                else:
+                    lower = self.means[i - 1]
+                    lower_at = cumulative - self.weights[i - 1] / 2
+                fraction = (target - lower_at) / max(center - lower_at, 1e-9)
+                return lower + (self.means[i] - lower) * fraction
+            cumulative += weight
+        last_center = self.count - self.weights[-1] / 2
+        fraction = (target - last_center) / max(self.count - last_center, 1e-9)
+        return self.means[-1] + (self.max - self.means[-1]) * min(fraction, 1.0)
+
+    def __len__(self) -> int:
+        return len(self.means) + len(self._buffer)
+
+
+class CountMinSketch:
+    """Frequency estimates for any key in fixed memory; never underestimates."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("L", [0]) * width for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: str):
+        data = key.encode("utf-8")
+        for row in range(self.depth):
+            yield row, zlib.crc32(data, row * 0x9E3779B1 & 0xFFFFFFFF) % self.width
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add `count` to `key` and return its new estimate."""
+        self.total += count
+        estimate = None
+        for row, index in self._indexes(key):
+            self.rows[row][index] += count
+            value = self.rows[row][index]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(self.rows[row][index] for row, index in self._indexes(key))
+
+
+class HeavyHitter:
+    __slots__ = ("weight", "error", "requests", "cached", "latency")
+
+    def __init__(self, error: float, compression: float):
+        self.weight = error
+        self.error = error
+        self.requests = 0
+        self.cached = 0
+        self.latency = TDigest(compression)
+
+
+class SpaceSaving:
+    """Weighted space-saving top-k over at most `capacity` keys.
+
+    A new key that arrives when every slot is taken replaces the key with the
+    smallest weight and inherits that weight as its error bound, so any key whose
+    true weight exceeds total / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = 256, compression: float = 20.0):
+        self.capacity = capacity
+        self.compression = compression
+        self.slots: Dict[str, HeavyHitter] = {}
+
+    def add(
+        self, key: str, weight: float, latency_ms: float, cached: bool
+    ) -> HeavyHitter:
+        slot = self.slots.get(key)
+        if slot is None:
+            floor = 0.0
+            if len(self.slots) >= self.capacity:
+                victim = min(self.slots, key=lambda k: self.slots[k].weight)
+                floor = self.slots.pop(victim).weight
+            slot = self.slots[key] = HeavyHitter(floor, self.compression)
+        slot.weight += weight
+        slot.requests += 1
+        slot.cached += cached
+        slot.latency.add(latency_ms)
+        return slot
+
+    def top(self, limit: int) -> List[Tuple[str, HeavyHitter]]:
+        return sorted(self.slots.items(), key=lambda item: -item[1].weight)[:limit]
+
+
+class AnalyticsWindow:
+    def __init__(self, capacity: int, width: int, depth: int, compression: float):
+        self.started_at = time.time()
+        self.requests = 0
+        self.sketch = CountMinSketch(width, depth)
+        self.by_count = SpaceSaving(capacity)
+        self.by_latency = SpaceSaving(capacity)
+        self.latency = TDigest(compression)
+
+
+class QueryAnalytics:
+    """Streaming heavy hitters and latency quantiles over normalized /chat queries.
+
+    Memory is fixed by the sketch size and top-k capacity regardless of traffic.
+    Statistics cover the current window of `window_seconds`; when it ends it is
+    kept as the previous window and a fresh one starts.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        sketch_width: int = 2048,
+        sketch_depth: int = 4,
+        compression: float = 100.0,
+        window_seconds: float = 3600.0,
+        max_query_chars: int = 200,
+    ):
+        self.capacity = capacity
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.compression = compression
+        self.window_seconds = window_seconds
+        self.max_query_chars = max_query_chars
+        self._lock = threading.Lock()
+        self.current = self._new_window()
+        self.previous: Optional[AnalyticsWindow] = None
+        self.record_us_total = 0.0
+
+    def _new_window(self) -> AnalyticsWindow:
+        return AnalyticsWindow(
+            self.capacity, self.sketch_width, self.sketch_depth, self.compression
+        )
+
+    def normalize(self, query: str) -> str:
+        return answer_cache_key(query)[1][: self.max_query_chars]
+
+    def record(self, query: str, latency_ms: float, source: Optional[str]) -> None:
+        started = time.perf_counter()
+        key = self.normalize(query)
+        cached = source in CACHED_SOURCES
+        with self._lock:
+            if time.time() - self.current.started_at >= self.window_seconds:
+                self.previous, self.current = self.current, self._new_window()
+                self.record_us_total = 0.0
+            window = self.current
+            window.requests += 1
+            window.sketch.add(key)
+            window.by_count.add(key, 1.0, latency_ms, cached)
+            window.by_latency.add(key, latency_ms, latency_ms, cached)
+            window.latency.add(latency_ms)
+            self.record_us_total += (time.perf_counter() - started) * 1e6
+
+    @staticmethod
+    def _quantiles(digest: TDigest) -> Dict[str, Optional[float]]:
+        return {
+            name: round(value, 2) if value is not None else None
+            for name, value in (
+                ("p50_ms", digest.quantile(0.5)),
+                ("p95_ms", digest.quantile(0.95)),
+                ("p99_ms", digest.quantile(0.99)),
+            )
+        }
+
+    def _report(self, window: AnalyticsWindow, limit: int, by: str) -> Dict[str, Any]:
+        structure = window.by_latency if by == "latency" else window.by_count
+        top = []
+        for key, slot in structure.top(limit):
+            entry = {
+                "query": key,
+                "requests": slot.requests,
+                "estimated_count": window.sketch.estimate(key),
+                "cached_rate": round(slot.cached / slot.requests, 4),
+                **self._quantiles(slot.latency),
+            }
+            if by == "latency":
+                entry["total_latency_ms"] = round(slot.weight, 2)
+                entry["error_ms"] = round(slot.error, 2)
+            else:
+                entry["count_error"] = int(slot.error)
+            top.append(entry)
+        return {
+            "started_at": window.started_at,
+            "requests": window.requests,
+            "latency": self._quantiles(window.latency),
+            "top": top,
+        }
+
+    def top(self, limit: int = 20, by: str = "count") -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "by": by,
+                "window_seconds": self.window_seconds,
+                "current": self._report(self.current, limit, by),
+                "previous": (
+                    self._report(self.previous, limit, by)
+                    if self.previous is not None
+                    else None
+                ),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            window = self.current
+            return {
+                "requests": window.requests,
+                "tracked_queries": len(window.by_count.slots),
+                "capacity": self.capacity,
+                "latency": self._quantiles(window.latency),
+                "sketch_bytes": sum(
+                    row.buffer_info()[1] * row.itemsize for row in window.sketch.rows
+                ),
+                "avg_record_us": (
+                    round(self.record_us_total / window.requests, 2)
+                    if window.requests
+                    else 0.0
+                ),
+            }
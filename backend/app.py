@@ -1,14 +1,68 @@
 import asyncio
+import hashlib
+import hmac
+import json
 import logging
 import os
+import secrets
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+)
 from pydantic import BaseModel
 
+from analytics import QueryAnalytics
+from cache import SizedLRUCache, TTLCache
+from context_manager import ContextManager, estimate_tokens
+from deadline import (
+    ClientDisconnected,
+    remaining,
+    reset_deadline,
+    run_until_disconnected,
+    set_deadline,
+)
+from conversation_store import ConversationStore
+from faq_router import FaqRouter
+from grpc_server import HAS_GRPC, ChatbotService, create_server
+from hedging import HedgeBudget, RequestHedger
+from local_index import HAS_NUMPY, LocalVectorIndex
+from model_router import ModelRouter
+from passage_cache import SessionPassageCache
+from prefetch import FollowUpPrefetcher
+from prewarm import AnswerPrewarmer, answer_cache_key
+from prompts import (
+    DEFAULT_SYSTEM_PROMPT,
+    PromptLibrary,
+    PromptTemplate,
+    build_generation_prompt,
+)
+from profiling import SamplingProfiler, SlowRequestLog
+from region_pool import RegionEndpoint, RegionPool
+from scheduler import PRIORITIES, PriorityScheduler, request_priority
+from shadow import ShadowConfig, ShadowRunner, config_override, shadow_conversation
+from session_tokens import SessionTokens
+from sharding import HashRing, forward_request, node_addresses
+from source_preview import (
+    LocalObjectStore,
+    PreviewSigner,
+    S3ObjectStore,
+    SourceAccessDenied,
+    SourceNotFound,
+    SourcePreviewer,
+    trim_citations,
+)
+from structured_logging import RequestIdMiddleware, configure_logging, request_id_var
+from usage import DEFAULT_MODEL_PRICING, UsageTracker, new_usage
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -22,6 +76,7 @@ except ImportError:
 # Try to import AWS Bedrock
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError, NoCredentialsError
 
     HAS_BEDROCK = True
@@ -29,9 +84,14 @@ except ImportError:
     HAS_BEDROCK = False
     logging.warning("boto3 not installed. Bedrock functionality will be disabled.")
 
-# Configure logging
+# Configure logging: JSON lines written by a background thread, with request IDs
+# and optional sampling of INFO-level lines (LOG_INFO_SAMPLE_RATE, per request)
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, log_level))
+log_listener = configure_logging(
+    log_level,
+    json_format=os.getenv("LOG_FORMAT", "json").lower() == "json",
+    info_sample_rate=float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0")),
+)
 logger = logging.getLogger(__name__)
 
 BAKU_TZ = timezone(timedelta(hours=4))
@@ -42,6 +102,7 @@ AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
 CLAUDE_MODEL_ID = os.getenv(
     "CLAUDE_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"
 )
+FAST_MODEL_ID = os.getenv("FAST_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 
@@ -54,10 +115,212 @@ SESSION_CLEANUP_HOURS = int(os.getenv("SESSION_CLEANUP_HOURS", "24"))
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "2"))  # seconds between retries
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 
-logger.info(f"Starting application with AWS Region: {AWS_REGION}")
-logger.info(f"Knowledge Base ID: {KNOWLEDGE_BASE_ID}")
+# Deadline settings: clients send their remaining budget in X-Request-Timeout-Ms,
+# which caps retries, backoff sleeps and each Bedrock call
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))  # seconds
+BEDROCK_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "60"))  # seconds
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", "120"))  # seconds
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+# Retrieval / split pipeline settings
+RETRIEVAL_NUMBER_OF_RESULTS = int(os.getenv("RETRIEVAL_NUMBER_OF_RESULTS", "5"))
+SPLIT_PIPELINE = os.getenv("SPLIT_PIPELINE", "False").lower() == "true"
+GENERATION_MAX_TOKENS = int(os.getenv("GENERATION_MAX_TOKENS", "1024"))
+
+# Prompt templates: versioned static prompt prefixes with per-route inference settings.
+# GENERATION_MAX_TOKENS and RETRIEVAL_NUMBER_OF_RESULTS apply where a template is silent
+PROMPT_TEMPLATES_FILE = os.getenv(
+    "PROMPT_TEMPLATES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_templates.json"),
+)
+PROMPT_TEMPLATE_VERSION = os.getenv("PROMPT_TEMPLATE_VERSION")  # default: file's active
+PROMPT_CACHE_ENABLED = (
+    os.getenv("PROMPT_CACHE_ENABLED", "False").lower() == "true"
+)  # mark the prefix cacheable in invoke_model; needs a model with prompt caching
+PASSAGE_CACHE_TTL = int(os.getenv("PASSAGE_CACHE_TTL", "300"))  # seconds
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "600"))  # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+PASSAGE_CACHE_SIMILARITY = float(os.getenv("PASSAGE_CACHE_SIMILARITY", "0.9"))
+PASSAGE_CACHE_MAX_BYTES = int(
+    os.getenv("PASSAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+PASSAGE_CACHE_MAX_SESSIONS = int(os.getenv("PASSAGE_CACHE_MAX_SESSIONS", "1000"))
+
+# Local vector index settings (RAG_MODE: "bedrock" or "local")
+RAG_MODE = os.getenv("RAG_MODE", "bedrock").lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "local_index")
+LOCAL_INDEX_FAILOVER = os.getenv("LOCAL_INDEX_FAILOVER", "False").lower() == "true"
+LOCAL_INDEX_GENERATE = os.getenv("LOCAL_INDEX_GENERATE", "False").lower() == "true"
+
+# Citation source previews: ranged reads from the cited documents, cached by size
+SOURCE_LOCAL_ROOT = os.getenv("SOURCE_LOCAL_ROOT")  # serve file:// sources under it
+SOURCE_S3_ENABLED = os.getenv("SOURCE_S3_ENABLED", "False").lower() == "true"
+SOURCE_S3_ENDPOINT_URL = os.getenv("SOURCE_S3_ENDPOINT_URL")  # S3-compatible store
+SOURCE_S3_BUCKETS = [
+    bucket.strip()
+    for bucket in os.getenv("SOURCE_S3_BUCKETS", "").split(",")
+    if bucket.strip()
+]  # required: the knowledge base's bucket(s); S3 previews stay off without it
+# Signs the preview tokens handed out with citations; set it when running several
+# nodes, otherwise each process signs with its own random secret
+SOURCE_PREVIEW_SECRET = os.getenv("SOURCE_PREVIEW_SECRET")
+SOURCE_PREVIEW_TOKEN_TTL = float(os.getenv("SOURCE_PREVIEW_TOKEN_TTL", "86400"))
+SOURCE_PREVIEW_CONTEXT_BYTES = int(os.getenv("SOURCE_PREVIEW_CONTEXT_BYTES", "1500"))
+SOURCE_PREVIEW_MAX_CONTEXT_BYTES = int(
+    os.getenv("SOURCE_PREVIEW_MAX_CONTEXT_BYTES", "16384")
+)
+SOURCE_PREVIEW_CACHE_BYTES = int(
+    os.getenv("SOURCE_PREVIEW_CACHE_BYTES", str(16 * 1024 * 1024))
+)
+CITATION_SNIPPET_CHARS = int(
+    os.getenv("CITATION_SNIPPET_CHARS", "300")
+)  # 0 = full reference text in /chat responses
+
+# Answer cache prewarming: keep answers to curated top questions warm
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "False").lower() == "true"
+PREWARM_QUESTIONS_FILE = os.getenv(
+    "PREWARM_QUESTIONS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "prewarm_questions.json"),
+)
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+PREWARM_STAGGER_SECONDS = float(os.getenv("PREWARM_STAGGER_SECONDS", "0.5"))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "60"))  # seconds between passes
+
+# Speculative follow-up prefetch: answer likely next questions at bulk priority
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "False").lower() == "true"
+PREFETCH_MAX_PER_ANSWER = int(os.getenv("PREFETCH_MAX_PER_ANSWER", "2"))
+PREFETCH_BUDGET_RATIO = float(
+    os.getenv("PREFETCH_BUDGET_RATIO", "1.0")
+)  # prefetches per answered request
+PREFETCH_TIMEOUT = float(os.getenv("PREFETCH_TIMEOUT", "30"))
+# Only answers the model generated for this turn are followed by predictions
+PREFETCH_SKIP_MODELS = {"answer-cache", "prefetch", "faq-router", "mock", "local-index"}
+
+# Shadow traffic: mirror a sample of /chat to an alternative config and compare
+SHADOW_SAMPLE_PERCENT = float(os.getenv("SHADOW_SAMPLE_PERCENT", "0"))  # 0 = off
+SHADOW_MODEL_ID = os.getenv("SHADOW_MODEL_ID")  # unset = same model as live
+SHADOW_PROMPT_VERSION = os.getenv("SHADOW_PROMPT_VERSION")  # unset = active version
+SHADOW_SETTINGS_JSON = os.getenv(
+    "SHADOW_SETTINGS_JSON"
+)  # e.g. {"number_of_results": 8, "max_tokens": 400}
+SHADOW_MAX_CONCURRENCY = int(os.getenv("SHADOW_MAX_CONCURRENCY", "2"))
+SHADOW_TIMEOUT = float(os.getenv("SHADOW_TIMEOUT", "60"))
+SHADOW_RESULTS_FILE = os.getenv("SHADOW_RESULTS_FILE", "shadow_results.jsonl")
+SHADOW_RECORD_ANSWERS = os.getenv("SHADOW_RECORD_ANSWERS", "False").lower() == "true"
+# Live answers that did not come from the model are not worth comparing
+SHADOW_SKIP_MODELS = {"answer-cache", "prefetch", "faq-router", "mock"}
+
+# Diagnostics: on-demand sampling profiler and slow /chat capture, both off by default
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # required by every /admin endpoint
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+SLOW_REQUEST_THRESHOLD_MS = float(
+    os.getenv("SLOW_REQUEST_THRESHOLD_MS", "0")
+)  # 0 = off
+SLOW_REQUEST_LOG_FILE = os.getenv("SLOW_REQUEST_LOG_FILE", "slow_requests.jsonl")
+
+# Streaming query analytics: heavy hitters and latency digests in fixed memory
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "True").lower() == "true"
+ANALYTICS_TOP_CAPACITY = int(os.getenv("ANALYTICS_TOP_CAPACITY", "256"))
+ANALYTICS_WINDOW_SECONDS = float(os.getenv("ANALYTICS_WINDOW_SECONDS", "3600"))
+
+# gRPC service next to the REST API, sharing the /chat pipeline
+GRPC_ENABLED = os.getenv("GRPC_ENABLED", "False").lower() == "true"
+GRPC_HOST = os.getenv("GRPC_HOST", "127.0.0.1")  # other hosts need TLS or a token
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50051"))
+GRPC_AUTH_TOKEN = os.getenv("GRPC_AUTH_TOKEN")  # sent as "authorization: Bearer ..."
+GRPC_TLS_CERT_FILE = os.getenv("GRPC_TLS_CERT_FILE")  # PEM; serve TLS with the key
+GRPC_TLS_KEY_FILE = os.getenv("GRPC_TLS_KEY_FILE")
+GRPC_MAX_CONCURRENT_STREAMS = int(
+    os.getenv("GRPC_MAX_CONCURRENT_STREAMS", "100")
+)  # per HTTP/2 connection
+GRPC_KEEPALIVE_SECONDS = float(os.getenv("GRPC_KEEPALIVE_SECONDS", "30"))
+GRPC_STREAM_CHUNK_CHARS = int(os.getenv("GRPC_STREAM_CHUNK_CHARS", "200"))
+
+# FAQ router settings: canned answers for common intents, bypassing Bedrock
+FAQ_ROUTER_ENABLED = os.getenv("FAQ_ROUTER_ENABLED", "False").lower() == "true"
+FAQ_ROUTES_FILE = os.getenv(
+    "FAQ_ROUTES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq_routes.json"),
+)
+FAQ_ROUTER_MIN_COVERAGE = float(os.getenv("FAQ_ROUTER_MIN_COVERAGE", "0.5"))
+
+# Conversation persistence settings
+CONVERSATION_STORE_ENABLED = (
+    os.getenv("CONVERSATION_STORE_ENABLED", "True").lower() == "true"
+)
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+CONVERSATION_FLUSH_INTERVAL = float(
+    os.getenv("CONVERSATION_FLUSH_INTERVAL", "0.05")
+)  # seconds
+# How long a transcript read waits for the session's own queued writes
+CONVERSATION_READ_WAIT = float(os.getenv("CONVERSATION_READ_WAIT", "2"))
+# Signs the session tokens /chat returns for reading a transcript back; set it so
+# tokens survive restarts and are accepted by every shard node
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+
+# Context window settings: older turns are summarized once a session exceeds the budget
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_KEEP_RECENT_TURNS = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "4"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+# Stored messages replayed into a session's context when it is resumed after a restart
+CONTEXT_RESTORE_MESSAGES = int(os.getenv("CONTEXT_RESTORE_MESSAGES", "50"))
+
+# Request hedging: fire a backup Bedrock call when the first one is slower than usual
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "False").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "500"))
+HEDGE_BUDGET_RATIO = float(os.getenv("HEDGE_BUDGET_RATIO", "0.05"))  # hedges/request
+
+# Extra Bedrock regions as "region:knowledge_base_id" entries (KB ID defaults to
+# KNOWLEDGE_BASE_ID); calls go to the healthiest region and fail over to the others
+BEDROCK_REGIONS = [
+    entry.strip()
+    for entry in os.getenv("BEDROCK_REGIONS", "").split(",")
+    if entry.strip()
+]
+REGION_FAILURE_THRESHOLD = int(os.getenv("REGION_FAILURE_THRESHOLD", "3"))
+REGION_COOLDOWN_SECONDS = float(os.getenv("REGION_COOLDOWN_SECONDS", "30"))
+
+# Upstream scheduler: interactive chat is admitted ahead of background and bulk work
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "True").lower() == "true"
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "16"))
+SCHEDULER_RESERVED_INTERACTIVE = int(os.getenv("SCHEDULER_RESERVED_INTERACTIVE", "4"))
+SCHEDULER_BULK_SHARE = float(os.getenv("SCHEDULER_BULK_SHARE", "0.5"))
+
+# Session sharding: each session lives on the node that owns it on a consistent hash
+# ring of SHARD_NODES (base URLs); misrouted requests are redirected or forwarded
+SHARD_NODES = [
+    node.strip().rstrip("/")
+    for node in os.getenv("SHARD_NODES", "").split(",")
+    if node.strip()
+]
+SHARD_SELF = os.getenv("SHARD_SELF", "").rstrip("/")
+SHARD_MODE = os.getenv("SHARD_MODE", "redirect").lower()  # "redirect" or "forward"
+SHARD_FORWARD_TIMEOUT = float(os.getenv("SHARD_FORWARD_TIMEOUT", "35"))  # seconds
+# Shared secret sent with forwarded requests (X-Shard-Secret). Without it, a request
+# is only treated as already forwarded when it comes from a SHARD_NODES address
+SHARD_SECRET = os.getenv("SHARD_SECRET")
+
+# Model routing: send simple queries to FAST_MODEL_ID, hard ones to CLAUDE_MODEL_ID
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "False").lower() == "true"
+MODEL_ROUTING_MAX_SIMPLE_WORDS = int(os.getenv("MODEL_ROUTING_MAX_SIMPLE_WORDS", "12"))
+
+# Usage accounting settings
+USAGE_FILE = os.getenv("USAGE_FILE", "usage.json")
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "60"))  # seconds
+MODEL_PRICING = {
+    **DEFAULT_MODEL_PRICING,
+    **{
+        k: tuple(v)
+        for k, v in json.loads(os.getenv("MODEL_PRICING_JSON", "{}")).items()
+    },
+}
+
+logger.info("Starting application with AWS Region: %s", AWS_REGION)
+logger.info("Knowledge Base ID: %s", KNOWLEDGE_BASE_ID)
 logger.info(
-    f"AWS credentials configured: {bool(AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY)}"
+    "AWS credentials configured: %s", bool(AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY)
 )
 
 # Initialize FastAPI app
@@ -76,6 +339,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 
 # Pydantic models for request/response
@@ -88,14 +352,152 @@ class ChatResponse(BaseModel):
     success: bool
     answer: Optional[str] = None
     session_id: Optional[str] = None
+    session_token: Optional[str] = None  # send as X-Session-Token to read it back
     citations: Optional[List[Dict[str, Any]]] = None
     error: Optional[str] = None
     timestamp: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    usage: Optional[Dict[str, Any]] = None
+    suggestions: Optional[List[str]] = None
+
+
+class ShardNodesRequest(BaseModel):
+    nodes: List[str]
+
+
+class RetrieveRequest(BaseModel):
+    query: str
+    number_of_results: Optional[int] = None
+    session_id: Optional[str] = None
+
+
+class RetrieveResponse(BaseModel):
+    success: bool
+    passages: Optional[List[Dict[str, Any]]] = None
+    cached: Optional[str] = None
+    error: Optional[str] = None
+    timestamp: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
 
 
-# In-memory session storage
+# In-memory session storage, restored from the conversation store on startup
 chat_sessions = {}
 
+context_manager = ContextManager(
+    budget_tokens=CONTEXT_TOKEN_BUDGET,
+    keep_recent_turns=CONTEXT_KEEP_RECENT_TURNS,
+    summary_max_tokens=CONTEXT_SUMMARY_MAX_TOKENS,
+)
+
+model_router = ModelRouter(
+    fast_model_id=FAST_MODEL_ID,
+    full_model_id=CLAUDE_MODEL_ID,
+    max_simple_words=MODEL_ROUTING_MAX_SIMPLE_WORDS,
+)
+
+usage_tracker = UsageTracker(
+    path=USAGE_FILE or None, flush_interval=USAGE_FLUSH_INTERVAL, pricing=MODEL_PRICING
+)
+
+conversation_store = None
+if CONVERSATION_STORE_ENABLED:
+    try:
+        conversation_store = ConversationStore(
+            CONVERSATION_DB_PATH, flush_interval=CONVERSATION_FLUSH_INTERVAL
+        )
+        restore_since = (
+            datetime.now(BAKU_TZ) - timedelta(hours=SESSION_CLEANUP_HOURS)
+        ).isoformat()
+        chat_sessions.update(conversation_store.load_sessions(since=restore_since))
+        logger.info(
+            "Restored %s sessions from %s", len(chat_sessions), CONVERSATION_DB_PATH
+        )
+    except Exception as e:
+        logger.warning(
+            "Failed to open conversation store at %s: %s", CONVERSATION_DB_PATH, e
+        )
+        conversation_store = None
+
+if not SESSION_TOKEN_SECRET:
+    (logger.error if SHARD_NODES else logger.warning)(
+        "SESSION_TOKEN_SECRET is not set: session tokens are signed with a per-process "
+        "secret and stop working after a restart or on another shard node"
+    )
+session_tokens = SessionTokens(
+    SESSION_TOKEN_SECRET.encode("utf-8")
+    if SESSION_TOKEN_SECRET
+    else secrets.token_bytes(32)
+)
+
+# Split pipeline caches: retrieved passages (per session + global) and generated answers
+passage_cache = SessionPassageCache(
+    max_sessions=PASSAGE_CACHE_MAX_SESSIONS,
+    global_max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=PASSAGE_CACHE_MAX_BYTES,
+    ttl_seconds=PASSAGE_CACHE_TTL,
+    similarity_threshold=PASSAGE_CACHE_SIMILARITY,
+)
+answer_cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=ANSWER_CACHE_TTL)
+
+# Canned responses used when no Bedrock client is available
+MOCK_RESPONSES = {
+    "hello": "Hello! I'm your AI assistant (mock mode).",
+    "help": "I can help you with various questions (mock mode).",
+    "status": "I'm running in mock mode.",
+    "test": "This is a test response (mock mode).",
+}
+mock_router = FaqRouter(
+    [
+        {"name": keyword, "patterns": [keyword], "answer": answer}
+        for keyword, answer in MOCK_RESPONSES.items()
+    ],
+    whole_words=False,
+    first_match=True,
+)
+
+faq_router = None
+if FAQ_ROUTER_ENABLED:
+    try:
+        faq_router = FaqRouter.from_file(
+            FAQ_ROUTES_FILE, min_coverage=FAQ_ROUTER_MIN_COVERAGE
+        )
+    except Exception as e:
+        logger.warning("Failed to load FAQ routes from %s: %s", FAQ_ROUTES_FILE, e)
+        faq_router = None
+
+prompt_defaults = {
+    "max_tokens": GENERATION_MAX_TOKENS,
+    "number_of_results": RETRIEVAL_NUMBER_OF_RESULTS,
+}
+try:
+    prompt_library = PromptLibrary.from_file(
+        PROMPT_TEMPLATES_FILE, PROMPT_TEMPLATE_VERSION, prompt_defaults
+    )
+except Exception as e:
+    logger.warning(
+        "Failed to load prompt templates from %s: %s", PROMPT_TEMPLATES_FILE, e
+    )
+    prompt_library = PromptLibrary(
+        {
+            "builtin": PromptTemplate(
+                "builtin", DEFAULT_SYSTEM_PROMPT, defaults=prompt_defaults
+            )
+        },
+        "builtin",
+    )
+logger.info("Using prompt template %s", prompt_library.active)
+
+# Retries are done by call_bedrock_with_retry, which knows the request deadline
+boto_config = (
+    Config(
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=BEDROCK_READ_TIMEOUT,
+        retries={"total_max_attempts": 1},
+    )
+    if HAS_BEDROCK
+    else None
+)
+
 # Initialize Bedrock client with explicit credentials
 bedrock_client = None
 if HAS_BEDROCK and AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
@@ -105,36 +507,536 @@ if HAS_BEDROCK and AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
             region_name=AWS_REGION,
             aws_access_key_id=AWS_ACCESS_KEY_ID,
             aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            config=boto_config,
         )
         logger.info(
             "AWS Bedrock client initialized successfully with explicit credentials"
         )
     except (NoCredentialsError, Exception) as e:
         logger.warning(
-            f"Failed to initialize Bedrock client with explicit credentials: {e}"
+            "Failed to initialize Bedrock client with explicit credentials: %s", e
         )
         bedrock_client = None
 elif HAS_BEDROCK:
     try:
-        bedrock_client = boto3.client("bedrock-agent-runtime", region_name=AWS_REGION)
+        bedrock_client = boto3.client(
+            "bedrock-agent-runtime", region_name=AWS_REGION, config=boto_config
+        )
         logger.info(
             "AWS Bedrock client initialized successfully with default credentials"
         )
     except (NoCredentialsError, Exception) as e:
         logger.warning(
-            f"Failed to initialize Bedrock client with default credentials: {e}"
+            "Failed to initialize Bedrock client with default credentials: %s", e
         )
         bedrock_client = None
 else:
     logger.warning("boto3 not available or AWS credentials not configured")
 
 
+def create_aws_client(
+    service_name: str, region: str, endpoint_url: Optional[str] = None
+):
+    """Create a boto3 client with the configured credentials, or None on failure."""
+    try:
+        if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
+            return boto3.client(
+                service_name,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                config=boto_config,
+            )
+        return boto3.client(
+            service_name,
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=boto_config,
+        )
+    except Exception as e:
+        logger.warning(
+            "Failed to initialize %s client in %s: %s", service_name, region, e
+        )
+        return None
+
+
+# Bedrock runtime client, used by the split pipeline to generate from retrieved passages
+bedrock_runtime_client = None
+if bedrock_client is not None:
+    bedrock_runtime_client = create_aws_client("bedrock-runtime", AWS_REGION)
+
+# Region pool: AWS_REGION first, then every BEDROCK_REGIONS entry with working clients
+region_pool = None
+if bedrock_client is not None:
+    endpoints = [
+        RegionEndpoint(
+            AWS_REGION, KNOWLEDGE_BASE_ID, bedrock_client, bedrock_runtime_client
+        )
+    ]
+    for entry in BEDROCK_REGIONS:
+        region, _, knowledge_base_id = entry.partition(":")
+        if region == AWS_REGION:
+            continue
+        agent_client = create_aws_client("bedrock-agent-runtime", region)
+        runtime_client = create_aws_client("bedrock-runtime", region)
+        if agent_client is not None and runtime_client is not None:
+            endpoints.append(
+                RegionEndpoint(
+                    region,
+                    knowledge_base_id or KNOWLEDGE_BASE_ID,
+                    agent_client,
+                    runtime_client,
+                )
+            )
+    region_pool = RegionPool(
+        endpoints,
+        failure_threshold=REGION_FAILURE_THRESHOLD,
+        cooldown_seconds=REGION_COOLDOWN_SECONDS,
+    )
+    logger.info("Bedrock region pool: %s", [e.region for e in endpoints])
+
+scheduler = (
+    PriorityScheduler(
+        max_concurrency=SCHEDULER_MAX_CONCURRENCY,
+        reserved_interactive=SCHEDULER_RESERVED_INTERACTIVE,
+        bulk_share=SCHEDULER_BULK_SHARE,
+    )
+    if SCHEDULER_ENABLED
+    else None
+)
+
+hash_ring = None
+if SHARD_NODES:
+    if SHARD_SELF in SHARD_NODES:
+        hash_ring = HashRing(SHARD_NODES)
+        logger.info(
+            "Sharding sessions across %s nodes as %s", len(SHARD_NODES), SHARD_SELF
+        )
+    else:
+        logger.warning(
+            "SHARD_SELF %r is not in SHARD_NODES, sharding disabled", SHARD_SELF
+        )
+
+# Hedging: backup calls go to the runner-up region, or repeat in the only region
+hedger = None
+if HEDGING_ENABLED and bedrock_client is not None:
+    hedger = RequestHedger(
+        percentile=HEDGE_PERCENTILE,
+        min_delay_ms=HEDGE_MIN_DELAY_MS,
+        budget=HedgeBudget(ratio=HEDGE_BUDGET_RATIO),
+    )
+
+
+# Answer cache prewarmer, started as a background task once the app is up
+prewarmer = None
+prewarm_task = None
+if PREWARM_ENABLED:
+    try:
+        prewarmer = AnswerPrewarmer.from_file(
+            PREWARM_QUESTIONS_FILE,
+            lambda question: query_knowledge_base_with_retry(
+                question, use_answer_cache=False, priority="background"
+            ),
+            answer_cache,
+            concurrency=PREWARM_CONCURRENCY,
+            stagger_seconds=PREWARM_STAGGER_SECONDS,
+        )
+        logger.info("Prewarming %s questions", len(prewarmer.questions))
+    except Exception as e:
+        logger.warning(
+            "Failed to load prewarm questions from %s: %s", PREWARM_QUESTIONS_FILE, e
+        )
+        prewarmer = None
+
+
+async def prefetch_answer(question: str, session_id: str) -> Dict[str, Any]:
+    # Prefetch tasks inherit the triggering request's context; give them their own deadline
+    token = set_deadline(PREFETCH_TIMEOUT)
+    try:
+        return await query_knowledge_base_with_retry(
+            question, session_id, priority="bulk", stateless=True
+        )
+    finally:
+        reset_deadline(token)
+
+
+prefetcher = (
+    FollowUpPrefetcher(
+        prefetch_answer,
+        max_per_answer=PREFETCH_MAX_PER_ANSWER,
+        budget_ratio=PREFETCH_BUDGET_RATIO,
+    )
+    if PREFETCH_ENABLED
+    else None
+)
+
+# Object stores for citation previews, by URI scheme
+source_stores: Dict[str, Any] = {}
+if SOURCE_LOCAL_ROOT:
+    source_stores["file"] = LocalObjectStore(SOURCE_LOCAL_ROOT)
+if SOURCE_S3_ENABLED and HAS_BEDROCK:
+    s3_client = create_aws_client("s3", AWS_REGION, SOURCE_S3_ENDPOINT_URL)
+    if s3_client is not None:
+        try:
+            source_stores["s3"] = S3ObjectStore(s3_client, SOURCE_S3_BUCKETS)
+        except ValueError as e:
+            logger.warning("S3 source previews disabled: %s", e)
+source_previewer = (
+    SourcePreviewer(
+        source_stores,
+        SizedLRUCache(max_bytes=SOURCE_PREVIEW_CACHE_BYTES),
+        context_bytes=SOURCE_PREVIEW_CONTEXT_BYTES,
+    )
+    if source_stores
+    else None
+)
+if source_previewer is not None and not SOURCE_PREVIEW_SECRET:
+    (logger.error if SHARD_NODES else logger.warning)(
+        "SOURCE_PREVIEW_SECRET is not set: preview tokens are signed with a "
+        "per-process secret and stop working after a restart or on another node"
+    )
+preview_signer = PreviewSigner(
+    (
+        SOURCE_PREVIEW_SECRET.encode("utf-8")
+        if SOURCE_PREVIEW_SECRET
+        else secrets.token_bytes(32)
+    ),
+    ttl_seconds=SOURCE_PREVIEW_TOKEN_TTL,
+)
+
+
+def sign_previews(session_id: str) -> Optional[Callable[[str], str]]:
+    """Token issuer for the sources cited to `session_id`, if previews are served."""
+    if source_previewer is None:
+        return None
+    return lambda uri: preview_signer.sign(session_id, uri)
+
+
+async def shadow_answer(query: str, session_id: Optional[str]) -> Dict[str, Any]:
+    # Runs in its own task: bulk priority, its own deadline and the shadow config.
+    # Stateless, so the session's Bedrock memory only ever sees live turns
+    token = set_deadline(SHADOW_TIMEOUT)
+    config_override.set(shadow_runner.config)
+    request_priority.set(("bulk", session_id))
+    try:
+        usage = new_usage(CLAUDE_MODEL_ID)
+        result = await answer_query(
+            query, None, usage, stateless=True, conversation=shadow_conversation.get()
+        )
+        cost = usage_tracker.record(
+            usage, None, datetime.now(BAKU_TZ).date().isoformat()
+        )
+        result["usage"] = {**usage, "cost_usd": round(cost, 6)}
+        return result
+    finally:
+        reset_deadline(token)
+
+
+shadow_runner = None
+if SHADOW_SAMPLE_PERCENT > 0:
+    try:
+        shadow_config = ShadowConfig(
+            SHADOW_MODEL_ID,
+            SHADOW_PROMPT_VERSION,
+            json.loads(SHADOW_SETTINGS_JSON) if SHADOW_SETTINGS_JSON else None,
+        )
+        prompt_library.get(SHADOW_PROMPT_VERSION)
+        shadow_runner = ShadowRunner(
+            shadow_answer,
+            shadow_config,
+            sample_rate=min(SHADOW_SAMPLE_PERCENT, 100) / 100,
+            max_concurrency=SHADOW_MAX_CONCURRENCY,
+            path=SHADOW_RESULTS_FILE or None,
+            record_answers=SHADOW_RECORD_ANSWERS,
+        )
+        logger.info(
+            "Shadowing %s%% of /chat to %s",
+            SHADOW_SAMPLE_PERCENT,
+            shadow_config.describe(),
+        )
+    except (KeyError, ValueError) as e:
+        logger.warning("Invalid shadow configuration, shadow mode disabled: %s", e)
+
+profiler = SamplingProfiler() if PROFILING_ENABLED else None
+query_analytics = (
+    QueryAnalytics(
+        capacity=ANALYTICS_TOP_CAPACITY, window_seconds=ANALYTICS_WINDOW_SECONDS
+    )
+    if ANALYTICS_ENABLED
+    else None
+)
+slow_request_log = (
+    SlowRequestLog(SLOW_REQUEST_THRESHOLD_MS, SLOW_REQUEST_LOG_FILE)
+    if SLOW_REQUEST_THRESHOLD_MS > 0
+    else None
+)
+
+# gRPC front end to the /chat pipeline, started with the app
+grpc_service = None
+grpc_server = None
+if GRPC_ENABLED:
+    if HAS_GRPC:
+        grpc_service = ChatbotService(
+            lambda message, session_id, priority, run: answer_chat_turn(
+                message, session_id, priority, run
+            ),
+            lambda session_id: session_owner(session_id),
+            PRIORITIES,
+            MAX_REQUEST_TIMEOUT,
+            snippet_chars=CITATION_SNIPPET_CHARS,
+            chunk_chars=GRPC_STREAM_CHUNK_CHARS,
+            auth_token=GRPC_AUTH_TOKEN,
+            sign_previews=sign_previews,
+        )
+    else:
+        logger.warning("GRPC_ENABLED is set but grpcio is not installed")
+
+# Local vector index, used in local mode and as a failover when Bedrock is unavailable
+local_index = None
+if RAG_MODE == "local" or LOCAL_INDEX_FAILOVER:
+    if HAS_NUMPY:
+        try:
+            local_index = LocalVectorIndex(LOCAL_INDEX_DIR)
+            logger.info("Loaded local vector index with %s chunks", len(local_index))
+        except Exception as e:
+            logger.warning(
+                "Failed to load local vector index from %s: %s", LOCAL_INDEX_DIR, e
+            )
+            local_index = None
+    else:
+        logger.warning("numpy not available, local vector index disabled")
+
+
+def track_region(
+    operation: Callable[[RegionEndpoint], Any], endpoint: RegionEndpoint
+) -> Callable[[], Any]:
+    """Bind an operation to a region, feeding its latency and outcome to the pool."""
+
+    def call() -> Any:
+        start = time.perf_counter()
+        try:
+            response = operation(endpoint)
+        except Exception:
+            region_pool.record(
+                endpoint.region, (time.perf_counter() - start) * 1000, ok=False
+            )
+            raise
+        region_pool.record(
+            endpoint.region, (time.perf_counter() - start) * 1000, ok=True
+        )
+        return response
+
+    return call
+
+
+async def start_upstream_call(
+    function: Callable[[], Any], timeout: Optional[float]
+) -> asyncio.Future:
+    """Wait for a scheduler slot for the current request's priority class, then run
+    `function` in a worker thread that keeps the slot until it returns."""
+    if scheduler is None:
+        return asyncio.ensure_future(asyncio.to_thread(function))
+    priority, key = request_priority.get()
+    await asyncio.wait_for(scheduler.acquire(priority, key), timeout=timeout)
+    return scheduler.run_in_slot(priority, function)
+
+
+def try_start_upstream_call(function: Callable[[], Any]) -> Optional[asyncio.Future]:
+    """Start `function` like start_upstream_call, but only if a slot is free now;
+    hedges never queue."""
+    if scheduler is None:
+        return asyncio.ensure_future(asyncio.to_thread(function))
+    priority, _ = request_priority.get()
+    if not scheduler.try_acquire(priority):
+        return None
+    return scheduler.run_in_slot(priority, function)
+
+
+def has_time_for(seconds: float) -> bool:
+    time_left = remaining()
+    return time_left is None or time_left > seconds
+
+
+async def call_bedrock_with_retry(
+    operation: Callable[[RegionEndpoint], Any],
+    label: str,
+    usage: Optional[Dict[str, Any]] = None,
+    hedge: bool = False,
+    region: Optional[str] = None,
+) -> Tuple[Optional[Any], Optional[str]]:
+    """Run a Bedrock call with retry logic. Returns (response, error_message).
+
+    Each attempt runs in a worker thread against the best-scoring region, or only
+    against `region` when given. A failed region is failed over to another without
+    the retry backoff. With hedging enabled and hedge=True, a backup call to the
+    runner-up region races the first one once it passes the hedge deadline.
+    No attempt, backoff sleep or call outlives the request deadline.
+    """
+    pinned = region_pool.get(region) if region else None
+    for attempt in range(MAX_RETRIES):
+        time_left = remaining()
+        if time_left is not None and time_left <= 0:
+            return (
+                None,
+                f"Request deadline exceeded before {label} attempt {attempt + 1}",
+            )
+        if attempt and usage is not None:
+            usage["retries"] += 1
+        endpoints = [pinned] if pinned else region_pool.ranked()
+        primary = endpoints[0]
+        try:
+            logger.info(
+                "Querying Bedrock %s in %s (attempt %s/%s)",
+                label,
+                primary.region,
+                attempt + 1,
+                MAX_RETRIES,
+            )
+            call = await start_upstream_call(
+                track_region(operation, primary), time_left
+            )
+            if hedger is not None:
+                backup = endpoints[1] if len(endpoints) > 1 else primary
+                call = hedger.run(
+                    label,
+                    call,
+                    (
+                        (
+                            lambda: try_start_upstream_call(
+                                track_region(operation, backup)
+                            )
+                        )
+                        if hedge
+                        else None
+                    ),
+                )
+            response = await asyncio.wait_for(call, timeout=remaining())
+            logger.info("Successfully received %s response from Bedrock", label)
+            return response, None
+
+        except asyncio.TimeoutError:
+            logger.warning("Bedrock %s abandoned at the request deadline", label)
+            return None, f"Request deadline exceeded during {label}"
+
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            error_message = e.response["Error"]["Message"]
+            logger.error(
+                "Bedrock ClientError (attempt %s): %s - %s",
+                attempt + 1,
+                error_code,
+                error_message,
+            )
+
+            if attempt < MAX_RETRIES - 1:
+                if not pinned and region_pool.ranked()[0] is not primary:
+                    logger.info("Failing over from %s", primary.region)
+                    continue
+                wait_time = RETRY_DELAY * (attempt + 1)
+                if not has_time_for(wait_time):
+                    return None, f"AWS error, no time left to retry: {error_message}"
+                logger.info("Retrying in %s seconds...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            else:
+                return None, f"AWS error after {MAX_RETRIES} attempts: {error_message}"
+
+        except Exception as e:
+            logger.error(
+                "Unexpected error querying knowledge base (attempt %s): %s",
+                attempt + 1,
+                e,
+            )
+            if attempt < MAX_RETRIES - 1:
+                if not pinned and region_pool.ranked()[0] is not primary:
+                    logger.info("Failing over from %s", primary.region)
+                    continue
+                wait_time = RETRY_DELAY * (attempt + 1)
+                if not has_time_for(wait_time):
+                    return None, f"Unexpected error, no time left to retry: {str(e)}"
+                logger.info("Unexpected error, retrying in %s seconds...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            else:
+                return None, f"Unexpected error after {MAX_RETRIES} attempts: {str(e)}"
+
+    return None, "Maximum retry attempts exceeded"
+
+
 async def query_knowledge_base_with_retry(
-    query: str, session_id: Optional[str] = None
+    query: str,
+    session_id: Optional[str] = None,
+    use_answer_cache: bool = True,
+    priority: str = "interactive",
+    stateless: bool = False,
 ) -> Dict[str, Any]:
-    """Query the AWS Bedrock Knowledge Base with retry logic."""
+    """Query the AWS Bedrock Knowledge Base with retry logic, recording token usage.
+
+    First-turn questions are served from the (prewarmed) answer cache when possible;
+    follow-ups are served from a speculative prefetch when one matches and otherwise
+    go upstream. Upstream calls are scheduled under `priority`, fairly across
+    sessions. Stateless calls never read or write the session's Bedrock memory.
+    """
+    request_priority.set((priority, session_id))
+    usage = new_usage(CLAUDE_MODEL_ID)
+    start = time.perf_counter()
+    cached = None
+    if prefetcher is not None and not stateless:
+        cached = prefetcher.take(session_id, query)
+        if cached is not None:
+            usage["model"] = "prefetch"
+            # The Bedrock session never saw this turn: start a fresh one next time,
+            # seeded with the local context that does include it
+            chat_sessions.get(session_id, {}).pop("bedrock_session_id", None)
+    if cached is None and use_answer_cache and not context_manager.render(session_id):
+        cached = answer_cache.get(answer_cache_key(query))
+        if cached is not None:
+            usage["model"] = "answer-cache"
+    if cached is not None:
+        cache_timing = (
+            "prefetch_ms" if usage["model"] == "prefetch" else "answer_cache_ms"
+        )
+        result = {
+            **cached,
+            "session_id": session_id,
+            "timestamp": datetime.now(BAKU_TZ).isoformat(),
+            "timings": {cache_timing: round((time.perf_counter() - start) * 1000, 2)},
+        }
+    else:
+        result = await answer_query(query, session_id, usage, stateless)
+    if usage.get("route"):
+        model_router.record(
+            usage["route"], (time.perf_counter() - start) * 1000, result
+        )
+    cost = usage_tracker.record(
+        usage, session_id, datetime.now(BAKU_TZ).date().isoformat()
+    )
+    result["usage"] = {**usage, "cost_usd": round(cost, 6)}
+    return result
+
+
+async def answer_query(
+    query: str,
+    session_id: Optional[str],
+    usage: Dict[str, Any],
+    stateless: bool = False,
+    conversation: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Answer one question. `conversation` overrides the session's rendered context
+    for calls that need a snapshot of it (shadow requests)."""
+    if faq_router is not None:
+        routed = route_faq_query(query)
+        if routed is not None:
+            usage["model"] = "faq-router"
+            return routed
+
+    if local_index is not None and (RAG_MODE == "local" or not bedrock_client):
+        return await query_local_index(query, usage)
+
     if not bedrock_client:
         logger.info("Bedrock client not available, using mock response")
+        usage["model"] = "mock"
         return create_mock_chat_response(query)
 
     # Validate configuration
@@ -148,105 +1050,460 @@ async def query_knowledge_base_with_retry(
             "timestamp": datetime.now(BAKU_TZ).isoformat(),
         }
 
-    # Prepare the request
-    request_body = {
-        "input": {"text": query},
+    model_id = CLAUDE_MODEL_ID
+    if MODEL_ROUTING_ENABLED:
+        usage["route"], model_id = model_router.route(query)
+        usage["model"] = model_id
+        logger.info("Routed query to %s model %s", usage["route"], model_id)
+    override = config_override.get()
+    if override is not None and override.model_id:
+        model_id = usage["model"] = override.model_id
+
+    if SPLIT_PIPELINE and bedrock_runtime_client:
+        return await query_split_pipeline(query, session_id, usage, model_id)
+
+    # Bedrock session memory cannot be trimmed, so once the context budget is exceeded
+    # start a fresh Bedrock session seeded with the summary of the older turns
+    # Stateless (prefetch) calls seed a one-off Bedrock session with the local context
+    # instead, so a speculative answer never lands in the session's Bedrock memory
+    stateful = bool(session_id) and not stateless
+    session_data = chat_sessions.get(session_id) if stateful else None
+    if stateful and context_manager.compact_if_needed(session_id):
+        logger.info(
+            "Context budget exceeded for session %s, rotating Bedrock session",
+            session_id,
+        )
+        if session_data is not None:
+            session_data.pop("bedrock_session_id", None)
+
+    bedrock_session_id = (
+        session_data.get("bedrock_session_id") if session_data else None
+    )
+    session_region = (
+        session_data.get("bedrock_session_region", AWS_REGION) if session_data else None
+    )
+    if bedrock_session_id and region_pool.get(session_region) is None:
+        logger.info("Region %s left the pool, starting a new session", session_region)
+        bedrock_session_id = None
+    if bedrock_session_id:
+        logger.info("Using existing Bedrock session ID: %s", bedrock_session_id)
+        conversation = ""
+    else:
+        logger.info("Starting new Bedrock session (no session ID provided or invalid)")
+        # Summarized turns, turns answered without Bedrock (answer cache, FAQ router,
+        # local failover) and turns from before a restart exist only in the local
+        # context, so the new Bedrock session gets them through the prompt template;
+        # the input text stays the bare question because it is also the search query
+        if conversation is None:
+            conversation = context_manager.render(session_id)
+
+    template, route = select_prompt(usage)
+
+    def retrieve_and_generate(endpoint: RegionEndpoint) -> Dict[str, Any]:
+        request_body = build_rag_request(
+            query,
+            model_id,
+            endpoint.region,
+            endpoint.knowledge_base_id,
+            template,
+            route,
+            conversation,
+        )
+        if bedrock_session_id:
+            request_body["sessionId"] = bedrock_session_id
+        response = endpoint.agent_client.retrieve_and_generate(**request_body)
+        return {**response, "region": endpoint.region}
+
+    # Bedrock sessions live in one region and must not be written to twice, so
+    # session-bound calls are pinned to the session's region and never hedged
+    start = time.perf_counter()
+    usage["retrieval_calls"] += 1
+    response, error = await call_bedrock_with_retry(
+        retrieve_and_generate,
+        "retrieve_and_generate",
+        usage,
+        hedge=not bedrock_session_id,
+        region=session_region if bedrock_session_id else None,
+    )
+    if error and LOCAL_INDEX_FAILOVER and local_index is not None:
+        logger.warning("Bedrock unavailable, failing over to local index: %s", error)
+        return await query_local_index(query, usage)
+    if error:
+        return {
+            "success": False,
+            "error": error,
+            "timestamp": datetime.now(BAKU_TZ).isoformat(),
+        }
+
+    returned_session_id = response.get("sessionId")
+    if returned_session_id and session_data is not None:
+        session_data["bedrock_session_id"] = returned_session_id
+        session_data["bedrock_session_region"] = response["region"]
+
+    # retrieve_and_generate does not report token usage, so estimate it from the
+    # prompt, the retrieved references the model was given, and the answer
+    references_text = "".join(
+        ref.get("content", {}).get("text", "")
+        for citation in response.get("citations", [])
+        for ref in citation.get("retrievedReferences", [])
+    )
+    usage["input_tokens"] += (
+        estimate_tokens(query)
+        + estimate_tokens(conversation)
+        + estimate_tokens(references_text)
+    )
+    usage["output_tokens"] += estimate_tokens(response["output"]["text"])
+    usage["estimated"] = True
+
+    return {
+        "success": True,
+        "answer": response["output"]["text"],
+        "session_id": session_id,
+        "citations": response.get("citations", []),
+        "timestamp": datetime.now(BAKU_TZ).isoformat(),
+        "timings": {
+            "retrieve_and_generate_ms": round((time.perf_counter() - start) * 1000, 2)
+        },
+    }
+
+
+def select_prompt(usage: Optional[Dict[str, Any]]) -> Tuple[PromptTemplate, str]:
+    """Active prompt template and the route whose settings apply to this request."""
+    override = config_override.get()
+    template = prompt_library.get(override.prompt_version if override else None)
+    if override is not None:
+        template = template.with_settings(override.settings)
+    route = (usage or {}).get("route") or "default"
+    if usage is not None:
+        usage["prompt_version"] = template.version
+    return template, route
+
+
+def build_rag_request(
+    input_text: str,
+    model_id: str,
+    region: str,
+    knowledge_base_id: str,
+    template: PromptTemplate,
+    route: str = "default",
+    conversation: str = "",
+) -> Dict[str, Any]:
+    return {
+        "input": {"text": input_text},
         "retrieveAndGenerateConfiguration": {
             "type": "KNOWLEDGE_BASE",
             "knowledgeBaseConfiguration": {
-                "knowledgeBaseId": KNOWLEDGE_BASE_ID,
-                "modelArn": f"arn:aws:bedrock:{AWS_REGION}::foundation-model/{CLAUDE_MODEL_ID}",
+                "knowledgeBaseId": knowledge_base_id,
+                "modelArn": f"arn:aws:bedrock:{region}::foundation-model/{model_id}",
+                **template.rag_configuration(route, conversation),
             },
         },
     }
 
-    if session_id and session_id in chat_sessions:
-        request_body["sessionId"] = session_id
-        logger.info(f"Using existing Bedrock session ID: {session_id}")
-    else:
-        logger.info("Starting new Bedrock session (no session ID provided or invalid)")
 
-    # Retry logic
-    for attempt in range(MAX_RETRIES):
-        try:
-            logger.info(f"Querying Bedrock (attempt {attempt + 1}/{MAX_RETRIES})")
+def normalize_retrieval_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Bedrock `retrieve` result into a passage dict."""
+    return {
+        "text": result.get("content", {}).get("text", ""),
+        "score": result.get("score"),
+        "location": result.get("location", {}),
+        "metadata": result.get("metadata", {}),
+    }
 
-            response = bedrock_client.retrieve_and_generate(**request_body)
-            logger.info("Successfully received response from Bedrock")
 
-            returned_session_id = response.get("sessionId")
-            if returned_session_id:
-                chat_sessions[returned_session_id] = {
-                    "created_at": datetime.now(BAKU_TZ).isoformat(),
-                    "last_activity": datetime.now(BAKU_TZ).isoformat(),
-                    "message_count": 1,
+def passages_to_citations(passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Shape passages like `retrieve_and_generate` citations so clients render them unchanged."""
+    return [
+        {
+            "retrievedReferences": [
+                {
+                    "content": {"text": passage["text"]},
+                    "location": passage.get("location", {}),
+                    "metadata": passage.get("metadata", {}),
                 }
+            ]
+        }
+        for passage in passages
+    ]
+
+
+async def retrieve_passages(
+    query: str,
+    number_of_results: Optional[int] = None,
+    session_id: Optional[str] = None,
+    usage: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run the Bedrock `retrieve` stage only, reusing passages cached for similar queries."""
+    number_of_results = number_of_results or RETRIEVAL_NUMBER_OF_RESULTS
+
+    if local_index is not None and (RAG_MODE == "local" or not bedrock_client):
+        return await search_local_index(query, number_of_results)
+
+    start = time.perf_counter()
+    cached, embedding, cache_scope = passage_cache.lookup(
+        query, number_of_results, session_id
+    )
+    if cached is not None:
+        logger.info("Passage cache hit (%s), skipping retrieval", cache_scope)
+        return {
+            "success": True,
+            "passages": cached,
+            "cached": cache_scope,
+            "timings": {"retrieve_ms": round((time.perf_counter() - start) * 1000, 2)},
+        }
+
+    if not bedrock_client:
+        return {
+            "success": False,
+            "error": "Bedrock client not available for retrieval",
+            "timings": {},
+        }
+
+    if usage is not None:
+        usage["retrieval_calls"] += 1
+    retrieval_configuration = {
+        "vectorSearchConfiguration": {"numberOfResults": number_of_results}
+    }
+    response, error = await call_bedrock_with_retry(
+        lambda endpoint: endpoint.agent_client.retrieve(
+            knowledgeBaseId=endpoint.knowledge_base_id,
+            retrievalQuery={"text": query},
+            retrievalConfiguration=retrieval_configuration,
+        ),
+        "retrieve",
+        usage,
+        hedge=True,
+    )
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    if error and LOCAL_INDEX_FAILOVER and local_index is not None:
+        logger.warning(
+            "Bedrock retrieve unavailable, failing over to local index: %s", error
+        )
+        return await search_local_index(query, number_of_results)
+    if error:
+        return {
+            "success": False,
+            "error": error,
+            "timings": {"retrieve_ms": elapsed_ms},
+        }
+
+    passages = [
+        normalize_retrieval_result(r) for r in response.get("retrievalResults", [])
+    ]
+    passage_cache.store(
+        query,
+        embedding,
+        passages,
+        number_of_results,
+        session_id,
+        retrieve_ms=elapsed_ms,
+    )
+    return {
+        "success": True,
+        "passages": passages,
+        "cached": None,
+        "timings": {"retrieve_ms": elapsed_ms},
+    }
+
+
+async def generate_from_passages(
+    query: str,
+    passages: List[Dict[str, Any]],
+    conversation: str = "",
+    usage: Optional[Dict[str, Any]] = None,
+    model_id: str = CLAUDE_MODEL_ID,
+) -> Tuple[Optional[str], Optional[str]]:
+    """Generate an answer from passages with the Bedrock runtime. Returns (answer, error)."""
+    template, route = select_prompt(usage)
+    body = json.dumps(
+        template.messages_body(
+            build_generation_prompt(query, passages, conversation),
+            route,
+            cache_prefix=PROMPT_CACHE_ENABLED,
+        )
+    )
+    response, error = await call_bedrock_with_retry(
+        lambda endpoint: endpoint.runtime_client.invoke_model(
+            modelId=model_id, body=body
+        ),
+        "invoke_model",
+        usage,
+        hedge=True,
+    )
+    if error:
+        return None, error
+
+    payload = json.loads(response["body"].read())
+    answer = "".join(
+        block.get("text", "")
+        for block in payload.get("content", [])
+        if block.get("type") == "text"
+    )
+    if usage is not None:
+        model_usage = payload.get("usage", {})
+        if "input_tokens" in model_usage:
+            usage["input_tokens"] += model_usage["input_tokens"]
+            usage["output_tokens"] += model_usage.get("output_tokens", 0)
+            if model_usage.get("cache_read_input_tokens"):
+                usage["cache_read_input_tokens"] = (
+                    usage.get("cache_read_input_tokens", 0)
+                    + model_usage["cache_read_input_tokens"]
+                )
+        else:
+            usage["input_tokens"] += estimate_tokens(body)
+            usage["output_tokens"] += estimate_tokens(answer)
+            usage["estimated"] = True
+    return answer, None
+
 
+async def query_split_pipeline(
+    query: str,
+    session_id: Optional[str] = None,
+    usage: Optional[Dict[str, Any]] = None,
+    model_id: str = CLAUDE_MODEL_ID,
+) -> Dict[str, Any]:
+    """Retrieve -> cache passages -> generate, caching and timing each stage separately."""
+    template, route = select_prompt(usage)
+    retrieval = await retrieve_passages(
+        query,
+        template.settings(route)["number_of_results"],
+        session_id=session_id,
+        usage=usage,
+    )
+    timings = dict(retrieval.get("timings", {}))
+    if not retrieval["success"]:
+        return {
+            "success": False,
+            "error": retrieval["error"],
+            "timestamp": datetime.now(BAKU_TZ).isoformat(),
+            "timings": timings,
+        }
+
+    passages = retrieval["passages"]
+    if session_id:
+        context_manager.compact_if_needed(session_id)
+    conversation = context_manager.render(session_id)
+    passages_digest = hashlib.sha256(
+        "\x1e".join([conversation] + [p["text"] for p in passages]).encode("utf-8")
+    ).hexdigest()
+    answer_key = (query.strip().lower(), passages_digest, model_id, template.version)
+
+    start = time.perf_counter()
+    answer = answer_cache.get(answer_key)
+    if answer is None:
+        answer, error = await generate_from_passages(
+            query, passages, conversation, usage, model_id
+        )
+        if error:
             return {
-                "success": True,
-                "answer": response["output"]["text"],
-                "session_id": returned_session_id,
-                "citations": response.get("citations", []),
+                "success": False,
+                "error": error,
                 "timestamp": datetime.now(BAKU_TZ).isoformat(),
+                "timings": timings,
             }
+        answer_cache.set(answer_key, answer)
+    timings["generate_ms"] = round((time.perf_counter() - start) * 1000, 2)
 
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            error_message = e.response["Error"]["Message"]
-            logger.error(
-                f"Bedrock ClientError (attempt {attempt + 1}): {error_code} - {error_message}"
-            )
+    return {
+        "success": True,
+        "answer": answer,
+        "citations": passages_to_citations(passages),
+        "timestamp": datetime.now(BAKU_TZ).isoformat(),
+        "timings": timings,
+    }
 
-            if attempt < MAX_RETRIES - 1:
-                wait_time = RETRY_DELAY * (attempt + 1)
-                logger.info(f"Retrying in {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
-                continue
-            else:
-                return {
-                    "success": False,
-                    "error": f"AWS error after {MAX_RETRIES} attempts: {error_message}",
-                    "timestamp": datetime.now(BAKU_TZ).isoformat(),
-                }
 
-        except Exception as e:
-            logger.error(
-                f"Unexpected error querying knowledge base (attempt {attempt + 1}): {str(e)}"
+def refresh_and_search_local_index(
+    query: str, number_of_results: int
+) -> List[Dict[str, Any]]:
+    if local_index.refresh():
+        logger.info("Reloaded local vector index with %s chunks", len(local_index))
+    return local_index.search(query, number_of_results)
+
+
+async def search_local_index(query: str, number_of_results: int) -> Dict[str, Any]:
+    """Run top-k search against the local vector index, off the event loop: a reload
+    and the full matrix product would otherwise stall every concurrent request."""
+    start = time.perf_counter()
+    passages = await asyncio.to_thread(
+        refresh_and_search_local_index, query, number_of_results
+    )
+    return {
+        "success": True,
+        "passages": passages,
+        "cached": None,
+        "timings": {"retrieve_ms": round((time.perf_counter() - start) * 1000, 2)},
+    }
+
+
+async def query_local_index(
+    query: str, usage: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Answer from the local vector index; extractive unless LOCAL_INDEX_GENERATE is set."""
+    if usage is not None:
+        usage["model"] = "local-index"
+    template, route = select_prompt(usage)
+    retrieval = await search_local_index(
+        query, template.settings(route)["number_of_results"]
+    )
+    passages = retrieval["passages"]
+    timings = retrieval["timings"]
+
+    answer = None
+    if LOCAL_INDEX_GENERATE and bedrock_runtime_client and passages:
+        start = time.perf_counter()
+        if usage is not None:
+            usage["model"] = CLAUDE_MODEL_ID
+        answer, error = await generate_from_passages(query, passages, usage=usage)
+        timings["generate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if error:
+            logger.warning(
+                "Generation failed in local mode, returning extractive answer: %s",
+                error,
             )
-            if attempt < MAX_RETRIES - 1:
-                wait_time = RETRY_DELAY * (attempt + 1)
-                logger.info(f"Unexpected error, retrying in {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
-                continue
-            else:
-                return {
-                    "success": False,
-                    "error": f"Unexpected error after {MAX_RETRIES} attempts: {str(e)}",
-                    "timestamp": datetime.now(BAKU_TZ).isoformat(),
-                }
+
+    if answer is None:
+        if passages:
+            answer = (
+                "Here is what I found in the knowledge base:\n\n" + passages[0]["text"]
+            )
+        else:
+            answer = "I could not find anything relevant in the local knowledge base."
 
     return {
-        "success": False,
-        "error": "Maximum retry attempts exceeded",
+        "success": True,
+        "answer": answer,
+        "citations": passages_to_citations(passages),
         "timestamp": datetime.now(BAKU_TZ).isoformat(),
+        "timings": timings,
+        "is_local": True,
     }
 
 
-def create_mock_chat_response(query: str) -> Dict[str, Any]:
-    mock_responses = {
-        "hello": "Hello! I'm your AI assistant (mock mode).",
-        "help": "I can help you with various questions (mock mode).",
-        "status": "I'm running in mock mode.",
-        "test": "This is a test response (mock mode).",
-        "default": f"I received your message: '{query}'. I'm currently in mock mode.",
+def route_faq_query(query: str) -> Optional[Dict[str, Any]]:
+    """Answer from the FAQ router when an intent matches, otherwise return None."""
+    start = time.perf_counter()
+    match = faq_router.match(query)
+    if match is None:
+        return None
+
+    logger.info("FAQ router matched intent '%s', skipping Bedrock", match["intent"])
+    return {
+        "success": True,
+        "answer": match["answer"],
+        "citations": [],
+        "timestamp": datetime.now(BAKU_TZ).isoformat(),
+        "timings": {"route_ms": round((time.perf_counter() - start) * 1000, 3)},
+        "routed_intent": match["intent"],
     }
 
-    query_lower = query.lower()
-    response = mock_responses.get("default")
-    for keyword, mock_response in mock_responses.items():
-        if keyword != "default" and keyword in query_lower:
-            response = mock_response
-            break
+
+def create_mock_chat_response(query: str) -> Dict[str, Any]:
+    match = mock_router.match(query)
+    if match is not None:
+        response = match["answer"]
+    else:
+        response = f"I received your message: '{query}'. I'm currently in mock mode."
 
     return {
         "success": True,
@@ -258,6 +1515,86 @@ def create_mock_chat_response(query: str) -> Dict[str, Any]:
     }
 
 
+def new_session_id() -> str:
+    """Mint a session ID that this node owns on the shard ring."""
+    for _ in range(64):
+        session_id = str(uuid.uuid4())
+        if hash_ring is None or hash_ring.node_for(session_id) == SHARD_SELF:
+            return session_id
+    return session_id
+
+
+def session_owner(session_id: Optional[str]) -> Optional[str]:
+    """Return the node that owns session_id when it is not this one."""
+    if hash_ring is None or not session_id:
+        return None
+    owner = hash_ring.node_for(session_id)
+    return owner if owner and owner != SHARD_SELF else None
+
+
+def forwarded_by_peer(http_request: Request) -> bool:
+    """Whether X-Shard-Forwarded can be trusted: clients must not be able to skip
+    routing (and reach sessions this node does not own) by setting it themselves."""
+    if not http_request.headers.get("X-Shard-Forwarded") or hash_ring is None:
+        return False
+    if SHARD_SECRET:
+        return hmac.compare_digest(
+            http_request.headers.get("X-Shard-Secret", ""), SHARD_SECRET
+        )
+    client = http_request.client.host if http_request.client else None
+    return client is not None and client in node_addresses(hash_ring.nodes)
+
+
+def shard_owner(session_id: Optional[str], http_request: Request) -> Optional[str]:
+    if forwarded_by_peer(http_request):
+        return None  # Already routed once; never bounce a request between nodes
+    if http_request.headers.get("X-Shard-Forwarded"):
+        logger.warning("Ignoring X-Shard-Forwarded from untrusted client")
+    return session_owner(session_id)
+
+
+def route_to_owner(
+    owner: str, http_request: Request, body: Optional[Dict[str, Any]] = None
+) -> Optional[Response]:
+    """Redirect a misrouted session request to its owner, or proxy it there.
+
+    Returns None when the owner's reply cannot be relayed; the caller then handles
+    the request locally.
+    """
+    url = f"{owner}{http_request.url.path}"
+    if http_request.url.query:
+        url += f"?{http_request.url.query}"
+    if SHARD_MODE != "forward":
+        return RedirectResponse(url, status_code=307, headers={"X-Shard-Owner": owner})
+
+    headers = {"X-Shard-Forwarded": SHARD_SELF}
+    if SHARD_SECRET:
+        headers["X-Shard-Secret"] = SHARD_SECRET
+    for name in (
+        "X-Request-Timeout-Ms",
+        "X-Request-Priority",
+        "X-Admin-Token",
+        "X-Session-Token",
+    ):
+        if name in http_request.headers:
+            headers[name] = http_request.headers[name]
+    if request_id_var.get():
+        headers["X-Request-ID"] = request_id_var.get()
+    try:
+        status, payload = forward_request(
+            url, http_request.method, body, headers, SHARD_FORWARD_TIMEOUT
+        )
+    except OSError as e:
+        logger.error("Forwarding to shard owner %s failed: %s", owner, e)
+        raise HTTPException(status_code=502, detail=f"Shard owner {owner} unreachable")
+    except ValueError as e:
+        logger.error(
+            "Shard owner %s sent a non-JSON reply, handling locally: %s", owner, e
+        )
+        return None
+    return JSONResponse(payload, status_code=status, headers={"X-Shard-Owner": owner})
+
+
 def manage_session(session_id: Optional[str]) -> str:
     current_time = datetime.now(BAKU_TZ).isoformat()
 
@@ -266,13 +1603,55 @@ def manage_session(session_id: Optional[str]) -> str:
         chat_sessions[session_id]["message_count"] += 1
         return session_id
     else:
-        new_session_id = str(uuid.uuid4())
-        chat_sessions[new_session_id] = {
+        session_id = new_session_id()
+        chat_sessions[session_id] = {
             "created_at": current_time,
             "last_activity": current_time,
             "message_count": 1,
         }
-        return new_session_id
+        return session_id
+
+
+async def restore_context(session_id: str) -> None:
+    """Rebuild the local context of a session resumed after a restart (or evicted
+    from the context manager) from its stored transcript. Its Bedrock session ID is
+    not persisted, so the next call starts a new Bedrock session seeded with it."""
+    if conversation_store is None or context_manager.has(session_id):
+        return
+    stored = await asyncio.to_thread(
+        conversation_store.get_messages, session_id, CONTEXT_RESTORE_MESSAGES
+    )
+    restored = context_manager.restore(session_id, stored["messages"])
+    if restored:
+        logger.info(
+            "Restored %s exchanges of context for session %s", restored, session_id
+        )
+
+
+def persist_exchange(session_id: str, message: str, result: Dict[str, Any]) -> None:
+    """Queue the user message, the reply and the session metadata for a batched write."""
+    if conversation_store is None:
+        return
+    timestamp = result.get("timestamp") or datetime.now(BAKU_TZ).isoformat()
+    conversation_store.append_message(session_id, "user", message, timestamp)
+    if result["success"]:
+        conversation_store.append_message(
+            session_id,
+            "assistant",
+            result.get("answer") or "",
+            timestamp,
+            citations=result.get("citations"),
+        )
+    else:
+        conversation_store.append_message(
+            session_id,
+            "assistant",
+            result.get("error") or "Unknown error occurred",
+            timestamp,
+            is_error=True,
+        )
+    if session_id in chat_sessions:
+        conversation_store.upsert_session(session_id, chat_sessions[session_id])
 
 
 def cleanup_old_sessions():
@@ -286,9 +1665,70 @@ def cleanup_old_sessions():
 
     for session_id in sessions_to_remove:
         del chat_sessions[session_id]
+        passage_cache.drop_session(session_id)
+        context_manager.drop(session_id)
+        if prefetcher is not None:
+            prefetcher.drop_session(session_id)
 
     if sessions_to_remove:
-        logger.info(f"Cleaned up {len(sessions_to_remove)} old sessions")
+        logger.info("Cleaned up %s old sessions", len(sessions_to_remove))
+
+
+@app.on_event("startup")
+async def start_prewarm() -> None:
+    global prewarm_task
+    if prewarmer is not None:
+        prewarm_task = asyncio.create_task(prewarmer.run_forever(PREWARM_INTERVAL))
+
+
+@app.on_event("startup")
+async def start_grpc() -> None:
+    global grpc_server
+    if grpc_service is None:
+        return
+    tls_cert = tls_key = None
+    if GRPC_TLS_CERT_FILE and GRPC_TLS_KEY_FILE:
+        with open(GRPC_TLS_CERT_FILE, "rb") as f:
+            tls_cert = f.read()
+        with open(GRPC_TLS_KEY_FILE, "rb") as f:
+            tls_key = f.read()
+    elif GRPC_TLS_CERT_FILE or GRPC_TLS_KEY_FILE:
+        logger.warning("gRPC TLS needs both GRPC_TLS_CERT_FILE and GRPC_TLS_KEY_FILE")
+    try:
+        grpc_server = create_server(
+            grpc_service,
+            GRPC_HOST,
+            GRPC_PORT,
+            max_concurrent_streams=GRPC_MAX_CONCURRENT_STREAMS,
+            keepalive_seconds=GRPC_KEEPALIVE_SECONDS,
+            tls_cert=tls_cert,
+            tls_key=tls_key,
+        )
+    except ValueError as e:
+        logger.error("gRPC server disabled: %s", e)
+        return
+    await grpc_server.start()
+    logger.info(
+        "gRPC server listening on %s:%s (%s)",
+        GRPC_HOST,
+        GRPC_PORT,
+        "TLS" if tls_cert is not None else "plaintext",
+    )
+
+
+@app.on_event("shutdown")
+async def stop_grpc() -> None:
+    if grpc_server is not None:
+        await grpc_server.stop(grace=5)
+
+
+@app.on_event("shutdown")
+def shutdown_stores() -> None:
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    if conversation_store is not None:
+        conversation_store.close()
+    usage_tracker.close()
 
 
 @app.get("/config")
@@ -297,11 +1737,60 @@ def get_config() -> Dict[str, Any]:
         "knowledge_base_id": KNOWLEDGE_BASE_ID,
         "aws_region": AWS_REGION,
         "claude_model_id": CLAUDE_MODEL_ID,
+        "fast_model_id": FAST_MODEL_ID,
+        "model_routing_enabled": MODEL_ROUTING_ENABLED,
+        "hedging_enabled": hedger is not None,
+        "prewarm_enabled": prewarmer is not None,
+        "prefetch_enabled": prefetcher is not None,
+        "shadow": shadow_runner.config.describe() if shadow_runner else None,
+        "grpc_host": GRPC_HOST if grpc_service is not None else None,
+        "grpc_port": GRPC_PORT if grpc_service is not None else None,
+        "source_stores": sorted(source_stores),
+        "citation_snippet_chars": CITATION_SNIPPET_CHARS,
+        "bedrock_regions": (
+            [endpoint.region for endpoint in region_pool.endpoints]
+            if region_pool is not None
+            else []
+        ),
         "debug": DEBUG,
         "session_cleanup_hours": SESSION_CLEANUP_HOURS,
         "has_bedrock": HAS_BEDROCK,
         "bedrock_client_available": bedrock_client is not None,
         "allowed_origins": ALLOWED_ORIGINS,
+        "retrieval_number_of_results": RETRIEVAL_NUMBER_OF_RESULTS,
+        "prompt_templates": prompt_library.stats(),
+        "prompt_cache_enabled": PROMPT_CACHE_ENABLED,
+        "split_pipeline": SPLIT_PIPELINE,
+        "passage_cache_similarity": PASSAGE_CACHE_SIMILARITY,
+        "rag_mode": RAG_MODE,
+        "faq_router_enabled": faq_router is not None,
+        "context_token_budget": CONTEXT_TOKEN_BUDGET,
+        "local_index_failover": LOCAL_INDEX_FAILOVER,
+        "local_index": local_index.stats() if local_index is not None else None,
+    }
+
+
+@app.get("/metrics")
+def get_metrics() -> Dict[str, Any]:
+    return {
+        "passage_cache": passage_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "faq_router": faq_router.stats() if faq_router is not None else None,
+        "model_routes": model_router.stats() if MODEL_ROUTING_ENABLED else None,
+        "hedging": hedger.stats() if hedger is not None else None,
+        "regions": region_pool.stats() if region_pool is not None else None,
+        "prewarm": prewarmer.stats() if prewarmer is not None else None,
+        "prefetch": prefetcher.stats() if prefetcher is not None else None,
+        "shadow": shadow_runner.stats() if shadow_runner is not None else None,
+        "grpc": grpc_service.stats() if grpc_service is not None else None,
+        "analytics": (query_analytics.stats() if query_analytics is not None else None),
+        "source_previews": (
+            source_previewer.stats() if source_previewer is not None else None
+        ),
+        "scheduler": scheduler.stats() if scheduler is not None else None,
+        "conversation_store": (
+            conversation_store.stats() if conversation_store else None
+        ),
     }
 
 
@@ -311,32 +1800,169 @@ def root() -> Dict[str, Any]:
         "message": "AI Chatbot API with AWS Bedrock Knowledge Base",
         "version": "2.1.0",
         "docs": "/docs",
-        "features": ["Retry logic", "Session management"],
+        "features": [
+            "Retry logic",
+            "Session management",
+            "Retrieval-only endpoint",
+            "Local vector index",
+            "FAQ router",
+            "Conversation persistence",
+            "Usage accounting",
+            "Model routing",
+            "Request hedging",
+            "Multi-region failover",
+            "gRPC service",
+        ],
     }
 
 
+def validate_priority(priority: str) -> None:
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"X-Request-Priority must be one of {', '.join(PRIORITIES)}",
+        )
+
+
+async def serve_within_deadline(
+    http_request: Request, timeout_ms: Optional[int], awaitable: Awaitable[Any]
+) -> Any:
+    """Run request work under the client's deadline, cancelling it if the client leaves."""
+    timeout = MAX_REQUEST_TIMEOUT
+    if timeout_ms:
+        timeout = min(timeout_ms / 1000, MAX_REQUEST_TIMEOUT)
+    token = set_deadline(timeout)
+    try:
+        return await run_until_disconnected(
+            awaitable, http_request.is_disconnected, DISCONNECT_POLL_INTERVAL
+        )
+    except ClientDisconnected:
+        logger.info("Client disconnected, cancelled %s request", http_request.url.path)
+        raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        reset_deadline(token)
+
+
+async def answer_chat_turn(
+    message: str,
+    session_id: Optional[str],
+    priority: str,
+    run: Callable[[Awaitable[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+) -> Tuple[str, Dict[str, Any]]:
+    """One chat turn with its session bookkeeping, shared by /chat and the gRPC service.
+
+    `run` executes the query under the caller's deadline and cancellation rules.
+    """
+    start = time.perf_counter()
+    session_id = manage_session(session_id)
+    session_messages = chat_sessions[session_id]["message_count"]
+    if session_messages > 1:
+        await restore_context(session_id)
+    result = await run(
+        query_knowledge_base_with_retry(message, session_id, priority=priority)
+    )
+    if (
+        shadow_runner is not None
+        and result["success"]
+        and result["usage"]["model"] not in SHADOW_SKIP_MODELS
+    ):
+        # Seed the shadow query with the conversation as it was before this turn;
+        # the shadow task copies this context when it is created
+        token = shadow_conversation.set(context_manager.render(session_id))
+        shadow_runner.maybe_mirror(
+            message,
+            result,
+            (time.perf_counter() - start) * 1000,
+            {
+                "timestamp": datetime.now(BAKU_TZ).isoformat(),
+                "request_id": request_id_var.get(),
+                "session_id": session_id,
+            },
+        )
+        shadow_conversation.reset(token)
+    persist_exchange(session_id, message, result)
+    if result["success"]:
+        context_manager.record_exchange(session_id, message, result.get("answer") or "")
+        if (
+            prefetcher is not None
+            and priority == "interactive"
+            and result["usage"]["model"] not in PREFETCH_SKIP_MODELS
+        ):
+            result["suggestions"] = prefetcher.schedule(session_id, message)
+    if query_analytics is not None:
+        query_analytics.record(
+            message,
+            (time.perf_counter() - start) * 1000,
+            (result.get("usage") or {}).get("model"),
+        )
+    if slow_request_log is not None:
+        slow_request_log.maybe_record(
+            (time.perf_counter() - start) * 1000,
+            {
+                "timestamp": datetime.now(BAKU_TZ).isoformat(),
+                "request_id": request_id_var.get(),
+                "session_id": session_id,
+                "message_chars": len(message),
+                "message_tokens": estimate_tokens(message),
+                "session_messages": session_messages,
+                "context": context_manager.usage(session_id),
+                "success": result["success"],
+                "error": result.get("error"),
+                "citations": len(result.get("citations") or []),
+                "timings": result.get("timings"),
+                "usage": result.get("usage"),
+            },
+        )
+    return session_id, result
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    timeout_ms: Optional[int] = Header(None, alias="X-Request-Timeout-Ms"),
+    priority: str = Header("interactive", alias="X-Request-Priority"),
+) -> ChatResponse:
     try:
         if not request.message.strip():
             raise HTTPException(status_code=400, detail="Message cannot be empty")
+        validate_priority(priority)
+        owner = shard_owner(request.session_id, http_request)
+        if owner:
+            routed = await asyncio.to_thread(
+                route_to_owner, owner, http_request, request.model_dump()
+            )
+            if routed is not None:
+                return routed
 
-        session_id = manage_session(request.session_id)
-        result = await query_knowledge_base_with_retry(request.message, session_id)
+        session_id, result = await answer_chat_turn(
+            request.message,
+            request.session_id,
+            priority,
+            lambda work: serve_within_deadline(http_request, timeout_ms, work),
+        )
 
         return ChatResponse(
             success=result["success"],
             answer=result.get("answer"),
             session_id=session_id,
-            citations=result.get("citations", []),
+            session_token=session_tokens.issue(session_id),
+            citations=trim_citations(
+                result.get("citations") or [],
+                CITATION_SNIPPET_CHARS,
+                sign_previews(session_id),
+            ),
             error=result.get("error"),
             timestamp=result.get("timestamp"),
+            timings=result.get("timings"),
+            usage=result.get("usage"),
+            suggestions=result.get("suggestions"),
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Chat endpoint error: {str(e)}")
+        logger.error("Chat endpoint error: %s", e)
         return ChatResponse(
             success=False,
             error=f"Internal server error: {str(e)}",
@@ -344,6 +1970,177 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
 
 
+@app.post("/retrieve", response_model=RetrieveResponse)
+async def retrieve(
+    request: RetrieveRequest,
+    http_request: Request,
+    timeout_ms: Optional[int] = Header(None, alias="X-Request-Timeout-Ms"),
+    priority: str = Header("interactive", alias="X-Request-Priority"),
+) -> RetrieveResponse:
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    validate_priority(priority)
+    request_priority.set((priority, request.session_id))
+    if (
+        request.number_of_results is not None
+        and not 1 <= request.number_of_results <= 100
+    ):
+        raise HTTPException(
+            status_code=400, detail="number_of_results must be between 1 and 100"
+        )
+
+    usage = new_usage("retrieve-only")
+    result = await serve_within_deadline(
+        http_request,
+        timeout_ms,
+        retrieve_passages(
+            request.query, request.number_of_results, request.session_id, usage
+        ),
+    )
+    usage_tracker.record(
+        usage, request.session_id, datetime.now(BAKU_TZ).date().isoformat()
+    )
+    return RetrieveResponse(
+        success=result["success"],
+        passages=result.get("passages"),
+        cached=result.get("cached"),
+        error=result.get("error"),
+        timestamp=datetime.now(BAKU_TZ).isoformat(),
+        timings=result.get("timings"),
+    )
+
+
+@app.get("/sources/preview")
+async def preview_source(
+    http_request: Request,
+    uri: str = Query(..., min_length=1),
+    session_id: str = Query(..., min_length=1),
+    token: str = Query(..., min_length=1),
+    text: Optional[str] = Query(None, max_length=4000),
+    offset: Optional[int] = Query(None, ge=0),
+    context_bytes: Optional[int] = Query(
+        None, ge=0, le=SOURCE_PREVIEW_MAX_CONTEXT_BYTES
+    ),
+) -> Dict[str, Any]:
+    """Preview the part of a cited document around `text` (the citation snippet) or `offset`.
+
+    Only sources cited to `session_id` are served: `token` is the reference's
+    previewToken from /chat. Routed to the session's owner, which signed it.
+    """
+    owner = shard_owner(session_id, http_request)
+    if owner:
+        routed = await asyncio.to_thread(route_to_owner, owner, http_request)
+        if routed is not None:
+            return routed
+    if source_previewer is None:
+        raise HTTPException(
+            status_code=503, detail="Source previews are not configured"
+        )
+    if not preview_signer.verify(session_id, uri, token):
+        raise HTTPException(status_code=403, detail="Source not cited in this session")
+    try:
+        return await asyncio.to_thread(
+            source_previewer.preview, uri, text, offset, context_bytes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SourceAccessDenied:
+        raise HTTPException(status_code=403, detail="Source not accessible")
+    except SourceNotFound:
+        raise HTTPException(status_code=404, detail="Source not found")
+    except Exception as e:
+        logger.error("Source preview failed for %s: %s", uri, e)
+        raise HTTPException(status_code=502, detail="Failed to read source")
+
+
+def require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN or not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> PlainTextResponse:
+    """Sample every thread for `seconds` and return folded stacks for a flamegraph."""
+    require_admin(admin_token)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    try:
+        profile = await asyncio.to_thread(
+            profiler.profile, min(seconds, PROFILE_MAX_SECONDS), interval_ms / 1000
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(
+        profile["folded"], headers={"X-Profile-Samples": str(profile["samples"])}
+    )
+
+
+@app.get("/admin/slow-requests")
+def get_slow_requests(
+    limit: int = Query(50, ge=1, le=200),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    require_admin(admin_token)
+    if slow_request_log is None:
+        raise HTTPException(status_code=404, detail="Slow request log is disabled")
+    return {
+        **slow_request_log.stats(),
+        "requests": slow_request_log.recent(limit),
+    }
+
+
+@app.get("/analytics/top")
+def get_top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    by: str = Query("count", pattern="^(count|latency)$"),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    """Most frequent (by=count) or most time-consuming (by=latency) normalized queries."""
+    # Reports raw user questions, so it is guarded like the admin endpoints
+    require_admin(admin_token)
+    if query_analytics is None:
+        raise HTTPException(status_code=404, detail="Query analytics are disabled")
+    return query_analytics.top(limit, by)
+
+
+@app.get("/admin/shards")
+def get_shards(
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    require_admin(admin_token)
+    return {
+        "self": SHARD_SELF,
+        "mode": SHARD_MODE,
+        "nodes": hash_ring.nodes if hash_ring is not None else [],
+    }
+
+
+@app.put("/admin/shards")
+def put_shards(
+    request: ShardNodesRequest,
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    """Replace the ring membership when nodes join or leave (apply on every node)."""
+    require_admin(admin_token)
+    if hash_ring is None:
+        raise HTTPException(status_code=404, detail="Sharding is disabled")
+    nodes = [node.rstrip("/") for node in request.nodes]
+    if SHARD_SELF not in nodes:
+        raise HTTPException(status_code=400, detail="Node list must include this node")
+    hash_ring.set_nodes(nodes)
+    logger.info("Shard ring updated: %s", nodes)
+    return {"self": SHARD_SELF, "mode": SHARD_MODE, "nodes": hash_ring.nodes}
+
+
+@app.get("/usage")
+def get_usage(session_id: Optional[str] = None) -> Dict[str, Any]:
+    return usage_tracker.report(session_id)
+
+
 @app.get("/sessions")
 def get_sessions() -> Dict[str, Any]:
     cleanup_old_sessions()
@@ -355,16 +2152,66 @@ def get_sessions() -> Dict[str, Any]:
                 "created_at": session_data["created_at"],
                 "last_activity": session_data["last_activity"],
                 "message_count": session_data["message_count"],
+                "token_usage": context_manager.usage(session_id),
             }
         )
 
     return {"total_sessions": len(sessions_info), "sessions": sessions_info}
 
 
+@app.get("/sessions/{session_id}/messages")
+def get_session_messages(
+    session_id: str,
+    http_request: Request,
+    limit: int = Query(20, ge=1, le=200),
+    before_id: Optional[int] = Query(None, ge=1),
+    session_token: Optional[str] = Header(None, alias="X-Session-Token"),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    """Page through a session's persisted transcript. Needs the session's token from
+    /chat (or the admin token), as it returns raw user messages. Waits up to
+    CONVERSATION_READ_WAIT for the session's writes still in the group-commit queue,
+    so the reply the caller just received is included."""
+    if not session_tokens.verify(session_id, session_token):
+        require_admin(admin_token)
+    owner = shard_owner(session_id, http_request)
+    routed = route_to_owner(owner, http_request) if owner else None
+    if routed is not None:
+        return routed
+    if conversation_store is None:
+        raise HTTPException(status_code=503, detail="Conversation store is disabled")
+    if not conversation_store.wait_for_session(session_id, CONVERSATION_READ_WAIT):
+        logger.warning("Reading session %s with writes still queued", session_id)
+    if session_id not in chat_sessions and not conversation_store.has_session(
+        session_id
+    ):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    page = conversation_store.get_messages(session_id, limit=limit, before_id=before_id)
+    sign = sign_previews(session_id)
+    if sign is not None:
+        for message in page["messages"]:
+            message["citations"] = trim_citations(message["citations"], 0, sign)
+    return {"session_id": session_id, **page}
+
+
 @app.delete("/sessions/{session_id}")
-def delete_session(session_id: str) -> Dict[str, Any]:
-    if session_id in chat_sessions:
-        del chat_sessions[session_id]
+def delete_session(session_id: str, http_request: Request) -> Dict[str, Any]:
+    owner = shard_owner(session_id, http_request)
+    routed = route_to_owner(owner, http_request) if owner else None
+    if routed is not None:
+        return routed
+    # Sessions past SESSION_CLEANUP_HOURS are only in the store, not in memory
+    if session_id in chat_sessions or (
+        conversation_store is not None and conversation_store.has_session(session_id)
+    ):
+        chat_sessions.pop(session_id, None)
+        passage_cache.drop_session(session_id)
+        context_manager.drop(session_id)
+        if prefetcher is not None:
+            prefetcher.drop_session(session_id)
+        if conversation_store is not None:
+            conversation_store.delete_session(session_id)
         return {
             "success": True,
             "message": f"Session {session_id} deleted successfully",
@@ -374,9 +2221,22 @@ def delete_session(session_id: str) -> Dict[str, Any]:
 
 
 @app.delete("/sessions")
-def clear_all_sessions() -> Dict[str, Any]:
+def clear_all_sessions(
+    persisted: bool = Query(False),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> Dict[str, Any]:
+    """Clear the in-memory sessions; with `persisted=true` (admin only) also wipe
+    every stored transcript."""
+    if persisted:
+        require_admin(admin_token)
     session_count = len(chat_sessions)
     chat_sessions.clear()
+    passage_cache.clear()
+    context_manager.clear()
+    if prefetcher is not None:
+        prefetcher.clear()
+    if persisted and conversation_store is not None:
+        conversation_store.clear()
     return {
         "success": True,
         "message": f"All {session_count} sessions cleared successfully",
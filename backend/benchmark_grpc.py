@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from model_router import percentile
+
+try:
+    import grpc
+
+    import chatbot_pb2
+    import chatbot_pb2_grpc
+
+    HAS_GRPC = True
+except ImportError:
+    HAS_GRPC = False
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def summarize(
+    transport: str,
+    latencies: List[float],
+    elapsed: float,
+    bytes_sent: int,
+    bytes_received: int,
+    header_bytes: Optional[int],
+    errors: int,
+) -> Dict[str, Any]:
+    count = len(latencies)
+    return {
+        "transport": transport,
+        "requests": count,
+        "errors": errors,
+        "requests_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_latency_ms": round(percentile(latencies, 0.5), 2),
+        "p95_latency_ms": round(percentile(latencies, 0.95), 2),
+        "request_bytes": round(bytes_sent / count, 1) if count else 0.0,
+        "response_bytes": round(bytes_received / count, 1) if count else 0.0,
+        "header_bytes": (
+            round(header_bytes / count, 1)
+            if count and header_bytes is not None
+            else None
+        ),
+    }
+
+
+def run_rest(
+    url: str, questions: List[str], concurrency: int, keep_alive: bool
+) -> Dict[str, Any]:
+    """POST /chat from `concurrency` threads, each on its own HTTP/1.1 connection
+    (reused when `keep_alive`, otherwise opened per request)."""
+    target = urlparse(url)
+    local = threading.local()
+    lock = threading.Lock()
+    totals = {"sent": 0, "received": 0, "headers": 0, "errors": 0}
+    latencies: List[float] = []
+
+    def connection() -> http.client.HTTPConnection:
+        if not keep_alive or getattr(local, "conn", None) is None:
+            local.conn = http.client.HTTPConnection(target.hostname, target.port or 80)
+        return local.conn
+
+    def call(question: str) -> None:
+        body = json.dumps({"message": question}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if not keep_alive:
+            headers["Connection"] = "close"
+        start = time.perf_counter()
+        conn = connection()
+        try:
+            conn.request("POST", "/chat", body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            ok = response.status == 200 and json.loads(payload)["success"]
+        except (OSError, http.client.HTTPException, ValueError):
+            conn.close()
+            local.conn = None
+            ok, payload, response = False, b"", None
+        latency = (time.perf_counter() - start) * 1000
+        if not keep_alive:
+            conn.close()
+        # Request line plus headers as sent, and the raw response header block
+        request_head = len(f"POST /chat HTTP/1.1\r\nHost: {target.netloc}\r\n") + sum(
+            len(f"{k}: {v}\r\n")
+            for k, v in {
+                **headers,
+                "Content-Length": len(body),
+                "Accept-Encoding": "identity",
+            }.items()
+        )
+        response_head = len(str(response.msg)) if response is not None else 0
+        with lock:
+            latencies.append(latency)
+            totals["sent"] += len(body)
+            totals["received"] += len(payload)
+            totals["headers"] += request_head + response_head
+            totals["errors"] += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, questions))
+    elapsed = time.perf_counter() - start
+    return summarize(
+        "rest-keepalive" if keep_alive else "rest-new-connection",
+        latencies,
+        elapsed,
+        totals["sent"],
+        totals["received"],
+        totals["headers"],
+        totals["errors"],
+    )
+
+
+async def run_grpc(
+    target: str,
+    questions: List[str],
+    concurrency: int,
+    stream: bool,
+    token: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Call Chat (or ChatStream) with `concurrency` requests in flight, all
+    multiplexed over a single HTTP/2 connection."""
+    totals = {"sent": 0, "received": 0, "errors": 0}
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    metadata = (("authorization", f"Bearer {token}"),) if token else None
+
+    async with grpc.aio.insecure_channel(target) as channel:
+        stub = chatbot_pb2_grpc.ChatbotStub(channel)
+        await channel.channel_ready()
+
+        async def call(question: str) -> None:
+            request = chatbot_pb2.ChatRequest(message=question)
+            async with semaphore:
+                start = time.perf_counter()
+                received, ok = 0, False
+                try:
+                    if stream:
+                        async for event in stub.ChatStream(request, metadata=metadata):
+                            # 5-byte length-prefixed message framing per message
+                            received += event.ByteSize() + 5
+                            if event.HasField("done"):
+                                ok = event.done.success
+                    else:
+                        reply = await stub.Chat(request, metadata=metadata)
+                        received, ok = reply.ByteSize() + 5, reply.success
+                except grpc.aio.AioRpcError:
+                    ok = False
+                latencies.append((time.perf_counter() - start) * 1000)
+            totals["sent"] += request.ByteSize() + 5
+            totals["received"] += received
+            totals["errors"] += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call(question) for question in questions))
+        elapsed = time.perf_counter() - start
+
+    return summarize(
+        "grpc-stream" if stream else "grpc-unary",
+        latencies,
+        elapsed,
+        totals["sent"],
+        totals["received"],
+        None,
+        totals["errors"],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare POST /chat with the gRPC Chat RPCs on one running server"
+    )
+    parser.add_argument("--rest-url", default="http://localhost:8000")
+    parser.add_argument("--grpc-target", default="localhost:50051")
+    parser.add_argument(
+        "--grpc-token",
+        default=os.getenv("GRPC_AUTH_TOKEN"),
+        help="Sent as bearer metadata (default: GRPC_AUTH_TOKEN)",
+    )
+    parser.add_argument(
+        "--questions", default=os.path.join(BACKEND_DIR, "prewarm_questions.json")
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--transports",
+        nargs="*",
+        default=["rest-new-connection", "rest-keepalive", "grpc-unary", "grpc-stream"],
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON results")
+    args = parser.parse_args()
+
+    with open(args.questions, encoding="utf-8") as f:
+        pool = json.load(f)["questions"]
+    questions = [pool[i % len(pool)] for i in range(args.requests)]
+
+    results = []
+    for transport in args.transports:
+        if transport.startswith("rest"):
+            results.append(
+                run_rest(
+                    args.rest_url,
+                    questions,
+                    args.concurrency,
+                    keep_alive=transport == "rest-keepalive",
+                )
+            )
+        elif not HAS_GRPC:
+            print(f"Skipping {transport}: grpcio is not installed")
+        else:
+            results.append(
+                asyncio.run(
+                    run_grpc(
+                        args.grpc_target,
+                        questions,
+                        args.concurrency,
+                        stream=transport == "grpc-stream",
+                        token=args.grpc_token,
+                    )
+                )
+            )
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    # gRPC header bytes are HPACK-compressed inside the HTTP/2 connection and not counted
+    columns = list(results[0]) if results else []
+    print("  ".join(f"{column:>16.16}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>16.16}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
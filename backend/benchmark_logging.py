@@ -0,0 +1,122 @@
+import argparse
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List
+
+from model_router import percentile
+from structured_logging import JsonFormatter, LazyQueueHandler, RequestContextFilter
+
+HANDLERS = ["direct", "queue", "lazy-queue"]
+
+
+class NullStream(io.TextIOBase):
+    """Write target that only counts characters, so the sink costs nothing."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return len(text)
+
+
+def build_logger(kind: str, stream: NullStream):
+    """Logger wired like configure_logging, with `kind` deciding where formatting runs."""
+    sink = logging.StreamHandler(stream)
+    sink.setFormatter(JsonFormatter())
+    logger = logging.getLogger(f"benchmark.{kind}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    if kind == "direct":
+        handler: logging.Handler = sink
+    else:
+        log_queue: "queue.Queue" = queue.Queue(-1)
+        handler = (LazyQueueHandler if kind == "lazy-queue" else QueueHandler)(
+            log_queue
+        )
+        listener = QueueListener(log_queue, sink)
+        listener.start()
+    handler.addFilter(RequestContextFilter())
+    logger.handlers = [handler]
+    return logger, listener
+
+
+def run_handler(kind: str, records: int, threads: int, extra: int) -> Dict[str, Any]:
+    """Time each logging call on the caller's thread, then the queue drain."""
+    stream = NullStream()
+    logger, listener = build_logger(kind, stream)
+    fields = {f"field_{i}": f"value {i}" for i in range(extra)}
+    lock = threading.Lock()
+    latencies: List[float] = []
+
+    def emit(count: int) -> None:
+        local: List[float] = []
+        for i in range(count):
+            start = time.perf_counter()
+            logger.info(
+                "Querying Bedrock %s in %s (attempt %s/%s)",
+                "retrieve_and_generate",
+                "eu-central-1",
+                i % 3 + 1,
+                3,
+                extra=fields,
+            )
+            local.append((time.perf_counter() - start) * 1_000_000)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(emit, [records // threads] * threads))
+    emitted = time.perf_counter() - start
+    if listener is not None:
+        listener.stop()
+    drained = time.perf_counter() - start
+    return {
+        "handler": kind,
+        "records": len(latencies),
+        "caller_p50_us": round(percentile(latencies, 0.5), 2),
+        "caller_p95_us": round(percentile(latencies, 0.95), 2),
+        "caller_total_ms": round(sum(latencies) / 1000, 1),
+        "emit_wall_ms": round(emitted * 1000, 1),
+        "drain_wall_ms": round(drained * 1000, 1),
+        "output_chars": stream.chars,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare logging handlers by the time spent on the logging thread"
+    )
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--extra-fields", type=int, default=4, help="`extra` fields per record"
+    )
+    parser.add_argument("--handlers", nargs="*", default=HANDLERS, choices=HANDLERS)
+    parser.add_argument("--json", action="store_true", help="Print JSON results")
+    args = parser.parse_args()
+
+    results = [
+        run_handler(kind, args.records, args.threads, args.extra_fields)
+        for kind in args.handlers
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = list(results[0]) if results else []
+    print("  ".join(f"{column:>15.15}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>15.15}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from context_manager import estimate_tokens
+from model_router import classify_query, percentile
+from prompts import PromptLibrary, build_generation_prompt
+from usage import DEFAULT_MODEL_PRICING
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FILLER = (
+    "Azercell subscribers can manage packages in the mobile app or by USSD code. "
+    "Prices include VAT and are charged from the main balance. "
+)
+
+
+class StubRuntime:
+    """Local stand-in for bedrock-runtime invoke_model with a simple cost model.
+
+    Modelled latency is a fixed overhead plus prefill time for uncached input tokens
+    (cached prefix tokens cost `cache_read_factor` of that) plus decode time per
+    output token. The natural answer length depends only on the question, so
+    differences between templates come from max_tokens, prompt size and caching.
+    Prefixes shorter than `min_cacheable_tokens` are never cached, as on Bedrock.
+    """
+
+    def __init__(
+        self,
+        base_ms: float = 300.0,
+        prefill_ms_per_token: float = 0.08,
+        decode_ms_per_token: float = 12.0,
+        cache_read_factor: float = 0.1,
+        min_cacheable_tokens: int = 1024,
+        seed: int = 0,
+    ):
+        self.base_ms = base_ms
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.decode_ms_per_token = decode_ms_per_token
+        self.cache_read_factor = cache_read_factor
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.random = random.Random(seed)
+        self._cached_prefixes = set()
+
+    def invoke_model(self, modelId: str, body: str) -> Dict[str, Any]:
+        request = json.loads(body)
+        system = request.get("system") or []
+        prefix = "".join(block["text"] for block in system)
+        prefix_tokens = estimate_tokens(prefix)
+        content = request["messages"][-1]["content"]
+        input_tokens = prefix_tokens + estimate_tokens(content)
+
+        cached_tokens = 0
+        if (
+            any("cache_control" in block for block in system)
+            and prefix_tokens >= self.min_cacheable_tokens
+        ):
+            digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+            if digest in self._cached_prefixes:
+                cached_tokens = prefix_tokens
+            self._cached_prefixes.add(digest)
+
+        question = content.rsplit("Question:", 1)[-1].strip()
+        natural = 120 + int(hashlib.sha256(question.encode()).hexdigest(), 16) % 480
+        temperature = request.get("temperature", 1.0)
+        natural = int(natural * (1 + temperature * self.random.uniform(-0.2, 0.2)))
+        output_tokens = min(natural, request["max_tokens"])
+
+        latency_ms = (
+            self.base_ms
+            + self.prefill_ms_per_token * (input_tokens - cached_tokens)
+            + self.prefill_ms_per_token * self.cache_read_factor * cached_tokens
+            + self.decode_ms_per_token * output_tokens
+        )
+        payload = {
+            "content": [{"type": "text", "text": "word " * output_tokens}],
+            "stop_reason": "max_tokens" if natural > output_tokens else "end_turn",
+            "usage": {
+                "input_tokens": input_tokens - cached_tokens,
+                "cache_read_input_tokens": cached_tokens,
+                "output_tokens": output_tokens,
+            },
+            "latency_ms": latency_ms,
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+
+def stub_passages(count: int, tokens_each: int) -> List[Dict[str, Any]]:
+    text = (FILLER * (tokens_each * 4 // len(FILLER) + 1))[: tokens_each * 4]
+    return [{"text": text} for _ in range(count)]
+
+
+def run_template(
+    library: PromptLibrary,
+    version: str,
+    questions: List[str],
+    runtime: StubRuntime,
+    model_id: str,
+    routing: bool,
+    passage_tokens: int,
+    cache_prefix: bool,
+) -> Dict[str, Any]:
+    template = library.get(version)
+    input_price, output_price = DEFAULT_MODEL_PRICING.get(model_id, (0.003, 0.015))
+    latencies, inputs, cached, outputs, build_us = [], [], [], [], []
+    truncated, cost = 0, 0.0
+    for question in questions:
+        route = classify_query(question)[0] if routing else "default"
+        settings = template.settings(route)
+        start = time.perf_counter()
+        body = json.dumps(
+            template.messages_body(
+                build_generation_prompt(
+                    question,
+                    stub_passages(settings["number_of_results"], passage_tokens),
+                ),
+                route,
+                cache_prefix=cache_prefix,
+            )
+        )
+        build_us.append((time.perf_counter() - start) * 1e6)
+        payload = json.loads(
+            runtime.invoke_model(modelId=model_id, body=body)["body"].read()
+        )
+        usage = payload["usage"]
+        latencies.append(payload["latency_ms"])
+        inputs.append(usage["input_tokens"] + usage["cache_read_input_tokens"])
+        cached.append(usage["cache_read_input_tokens"])
+        outputs.append(usage["output_tokens"])
+        truncated += payload["stop_reason"] == "max_tokens"
+        cost += (
+            usage["input_tokens"] * input_price
+            + usage["cache_read_input_tokens"] * input_price * 0.1
+            + usage["output_tokens"] * output_price
+        ) / 1000
+
+    count = len(questions)
+    return {
+        "version": version,
+        "prefix_digest": template.prefix_digest,
+        "requests": count,
+        "p50_latency_ms": round(percentile(latencies, 0.5), 1),
+        "p95_latency_ms": round(percentile(latencies, 0.95), 1),
+        "avg_input_tokens": round(sum(inputs) / count, 1),
+        "avg_cached_tokens": round(sum(cached) / count, 1),
+        "avg_output_tokens": round(sum(outputs) / count, 1),
+        "truncated_rate": round(truncated / count, 3),
+        "cost_usd_per_1k_requests": round(cost / count * 1000, 4),
+        "avg_build_us": round(sum(build_us) / count, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare prompt template versions against a local invoke_model stub"
+    )
+    parser.add_argument(
+        "--templates", default=os.path.join(BACKEND_DIR, "prompt_templates.json")
+    )
+    parser.add_argument(
+        "--questions", default=os.path.join(BACKEND_DIR, "prewarm_questions.json")
+    )
+    parser.add_argument("--versions", nargs="*", help="Default: every version")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Passes over the questions"
+    )
+    parser.add_argument("--model-id", default="anthropic.claude-3-sonnet-20240229-v1:0")
+    parser.add_argument(
+        "--routing", action="store_true", help="Pick routes per question"
+    )
+    parser.add_argument("--passage-tokens", type=int, default=200)
+    parser.add_argument("--cache-prefix", action="store_true")
+    parser.add_argument("--min-cacheable-tokens", type=int, default=1024)
+    parser.add_argument("--json", action="store_true", help="Print JSON results")
+    args = parser.parse_args()
+
+    library = PromptLibrary.from_file(args.templates)
+    with open(args.questions, encoding="utf-8") as f:
+        questions = json.load(f)["questions"] * args.repeat
+
+    results = [
+        run_template(
+            library,
+            version,
+            questions,
+            StubRuntime(min_cacheable_tokens=args.min_cacheable_tokens),
+            args.model_id,
+            args.routing,
+            args.passage_tokens,
+            args.cache_prefix,
+        )
+        for version in args.versions or sorted(library.templates)
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = [key for key in results[0] if key != "prefix_digest"]
+    print("  ".join(f"{column:>14.14}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>14.14}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: chatbot.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'chatbot.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rchatbot.proto\x12\x08\x61isha.v1\"D\n\x0b\x43hatRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x12\n\nsession_id\x18\x02 \x01(\t\x12\x10\n\x08priority\x18\x03 \x01(\t\"^\n\x08\x43itation\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x0b\n\x03uri\x18\x02 \x01(\t\x12\r\n\x05score\x18\x03 \x01(\x01\x12\x11\n\thas_score\x18\x04 \x01(\x08\x12\x15\n\rpreview_token\x18\x05 \x01(\t\"\xa1\x01\n\x05Usage\x12\r\n\x05model\x18\x01 \x01(\t\x12\x16\n\x0eprompt_version\x18\x02 \x01(\t\x12\x14\n\x0cinput_tokens\x18\x03 \x01(\x03\x12\x15\n\routput_tokens\x18\x04 \x01(\x03\x12\x1f\n\x17\x63\x61\x63he_read_input_tokens\x18\x05 \x01(\x03\x12\x10\n\x08\x63ost_usd\x18\x06 \x01(\x01\x12\x11\n\testimated\x18\x07 \x01(\x08\"\x8c\x02\n\tChatReply\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0e\n\x06\x61nswer\x18\x02 \x01(\t\x12\x12\n\nsession_id\x18\x03 \x01(\t\x12%\n\tcitations\x18\x04 \x03(\x0b\x32\x12.aisha.v1.Citation\x12\r\n\x05\x65rror\x18\x05 \x01(\t\x12\x11\n\ttimestamp\x18\x06 \x01(\t\x12\x31\n\x07timings\x18\x07 \x03(\x0b\x32 .aisha.v1.ChatReply.TimingsEntry\x12\x1e\n\x05usage\x18\x08 \x01(\x0b\x32\x0f.aisha.v1.Usage\x1a.\n\x0cTimingsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"y\n\tChatEvent\x12\x16\n\x0c\x61nswer_delta\x18\x01 \x01(\tH\x00\x12&\n\x08\x63itation\x18\x02 \x01(\x0b\x32\x12.aisha.v1.CitationH\x00\x12#\n\x04\x64one\x18\x03 \x01(\x0b\x32\x13.aisha.v1.ChatReplyH\x00\x42\x07\n\x05\x65vent2y\n\x07\x43hatbot\x12\x32\n\x04\x43hat\x12\x15.aisha.v1.ChatRequest\x1a\x13.aisha.v1.ChatReply\x12:\n\nChatStream\x12\x15.aisha.v1.ChatRequest\x1a\x13.aisha.v1.ChatEvent0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chatbot_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_CHATREPLY_TIMINGSENTRY']._loaded_options = None
+  _globals['_CHATREPLY_TIMINGSENTRY']._serialized_options = b'8\001'
+  _globals['_CHATREQUEST']._serialized_start=27
+  _globals['_CHATREQUEST']._serialized_end=95
+  _globals['_CITATION']._serialized_start=97
+  _globals['_CITATION']._serialized_end=191
+  _globals['_USAGE']._serialized_start=194
+  _globals['_USAGE']._serialized_end=355
+  _globals['_CHATREPLY']._serialized_start=358
+  _globals['_CHATREPLY']._serialized_end=626
+  _globals['_CHATREPLY_TIMINGSENTRY']._serialized_start=580
+  _globals['_CHATREPLY_TIMINGSENTRY']._serialized_end=626
+  _globals['_CHATEVENT']._serialized_start=628
+  _globals['_CHATEVENT']._serialized_end=749
+  _globals['_CHATBOT']._serialized_start=751
+  _globals['_CHATBOT']._serialized_end=872
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,144 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import chatbot_pb2 as chatbot__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in chatbot_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class ChatbotStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Chat = channel.unary_unary(
+                '/aisha.v1.Chatbot/Chat',
+                request_serializer=chatbot__pb2.ChatRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ChatReply.FromString,
+                _registered_method=True)
+        self.ChatStream = channel.unary_stream(
+                '/aisha.v1.Chatbot/ChatStream',
+                request_serializer=chatbot__pb2.ChatRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ChatEvent.FromString,
+                _registered_method=True)
+
+
+class ChatbotServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def Chat(self, request, context):
+        """One answer per request, like POST /chat
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ChatStream(self, request, context):
+        """The answer in chunks, then its citations, then a final ChatReply without the answer.
+        Not token streaming: the answer is generated in full before the first chunk is
+        sent, so time to first byte matches Chat; the chunks only avoid one large message.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ChatbotServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Chat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Chat,
+                    request_deserializer=chatbot__pb2.ChatRequest.FromString,
+                    response_serializer=chatbot__pb2.ChatReply.SerializeToString,
+            ),
+            'ChatStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ChatStream,
+                    request_deserializer=chatbot__pb2.ChatRequest.FromString,
+                    response_serializer=chatbot__pb2.ChatEvent.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'aisha.v1.Chatbot', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('aisha.v1.Chatbot', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Chatbot:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Chat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/aisha.v1.Chatbot/Chat',
+            chatbot__pb2.ChatRequest.SerializeToString,
+            chatbot__pb2.ChatReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ChatStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/aisha.v1.Chatbot/ChatStream',
+            chatbot__pb2.ChatRequest.SerializeToString,
+            chatbot__pb2.ChatEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
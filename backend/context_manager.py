@@ -0,0 +1,199 @@
+import re
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for Claude-style tokenizers)."""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def first_sentence(text: str, max_chars: int = 200) -> str:
+    sentence = SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[: max_chars - 3] + "..."
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, marking the cut."""
+    max_chars = max(4, max_tokens * 4)
+    return text if len(text) <= max_chars else text[: max_chars - 3] + "..."
+
+
+class ConversationContext:
+    def __init__(self):
+        self.turns: Deque[Dict[str, Any]] = deque()
+        self.summary = ""
+        self.summarized_turns = 0
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        self.compactions = 0
+
+    @property
+    def context_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            turn["tokens"] for turn in self.turns
+        )
+
+
+class ContextManager:
+    """Tracks per-session token usage and keeps each session's context within a budget."""
+
+    def __init__(
+        self,
+        budget_tokens: int = 4000,
+        keep_recent_turns: int = 4,
+        summary_max_tokens: int = 400,
+        max_sessions: int = 10000,
+    ):
+        self.budget_tokens = budget_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.max_sessions = max_sessions
+        self._contexts: Dict[str, ConversationContext] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> ConversationContext:
+        context = self._contexts.get(session_id)
+        if context is None:
+            if len(self._contexts) >= self.max_sessions:
+                self._contexts.pop(next(iter(self._contexts)))
+            context = self._contexts[session_id] = ConversationContext()
+        return context
+
+    def record_exchange(self, session_id: str, question: str, answer: str) -> None:
+        with self._lock:
+            context = self._get(session_id)
+            question_tokens = estimate_tokens(question)
+            answer_tokens = estimate_tokens(answer)
+            context.turns.append(
+                {"role": "user", "text": question, "tokens": question_tokens}
+            )
+            context.turns.append(
+                {"role": "assistant", "text": answer, "tokens": answer_tokens}
+            )
+            context.total_input_tokens += question_tokens
+            context.total_output_tokens += answer_tokens
+
+    def restore(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        """Rebuild a session's context from stored messages (oldest first), e.g. after a
+        restart. Failed turns are skipped. Returns the number of exchanges restored."""
+        question = None
+        exchanges = 0
+        for message in messages:
+            if message["role"] == "user":
+                question = message["content"]
+            elif question is not None and not message.get("is_error"):
+                self.record_exchange(session_id, question, message["content"])
+                question = None
+                exchanges += 1
+        return exchanges
+
+    def compact_if_needed(self, session_id: str) -> bool:
+        """Fold older turns into the running summary when the budget is exceeded.
+
+        Returns True only when the context actually shrank, so callers that rotate
+        state on compaction do not rotate on every turn of an oversized session.
+        """
+        with self._lock:
+            context = self._contexts.get(session_id)
+            if context is None or context.context_tokens <= self.budget_tokens:
+                return False
+            before = context.context_tokens
+
+            keep = self.keep_recent_turns * 2
+            while len(context.turns) > keep:
+                self._fold_oldest(context)
+            self._trim_summary(context)
+
+            # Long answers can exceed the budget on their own: fold recent turns too,
+            # down to the last exchange, then truncate that exchange to fit
+            while (
+                context.context_tokens > self.budget_tokens and len(context.turns) > 2
+            ):
+                self._fold_oldest(context)
+                self._trim_summary(context)
+            if context.context_tokens > self.budget_tokens and context.turns:
+                share = max(
+                    1,
+                    (self.budget_tokens - estimate_tokens(context.summary))
+                    // len(context.turns),
+                )
+                for turn in context.turns:
+                    if turn["tokens"] > share:
+                        turn["text"] = truncate_tokens(turn["text"], share)
+                        turn["tokens"] = estimate_tokens(turn["text"])
+
+            if context.context_tokens >= before:
+                return False
+            context.compactions += 1
+            return True
+
+    def _fold_oldest(self, context: ConversationContext) -> None:
+        turn = context.turns.popleft()
+        prefix = "User asked" if turn["role"] == "user" else "Assistant answered"
+        context.summary += f"- {prefix}: {first_sentence(turn['text'])}\n"
+        context.summarized_turns += 1
+
+    def _trim_summary(self, context: ConversationContext) -> None:
+        # Drop the oldest summary lines once the summary itself outgrows its share
+        lines = context.summary.splitlines(keepends=True)
+        while lines and estimate_tokens("".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        context.summary = "".join(lines)
+
+    def render(self, session_id: Optional[str], include_turns: bool = True) -> str:
+        """Render the session's summary (and optionally recent turns) for a prompt."""
+        if not session_id:
+            return ""
+        with self._lock:
+            context = self._contexts.get(session_id)
+            if context is None:
+                return ""
+            parts = []
+            if context.summary:
+                parts.append(
+                    f"Summary of earlier conversation:\n{context.summary.rstrip()}"
+                )
+            if include_turns and context.turns:
+                parts.append(
+                    "Recent conversation:\n"
+                    + "\n".join(
+                        f"{'User' if t['role'] == 'user' else 'Assistant'}: {t['text']}"
+                        for t in context.turns
+                    )
+                )
+            return "\n\n".join(parts)
+
+    def has(self, session_id: str) -> bool:
+        return session_id in self._contexts
+
+    def usage(self, session_id: str) -> Dict[str, Any]:
+        context = self._contexts.get(session_id)
+        if context is None:
+            return {
+                "context_tokens": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "turns": 0,
+                "summarized_turns": 0,
+                "budget_tokens": self.budget_tokens,
+            }
+        return {
+            "context_tokens": context.context_tokens,
+            "input_tokens": context.total_input_tokens,
+            "output_tokens": context.total_output_tokens,
+            "turns": len(context.turns),
+            "summarized_turns": context.summarized_turns,
+            "budget_tokens": self.budget_tokens,
+        }
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._contexts.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contexts.clear()
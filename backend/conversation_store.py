@@ -0,0 +1,282 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    last_activity TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    citations TEXT,
+    is_error INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+"""
+
+
+class ConversationStore:
+    """SQLite (WAL) conversation store with a background group-commit writer."""
+
+    def __init__(self, path: str, flush_interval: float = 0.05, max_batch: int = 256):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._read_lock = threading.Lock()
+        # Queued writes per session, so readers can wait for their own writes
+        self._pending: Dict[str, int] = {}
+        self._pending_changed = threading.Condition()
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self.batches_committed = 0
+        self.writes_committed = 0
+        self.batches_failed = 0
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="conversation-store", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        while True:
+            operation = self._queue.get()
+            if operation is None:
+                self._queue.task_done()
+                break
+            batch = [operation]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    operation = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if operation is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(operation)
+
+            try:
+                connection.execute("BEGIN")
+                for sql, params, _ in batch:
+                    connection.execute(sql, params)
+                connection.execute("COMMIT")
+                self.batches_committed += 1
+                self.writes_committed += len(batch)
+            except Exception as e:
+                self.batches_failed += 1
+                logger.error(
+                    "Conversation store batch of %s writes failed: %s", len(batch), e
+                )
+                connection = self._rollback(connection)
+            finally:
+                self._settle(batch)
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _rollback(self, connection: sqlite3.Connection) -> sqlite3.Connection:
+        """Roll back a failed batch without ever letting the writer thread die,
+        since flush() waits on it; reconnect if the connection is unusable."""
+        try:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            return connection
+        except sqlite3.Error as e:
+            logger.error("Conversation store rollback failed, reconnecting: %s", e)
+        try:
+            connection.close()
+            return self._connect()
+        except sqlite3.Error as e:
+            logger.error("Conversation store reconnect failed: %s", e)
+            return connection
+
+    def _settle(self, batch: List[tuple]) -> None:
+        with self._pending_changed:
+            for _, _, session_id in batch:
+                if session_id is None:
+                    continue
+                self._pending[session_id] -= 1
+                if not self._pending[session_id]:
+                    del self._pending[session_id]
+            self._pending_changed.notify_all()
+
+    def _submit(
+        self, sql: str, params: tuple, session_id: Optional[str] = None
+    ) -> None:
+        if self._closed:
+            return
+        if session_id is not None:
+            with self._pending_changed:
+                self._pending[session_id] = self._pending.get(session_id, 0) + 1
+        self._queue.put((sql, params, session_id))
+
+    def upsert_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        self._submit(
+            "INSERT INTO sessions (session_id, created_at, last_activity, message_count) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+            "last_activity = excluded.last_activity, message_count = excluded.message_count",
+            (
+                session_id,
+                session_data["created_at"],
+                session_data["last_activity"],
+                session_data["message_count"],
+            ),
+            session_id,
+        )
+
+    def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        created_at: str,
+        citations: Optional[List[Dict[str, Any]]] = None,
+        is_error: bool = False,
+    ) -> None:
+        self._submit(
+            "INSERT INTO messages (session_id, role, content, citations, is_error, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session_id,
+                role,
+                content,
+                json.dumps(citations) if citations else None,
+                int(is_error),
+                created_at,
+            ),
+            session_id,
+        )
+
+    def delete_session(self, session_id: str) -> None:
+        self._submit(
+            "DELETE FROM messages WHERE session_id = ?", (session_id,), session_id
+        )
+        self._submit(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,), session_id
+        )
+
+    def clear(self) -> None:
+        self._submit("DELETE FROM messages", ())
+        self._submit("DELETE FROM sessions", ())
+
+    def flush(self) -> None:
+        """Block until every queued write has been committed. Not for request paths:
+        it waits for as long as writes keep arriving."""
+        self._queue.join()
+
+    def wait_for_session(self, session_id: str, timeout: float) -> bool:
+        """Block until the writes queued for `session_id` so far are committed (or
+        failed), so a reader sees its own writes; False if `timeout` ran out first.
+        Unlike flush(), writes for other sessions are not waited for."""
+        with self._pending_changed:
+            return self._pending_changed.wait_for(
+                lambda: session_id not in self._pending, timeout
+            )
+
+    def load_sessions(self, since: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        sql = (
+            "SELECT session_id, created_at, last_activity, message_count FROM sessions"
+        )
+        params: tuple = ()
+        if since:
+            sql += " WHERE last_activity >= ?"
+            params = (since,)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return {
+            row["session_id"]: {
+                "created_at": row["created_at"],
+                "last_activity": row["last_activity"],
+                "message_count": row["message_count"],
+            }
+            for row in rows
+        }
+
+    def has_session(self, session_id: str) -> bool:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def get_messages(
+        self, session_id: str, limit: int = 20, before_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return up to `limit` messages older than `before_id` (newest page first), oldest first."""
+        sql = (
+            "SELECT id, role, content, citations, is_error, created_at FROM messages "
+            "WHERE session_id = ?"
+        )
+        params: List[Any] = [session_id]
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        messages = [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "content": row["content"],
+                "citations": json.loads(row["citations"]) if row["citations"] else [],
+                "is_error": bool(row["is_error"]),
+                "created_at": row["created_at"],
+            }
+            for row in reversed(rows)
+        ]
+        return {
+            "messages": messages,
+            "has_more": has_more,
+            "next_before_id": messages[0]["id"] if has_more and messages else None,
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._reader.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "pending_writes": self._queue.qsize(),
+            "batches_committed": self.batches_committed,
+            "writes_committed": self.writes_committed,
+            "batches_failed": self.batches_failed,
+        }
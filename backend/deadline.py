@@ -0,0 +1,52 @@
+import asyncio
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Optional
+
+# Absolute time.monotonic() deadline of the request being served, if the client set one
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def set_deadline(timeout_seconds: Optional[float]) -> Token:
+    """Start a deadline `timeout_seconds` from now for the current request context."""
+    deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is no deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+async def run_until_disconnected(
+    awaitable: Awaitable[Any],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval: float = 0.5,
+) -> Any:
+    """Await `awaitable`, cancelling it as soon as the client goes away."""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        task.cancel()
@@ -0,0 +1,165 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "can", "could", "do", "does", "for", "how", "i", "is", "it",
+    "me", "my", "of", "on", "please", "the", "to", "what", "whats", "where", "which", "you",
+}  # fmt: skip
+
+
+class AhoCorasick:
+    """Precompiled Aho-Corasick automaton for matching many patterns in one pass."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = (
+                    self._output[next_state] + self._output[self._fail[next_state]]
+                )
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, pattern_id) for every pattern occurrence in text."""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern_id in self._output[state]:
+                start = position - len(self.patterns[pattern_id]) + 1
+                yield start, position + 1, pattern_id
+
+
+class FaqRouter:
+    """Routes queries to canned intent answers when their keywords cover enough of the query.
+
+    A query is routed only when exactly one intent matches and its keywords cover
+    strictly more than `min_coverage` of the query's content words; anything
+    ambiguous falls through to RAG. With `first_match`, the first matching intent in
+    list order wins regardless of coverage, like a plain keyword lookup.
+    """
+
+    def __init__(
+        self,
+        intents: List[Dict[str, Any]],
+        min_coverage: float = 0.5,
+        whole_words: bool = True,
+        first_match: bool = False,
+    ):
+        self.intents = intents
+        self.min_coverage = min_coverage
+        self.whole_words = whole_words
+        self.first_match = first_match
+        patterns, self._pattern_intent = [], []
+        for intent_id, intent in enumerate(intents):
+            for pattern in intent["patterns"]:
+                patterns.append(pattern.lower())
+                self._pattern_intent.append(intent_id)
+        self._automaton = AhoCorasick(patterns)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.ambiguous = 0
+        self.match_us_total = 0.0
+        self.intent_hits = {intent["name"]: 0 for intent in intents}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "FaqRouter":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["intents"], **kwargs)
+
+    def _is_word_match(self, text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    def match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return {"intent", "answer", "coverage"} for the single matching intent, or None."""
+        started = time.perf_counter()
+        text = query.lower()
+        spans: Dict[int, List[Tuple[int, int]]] = {}
+        for start, end, pattern_id in self._automaton.iter_matches(text):
+            if self.whole_words and not self._is_word_match(text, start, end):
+                continue
+            spans.setdefault(self._pattern_intent[pattern_id], []).append((start, end))
+
+        result = None
+        ambiguous = len(spans) > 1 and not self.first_match
+        if spans and self.first_match:
+            intent = self.intents[min(spans)]
+            result = {"intent": intent["name"], "answer": intent["answer"]}
+        elif len(spans) == 1:
+            ((intent_id, intent_spans),) = spans.items()
+            tokens = [
+                (m.start(), m.end())
+                for m in TOKEN_PATTERN.finditer(text)
+                if m.group() not in STOPWORDS
+            ]
+            covered = sum(
+                1
+                for token_start, token_end in tokens
+                if any(s <= token_start and token_end <= e for s, e in intent_spans)
+            )
+            coverage = covered / len(tokens) if tokens else 1.0
+            if coverage > self.min_coverage:
+                intent = self.intents[intent_id]
+                result = {
+                    "intent": intent["name"],
+                    "answer": intent["answer"],
+                    "coverage": round(coverage, 3),
+                }
+
+        with self._lock:
+            self.lookups += 1
+            self.match_us_total += (time.perf_counter() - started) * 1_000_000
+            self.ambiguous += ambiguous
+            if result:
+                self.hits += 1
+                self.intent_hits[result["intent"]] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "intents": len(self.intents),
+            "patterns": len(self._pattern_intent),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "ambiguous": self.ambiguous,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "avg_match_us": (
+                round(self.match_us_total / self.lookups, 2) if self.lookups else 0.0
+            ),
+            "intent_hits": dict(self.intent_hits),
+        }
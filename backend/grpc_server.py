@@ -0,0 +1,348 @@
+import hmac
+import ipaddress
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from deadline import reset_deadline, set_deadline
+from model_router import percentile
+from source_preview import trim_citations
+from structured_logging import REQUEST_ID_PATTERN, request_id_var
+
+try:
+    import grpc
+
+    import chatbot_pb2
+    import chatbot_pb2_grpc
+
+    HAS_GRPC = True
+except ImportError:
+    HAS_GRPC = False
+    logging.warning("grpcio not installed. gRPC server will be disabled.")
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# (message, session_id, priority, run) -> (session_id, result), as app.answer_chat_turn
+ChatTurn = Callable[
+    [str, Optional[str], str, Callable[[Awaitable[Any]], Awaitable[Any]]],
+    Awaitable[Tuple[str, Dict[str, Any]]],
+]
+# session_id -> preview token issuer for its cited URIs, or None, as app.sign_previews
+PreviewSigning = Callable[[str], Optional[Callable[[str], str]]]
+
+
+def reference_uri(reference: Dict[str, Any]) -> str:
+    location = reference.get("location") or {}
+    for key in ("s3Location", "localLocation", "webLocation"):
+        if key in location:
+            return location[key].get("uri") or location[key].get("url") or ""
+    return ""
+
+
+def citations_to_proto(
+    citations: List[Dict[str, Any]],
+    max_chars: int,
+    sign: Optional[Callable[[str], str]] = None,
+) -> List["chatbot_pb2.Citation"]:
+    """Flatten retrievedReferences into protobuf citations with trimmed text and,
+    with `sign`, the preview token for each previewable source."""
+    messages = []
+    for citation in trim_citations(citations, max_chars, sign):
+        for reference in citation.get("retrievedReferences", []):
+            text = (reference.get("content") or {}).get("text", "")
+            score = reference.get("score")
+            messages.append(
+                chatbot_pb2.Citation(
+                    text=text,
+                    uri=reference_uri(reference),
+                    score=score or 0.0,
+                    has_score=score is not None,
+                    preview_token=reference.get("previewToken", ""),
+                )
+            )
+    return messages
+
+
+def result_to_reply(
+    session_id: str,
+    result: Dict[str, Any],
+    max_chars: int,
+    with_answer: bool = True,
+    sign: Optional[Callable[[str], str]] = None,
+) -> "chatbot_pb2.ChatReply":
+    usage = result.get("usage") or {}
+    return chatbot_pb2.ChatReply(
+        success=result["success"],
+        answer=(result.get("answer") or "") if with_answer else "",
+        session_id=session_id or "",
+        citations=citations_to_proto(result.get("citations") or [], max_chars, sign),
+        error=result.get("error") or "",
+        timestamp=result.get("timestamp") or "",
+        timings=result.get("timings") or {},
+        usage=chatbot_pb2.Usage(
+            model=usage.get("model") or "",
+            prompt_version=usage.get("prompt_version") or "",
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cache_read_input_tokens=usage.get("cache_read_input_tokens", 0),
+            cost_usd=usage.get("cost_usd", 0.0),
+            estimated=usage.get("estimated", False),
+        ),
+    )
+
+
+def answer_chunks(answer: str, max_chars: int = 200) -> List[str]:
+    """Split an answer at sentence ends into chunks of about `max_chars`."""
+    chunks, current = [], ""
+    for sentence in SENTENCE_END.split(answer):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current + " ")
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ChatbotService:
+    """gRPC front end to the same chat turn that serves POST /chat.
+
+    Requests are validated and shard-checked like /chat. The call deadline set by
+    the client (capped at `max_timeout`) becomes the request deadline, and the
+    server cancels the handler when the client goes away. With `auth_token`, every
+    call must carry it as `authorization: Bearer <token>` metadata.
+
+    ChatStream is not token streaming: the pipeline (retrieval, caches, model
+    routing, hedging) produces whole answers, so the turn runs to completion
+    before the first event. It then sends the answer in sentence-sized chunks,
+    its citations and a final reply. Time to first byte is the same as Chat's;
+    the stream only saves clients from buffering one large message.
+    """
+
+    def __init__(
+        self,
+        answer_turn: ChatTurn,
+        owner_for: Callable[[Optional[str]], Optional[str]],
+        priorities: Tuple[str, ...],
+        max_timeout: float,
+        snippet_chars: int = 300,
+        chunk_chars: int = 200,
+        window: int = 1000,
+        auth_token: Optional[str] = None,
+        sign_previews: Optional[PreviewSigning] = None,
+    ):
+        self.answer_turn = answer_turn
+        self.owner_for = owner_for
+        self.priorities = priorities
+        self.max_timeout = max_timeout
+        self.snippet_chars = snippet_chars
+        self.chunk_chars = chunk_chars
+        self.auth_token = auth_token
+        self.sign_previews = sign_previews
+        self.unauthenticated = 0
+        self.calls: Dict[str, int] = {"Chat": 0, "ChatStream": 0}
+        self.rejected = 0
+        self.failed = 0
+        self.active = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=window)
+
+    async def _turn(
+        self, request: "chatbot_pb2.ChatRequest", context: "grpc.aio.ServicerContext"
+    ) -> Tuple[str, Dict[str, Any]]:
+        if not request.message.strip():
+            self.rejected += 1
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, "Message cannot be empty"
+            )
+        priority = request.priority or "interactive"
+        if priority not in self.priorities:
+            self.rejected += 1
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"priority must be one of {', '.join(self.priorities)}",
+            )
+        owner = self.owner_for(request.session_id)
+        if owner:
+            self.rejected += 1
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"Session is owned by {owner}",
+                trailing_metadata=(("x-shard-owner", owner),),
+            )
+
+        timeout = self.max_timeout
+        time_remaining = context.time_remaining()
+        if time_remaining is not None:
+            timeout = min(time_remaining, self.max_timeout)
+
+        async def run(work: Awaitable[Any]) -> Any:
+            token = set_deadline(timeout)
+            try:
+                return await work
+            finally:
+                reset_deadline(token)
+
+        try:
+            return await self.answer_turn(
+                request.message, request.session_id or None, priority, run
+            )
+        except Exception as e:
+            logger.error("gRPC chat error: %s", e)
+            self.failed += 1
+            return request.session_id, {
+                "success": False,
+                "error": f"Internal server error: {str(e)}",
+            }
+
+    async def _authenticate(self, context: "grpc.aio.ServicerContext") -> None:
+        if not self.auth_token:
+            return
+        metadata = dict(context.invocation_metadata() or ())
+        if not hmac.compare_digest(
+            metadata.get("authorization", ""), f"Bearer {self.auth_token}"
+        ):
+            self.unauthenticated += 1
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Invalid token")
+
+    def _signer(self, session_id: Optional[str]) -> Optional[Callable[[str], str]]:
+        if not session_id or self.sign_previews is None:
+            return None
+        return self.sign_previews(session_id)
+
+    def _bind_request_id(self, context: "grpc.aio.ServicerContext") -> None:
+        # Every RPC runs in its own task and context, so there is nothing to reset
+        request_id = dict(context.invocation_metadata() or ()).get("x-request-id", "")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        context.set_trailing_metadata((("x-request-id", request_id),))
+        request_id_var.set(request_id)
+
+    def _record(self, method: str, start: float) -> None:
+        self.calls[method] += 1
+        self.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    async def Chat(
+        self, request: "chatbot_pb2.ChatRequest", context: "grpc.aio.ServicerContext"
+    ) -> "chatbot_pb2.ChatReply":
+        await self._authenticate(context)
+        start = time.perf_counter()
+        self._bind_request_id(context)
+        self.active += 1
+        try:
+            session_id, result = await self._turn(request, context)
+            return result_to_reply(
+                session_id,
+                result,
+                self.snippet_chars,
+                sign=self._signer(session_id),
+            )
+        finally:
+            self.active -= 1
+            self._record("Chat", start)
+
+    async def ChatStream(
+        self, request: "chatbot_pb2.ChatRequest", context: "grpc.aio.ServicerContext"
+    ) -> AsyncIterator["chatbot_pb2.ChatEvent"]:
+        await self._authenticate(context)
+        start = time.perf_counter()
+        self._bind_request_id(context)
+        self.active += 1
+        try:
+            session_id, result = await self._turn(request, context)
+            reply = result_to_reply(
+                session_id,
+                result,
+                self.snippet_chars,
+                with_answer=False,
+                sign=self._signer(session_id),
+            )
+            for chunk in answer_chunks(result.get("answer") or "", self.chunk_chars):
+                yield chatbot_pb2.ChatEvent(answer_delta=chunk)
+            for citation in reply.citations:
+                yield chatbot_pb2.ChatEvent(citation=citation)
+            # Citations were already sent one by one
+            del reply.citations[:]
+            yield chatbot_pb2.ChatEvent(done=reply)
+        finally:
+            self.active -= 1
+            self._record("ChatStream", start)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies_ms)
+        return {
+            "calls": dict(self.calls),
+            "active": self.active,
+            "rejected": self.rejected,
+            "unauthenticated": self.unauthenticated,
+            "failed": self.failed,
+            "p50_latency_ms": round(percentile(latencies, 0.5), 2),
+            "p95_latency_ms": round(percentile(latencies, 0.95), 2),
+        }
+
+
+def is_loopback(host: str) -> bool:
+    host = host.strip("[]")
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_server(
+    service: ChatbotService,
+    host: str,
+    port: int,
+    max_concurrent_streams: int = 100,
+    keepalive_seconds: float = 30.0,
+    max_message_bytes: int = 4 * 1024 * 1024,
+    tls_cert: Optional[bytes] = None,
+    tls_key: Optional[bytes] = None,
+) -> "grpc.aio.Server":
+    """An asyncio gRPC server on the running loop; every client's calls share one
+    HTTP/2 connection, up to `max_concurrent_streams` at a time.
+
+    Serves TLS when given a certificate and key. Raises ValueError rather than
+    expose the chat pipeline beyond loopback with neither TLS nor a service token.
+    """
+    if not is_loopback(host) and tls_cert is None and not service.auth_token:
+        raise ValueError(
+            f"Refusing to serve gRPC on {host} without TLS or an auth token"
+        )
+    server = grpc.aio.server(
+        options=[
+            ("grpc.max_concurrent_streams", max_concurrent_streams),
+            ("grpc.keepalive_time_ms", int(keepalive_seconds * 1000)),
+            ("grpc.keepalive_timeout_ms", 10000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+            ("grpc.max_receive_message_length", max_message_bytes),
+            ("grpc.max_send_message_length", max_message_bytes),
+        ]
+    )
+    chatbot_pb2_grpc.add_ChatbotServicer_to_server(service, server)
+    address = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+    if tls_cert is not None:
+        server.add_secure_port(
+            address, grpc.ssl_server_credentials([(tls_key, tls_cert)])
+        )
+    else:
+        server.add_insecure_port(address)
+    return server
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HedgeBudget:
+    """Token bucket that earns `ratio` hedge tokens per request, capped at `burst`."""
+
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class RequestHedger:
+    """Fires a backup call when the primary outlives a latency-percentile deadline."""
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay_ms: float = 500.0,
+        budget: Optional[HedgeBudget] = None,
+        window: int = 500,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.budget = budget or HedgeBudget()
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _samples(self, label: str) -> Deque[float]:
+        return self._latencies.setdefault(label, deque(maxlen=self.window))
+
+    def _counters(self, label: str) -> Dict[str, int]:
+        return self._stats.setdefault(
+            label,
+            {
+                "calls": 0,
+                "hedged": 0,
+                "hedge_wins": 0,
+                "budget_denied": 0,
+                "slot_denied": 0,
+            },
+        )
+
+    def hedge_delay_ms(self, label: str) -> float:
+        samples = self._samples(label)
+        if len(samples) < self.min_samples:
+            return max(self.min_delay_ms, 2000.0)
+        ordered = sorted(samples)
+        index = min(int(len(ordered) * self.percentile), len(ordered) - 1)
+        return max(self.min_delay_ms, ordered[index])
+
+    async def run(
+        self,
+        label: str,
+        primary: Awaitable[Any],
+        hedge: Optional[Callable[[], Optional[Awaitable[Any]]]] = None,
+    ) -> Any:
+        """Await the primary call, racing a hedge against it past the deadline.
+
+        `hedge` starts the backup call, or returns None when the upstream scheduler
+        has no free slot for it, in which case the primary is simply awaited.
+        """
+        counters = self._counters(label)
+        counters["calls"] += 1
+        self.budget.on_request()
+        start = time.perf_counter()
+
+        primary_task = asyncio.ensure_future(primary)
+        if hedge is None:
+            result = await primary_task
+            self._samples(label).append((time.perf_counter() - start) * 1000)
+            return result
+
+        delay_s = self.hedge_delay_ms(label) / 1000
+        done, _ = await asyncio.wait({primary_task}, timeout=delay_s)
+        if done:
+            self._samples(label).append((time.perf_counter() - start) * 1000)
+            return primary_task.result()
+
+        if not self.budget.try_acquire():
+            counters["budget_denied"] += 1
+            result = await primary_task
+            self._samples(label).append((time.perf_counter() - start) * 1000)
+            return result
+
+        hedge_call = hedge()
+        if hedge_call is None:
+            counters["slot_denied"] += 1
+            result = await primary_task
+            self._samples(label).append((time.perf_counter() - start) * 1000)
+            return result
+
+        counters["hedged"] += 1
+        logger.info("Hedging %s after %.0f ms", label, delay_s * 1000)
+        hedge_task = asyncio.ensure_future(hedge_call)
+        pending = {primary_task, hedge_task}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            counters["hedge_wins"] += 1
+                        self._samples(label).append(
+                            (time.perf_counter() - start) * 1000
+                        )
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Worker threads cannot be interrupted; the loser's result is discarded,
+            # and it keeps its scheduler slot until botocore's read timeout fires.
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            label: {**counters, "hedge_delay_ms": round(self.hedge_delay_ms(label), 1)}
+            for label, counters in self._stats.items()
+        }
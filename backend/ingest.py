@@ -0,0 +1,257 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from local_index import (
+    CHUNKS_FILE,
+    MANIFEST_FILE,
+    VECTORS_FILE,
+    check_chunking,
+    chunk_hash,
+    create_embedder,
+    iter_documents,
+    iter_file_chunks,
+    resolve_index_dir,
+    write_index,
+)
+
+logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()))
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "ingest_state.json"
+
+_worker_embedder = None
+
+
+def _init_worker(model_name: Optional[str]) -> None:
+    global _worker_embedder
+    _worker_embedder = create_embedder(model_name)
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return _worker_embedder.embed(texts)
+
+
+def load_previous_index(index_dir: str, embedder_name: str) -> Dict[str, Any]:
+    """Load the previous index's chunks, vectors and per-file state, if compatible."""
+    previous = {"chunks": [], "vectors": None, "files": {}}
+    index_dir = resolve_index_dir(index_dir)
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return previous
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("embedder") != embedder_name:
+        logger.info(
+            "Embedder changed (%s -> %s), re-embedding everything",
+            manifest.get("embedder"),
+            embedder_name,
+        )
+        return previous
+
+    with open(os.path.join(index_dir, CHUNKS_FILE), encoding="utf-8") as f:
+        previous["chunks"] = [json.loads(line) for line in f if line.strip()]
+    previous["vectors"] = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+    state_path = os.path.join(index_dir, STATE_FILE)
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            previous["files"] = json.load(f)
+    return previous
+
+
+def ingest(
+    source_dir: str,
+    index_dir: str,
+    model_name: Optional[str] = None,
+    chunk_size: int = 1000,
+    overlap: int = 150,
+    workers: int = 1,
+    batch_size: int = 64,
+    embedder=None,
+) -> Dict[str, Any]:
+    """Incrementally (re)index source_dir: only new or changed chunks are embedded.
+
+    When no file was added, changed or deleted the existing index is left as is,
+    so a watch loop does not publish a new version (and make the backend reload
+    it) on every idle pass.
+    """
+    check_chunking(chunk_size, overlap)
+    start = time.perf_counter()
+    embedder = embedder or create_embedder(model_name)
+    previous = load_previous_index(index_dir, embedder.name)
+
+    # Map each previously embedded chunk hash to its row in the old vector matrix
+    previous_rows = {
+        c["hash"]: row for row, c in enumerate(previous["chunks"]) if "hash" in c
+    }
+    previous_by_uri: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in previous["chunks"]:
+        previous_by_uri.setdefault(chunk["uri"], []).append(chunk)
+
+    stats = {"files": 0, "files_changed": 0, "files_deleted": 0, "chunks": 0}
+    chunks: List[Dict[str, Any]] = []
+    files_state: Dict[str, Dict[str, Any]] = {}
+    for path in iter_documents(source_dir):
+        uri = path.resolve().as_uri()
+        stat = path.stat()
+        file_state = {"mtime": stat.st_mtime, "size": stat.st_size}
+        files_state[uri] = file_state
+        stats["files"] += 1
+
+        if previous["files"].get(uri) == file_state and uri in previous_by_uri:
+            chunks.extend(previous_by_uri[uri])
+            continue
+
+        stats["files_changed"] += 1
+        for position, text in enumerate(iter_file_chunks(path, chunk_size, overlap)):
+            chunks.append(
+                {
+                    "text": text,
+                    "uri": uri,
+                    "chunk_index": position,
+                    "hash": chunk_hash(text),
+                }
+            )
+    stats["files_deleted"] = len(set(previous["files"]) - set(files_state))
+    stats["chunks"] = len(chunks)
+    unchanged = (
+        previous["vectors"] is not None
+        and not stats["files_changed"]
+        and not stats["files_deleted"]
+    )
+    stats["written"] = not unchanged
+    if unchanged:
+        stats.update(
+            {
+                "chunks_embedded": 0,
+                "chunks_reused": len(chunks),
+                "embed_seconds": 0.0,
+                "embed_chunks_per_sec": 0.0,
+                "total_seconds": round(time.perf_counter() - start, 3),
+                "chunks_per_sec": 0.0,
+            }
+        )
+        return stats
+
+    # Reuse vectors for unchanged chunk hashes and embed the rest
+    vectors = np.zeros((len(chunks), embedder.dims), dtype=np.float32)
+    pending: Dict[str, List[int]] = {}
+    for row, chunk in enumerate(chunks):
+        previous_row = previous_rows.get(chunk["hash"])
+        if previous_row is not None:
+            vectors[row] = previous["vectors"][previous_row]
+        else:
+            pending.setdefault(chunk["hash"], []).append(row)
+
+    pending_hashes = list(pending)
+    texts = [chunks[pending[h][0]]["text"] for h in pending_hashes]
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    embed_start = time.perf_counter()
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(model_name,)
+        ) as executor:
+            embedded = list(executor.map(_embed_batch, batches))
+    else:
+        embedded = [embedder.embed(batch) for batch in batches]
+    embed_seconds = time.perf_counter() - embed_start
+
+    offset = 0
+    for batch_vectors in embedded:
+        for vector in batch_vectors:
+            for row in pending[pending_hashes[offset]]:
+                vectors[row] = vector
+            offset += 1
+
+    write_index(index_dir, chunks, vectors, embedder, {STATE_FILE: files_state})
+
+    total_seconds = time.perf_counter() - start
+    stats.update(
+        {
+            "chunks_embedded": len(texts),
+            "chunks_reused": len(chunks) - sum(len(rows) for rows in pending.values()),
+            "embed_seconds": round(embed_seconds, 3),
+            "embed_chunks_per_sec": (
+                round(len(texts) / embed_seconds, 1) if embed_seconds else 0.0
+            ),
+            "total_seconds": round(total_seconds, 3),
+            "chunks_per_sec": (
+                round(len(chunks) / total_seconds, 1) if total_seconds else 0.0
+            ),
+        }
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Incrementally ingest documents into the local vector index"
+    )
+    parser.add_argument(
+        "--source", required=True, help="Source directory or local bucket path"
+    )
+    parser.add_argument("--index", default=os.getenv("LOCAL_INDEX_DIR", "local_index"))
+    parser.add_argument(
+        "--model", default=None, help="sentence-transformers model name"
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=150)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Embedding worker processes"
+    )
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--watch", action="store_true", help="Keep polling the source for changes"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=30.0, help="Watch polling interval (s)"
+    )
+    args = parser.parse_args()
+    try:
+        check_chunking(args.chunk_size, args.overlap)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Loaded once: a sentence-transformers model is too slow to load on every pass
+    embedder = create_embedder(args.model)
+    while True:
+        stats = ingest(
+            args.source,
+            args.index,
+            args.model,
+            args.chunk_size,
+            args.overlap,
+            args.workers,
+            args.batch_size,
+            embedder=embedder,
+        )
+        if not stats["written"]:
+            logger.info("No changes in %s files, index left as is", stats["files"])
+        else:
+            logger.info(
+                "Ingested %s files (%s changed, %s deleted): %s chunks, %s embedded, "
+                "%s reused, %s chunks/sec embedding, %s chunks/sec overall",
+                stats["files"],
+                stats["files_changed"],
+                stats["files_deleted"],
+                stats["chunks"],
+                stats["chunks_embedded"],
+                stats["chunks_reused"],
+                stats["embed_chunks_per_sec"],
+                stats["chunks_per_sec"],
+            )
+        if not args.watch:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from passage_cache import embed_query
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not installed. Local vector index will be disabled.")
+
+try:
+    from sentence_transformers import SentenceTransformer
+
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = {".txt", ".md", ".markdown", ".csv", ".json", ".html", ".htm"}
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+MANIFEST_FILE = "manifest.json"
+# Each write goes to versions/<id>/; CURRENT names the live one and is swapped atomically
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 2
+
+
+class HashingEmbedder:
+    """CPU-only embedder based on hashed word and character n-gram features."""
+
+    def __init__(self, dims: int = 512):
+        self.dims = dims
+        self.name = f"hashing-{dims}"
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, value in embed_query(text, self.dims).items():
+                matrix[row, index] = value
+        return matrix
+
+
+class SentenceTransformerEmbedder:
+    """CPU-only sentence-transformers embedder (optional dependency)."""
+
+    def __init__(self, model_name: str):
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dims = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        return self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+
+def create_embedder(model_name: Optional[str] = None, dims: int = 512):
+    """Return a sentence-transformers embedder when requested and installed, else hashing."""
+    if model_name and model_name.startswith("hashing-"):
+        return HashingEmbedder(int(model_name.split("-", 1)[1]))
+    if model_name and HAS_SENTENCE_TRANSFORMERS:
+        return SentenceTransformerEmbedder(model_name)
+    if model_name:
+        logger.warning(
+            "sentence-transformers not installed, using hashing embedder instead of %s",
+            model_name,
+        )
+    return HashingEmbedder(dims)
+
+
+def iter_documents(docs_dir: str) -> Iterator[Path]:
+    for path in sorted(Path(docs_dir).rglob("*")):
+        if path.is_file() and path.suffix.lower() in DOCUMENT_EXTENSIONS:
+            yield path
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def check_chunking(chunk_size: int, overlap: int) -> None:
+    """Reject chunk settings that would make the chunker crawl one character at a time."""
+    if chunk_size <= 0:
+        raise ValueError(f"chunk size must be positive, got {chunk_size}")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(
+            f"overlap must be at least 0 and less than the chunk size ({chunk_size}), "
+            f"got {overlap}"
+        )
+
+
+def find_chunk_end(text: str, start: int, chunk_size: int) -> int:
+    """Pick where a chunk starting at `start` ends, preferring paragraph and sentence breaks."""
+    end = min(start + chunk_size, len(text))
+    if end < len(text):
+        for separator in ("\n\n", ". ", "\n", " "):
+            boundary = text.rfind(separator, start + chunk_size // 2, end)
+            if boundary != -1:
+                return boundary + len(separator)
+    return end
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 150) -> List[str]:
+    """Split text into overlapping chunks, preferring paragraph and sentence boundaries."""
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = find_chunk_end(text, start, chunk_size)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def iter_file_chunks(
+    path: Path, chunk_size: int = 1000, overlap: int = 150, block_size: int = 64 * 1024
+) -> Iterator[str]:
+    """Stream chunks from a file without loading it into memory all at once."""
+    buffer = ""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        while True:
+            block = f.read(block_size)
+            buffer += block
+            while buffer and (len(buffer) > chunk_size or not block):
+                end = find_chunk_end(buffer, 0, chunk_size)
+                chunk = buffer[:end].strip()
+                if chunk:
+                    yield chunk
+                buffer = "" if end >= len(buffer) else buffer[max(end - overlap, 1) :]
+            if not block:
+                break
+
+
+def build_index(
+    docs_dir: str,
+    index_dir: str,
+    embedder=None,
+    chunk_size: int = 1000,
+    overlap: int = 150,
+    batch_size: int = 64,
+) -> Dict[str, Any]:
+    """Chunk and embed every document under docs_dir and write the index to index_dir."""
+    embedder = embedder or HashingEmbedder()
+
+    chunks: List[Dict[str, Any]] = []
+    for path in iter_documents(docs_dir):
+        for position, chunk in enumerate(iter_file_chunks(path, chunk_size, overlap)):
+            chunks.append(
+                {
+                    "text": chunk,
+                    "uri": path.resolve().as_uri(),
+                    "chunk_index": position,
+                    "hash": chunk_hash(chunk),
+                }
+            )
+
+    vectors = np.zeros((len(chunks), embedder.dims), dtype=np.float32)
+    for offset in range(0, len(chunks), batch_size):
+        batch = chunks[offset : offset + batch_size]
+        vectors[offset : offset + len(batch)] = embedder.embed(
+            [c["text"] for c in batch]
+        )
+
+    return write_index(index_dir, chunks, vectors, embedder)
+
+
+def resolve_index_dir(index_dir: str) -> str:
+    """Directory holding the live index files: the version named by CURRENT, or
+    index_dir itself for indexes written before versioning."""
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return index_dir
+    return os.path.join(index_dir, VERSIONS_DIR, version)
+
+
+def write_index(
+    index_dir: str,
+    chunks: List[Dict[str, Any]],
+    vectors: "np.ndarray",
+    embedder,
+    extra_files: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Write vectors, chunk metadata, manifest and `extra_files` (name -> JSON value)
+    into a new version directory, then switch CURRENT to it in one os.replace.
+
+    Readers resolve CURRENT once per load, so they always see files from a single
+    version. Only the newest KEEP_VERSIONS versions are kept.
+    """
+    version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    version_dir = os.path.join(index_dir, VERSIONS_DIR, version)
+    os.makedirs(version_dir)
+    with open(os.path.join(version_dir, VECTORS_FILE), "wb") as f:
+        np.save(f, vectors)
+    with open(os.path.join(version_dir, CHUNKS_FILE), "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+    manifest = {
+        "embedder": embedder.name,
+        "dims": embedder.dims,
+        "chunks": len(chunks),
+        "built_at": time.time(),
+        "version": version,
+    }
+    with open(os.path.join(version_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    for name, value in (extra_files or {}).items():
+        with open(os.path.join(version_dir, name), "w", encoding="utf-8") as f:
+            json.dump(value, f)
+
+    current_tmp = os.path.join(index_dir, CURRENT_FILE + ".tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(index_dir, CURRENT_FILE))
+    prune_versions(index_dir, version)
+    return manifest
+
+
+def prune_versions(index_dir: str, current: str) -> None:
+    versions_dir = os.path.join(index_dir, VERSIONS_DIR)
+    # Version ids start with a nanosecond timestamp, so names sort by age
+    stale = [v for v in sorted(os.listdir(versions_dir)) if v != current]
+    for version in stale[: max(0, len(stale) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+
+class LocalVectorIndex:
+    """Flat inner-product index over a memory-mapped, L2-normalised embedding matrix."""
+
+    def __init__(self, index_dir: str, embedder=None):
+        self.index_dir = index_dir
+        self.embedder = embedder
+        # Searches run in worker threads: one thread reloads at a time, and searches
+        # read (embedder, vectors, chunks) from a single attribute so they never mix
+        # two versions
+        self._reload_lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        path = resolve_index_dir(self.index_dir)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        loaded_from = (path, os.stat(manifest_path).st_mtime)
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        embedder = self.embedder or create_embedder(manifest["embedder"])
+        if embedder.dims != manifest["dims"]:
+            raise ValueError(
+                f"Embedder dims {embedder.dims} do not match index dims {manifest['dims']}"
+            )
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        if len(chunks) != len(vectors):
+            raise ValueError(
+                f"Index at {path} has {len(vectors)} vectors but {len(chunks)} chunks"
+            )
+        self.manifest, self.embedder, self.vectors, self.chunks = (
+            manifest,
+            embedder,
+            vectors,
+            chunks,
+        )
+        self._current = (embedder, vectors, chunks)
+        self._loaded_from = loaded_from
+
+    def refresh(self) -> bool:
+        """Reload the index if it was rewritten on disk (e.g. by ingest.py)."""
+        try:
+            with self._reload_lock:
+                path = resolve_index_dir(self.index_dir)
+                mtime = os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime
+                if (path, mtime) == self._loaded_from:
+                    return False
+                self._load()
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to reload local vector index: %s", e)
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Return the top-k chunks as passages shaped like Bedrock `retrieve` results."""
+        embedder, vectors, chunks = self._current
+        if not len(chunks):
+            return []
+        query_vector = embedder.embed([query])[0]
+        scores = vectors @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "text": chunks[i]["text"],
+                "score": float(scores[i]),
+                "location": {
+                    "type": "LOCAL",
+                    "localLocation": {"uri": chunks[i]["uri"]},
+                },
+                "metadata": {"chunk_index": chunks[i]["chunk_index"]},
+            }
+            for i in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"index_dir": self.index_dir, **self.manifest}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build or query the local vector index"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Build the index from a document directory"
+    )
+    build_parser.add_argument(
+        "--docs", required=True, help="Directory with source documents"
+    )
+    build_parser.add_argument("--index", required=True, help="Output index directory")
+    build_parser.add_argument(
+        "--model", default=None, help="sentence-transformers model name"
+    )
+    build_parser.add_argument("--chunk-size", type=int, default=1000)
+    build_parser.add_argument("--overlap", type=int, default=150)
+
+    search_parser = subparsers.add_parser("search", help="Query an existing index")
+    search_parser.add_argument("--index", required=True)
+    search_parser.add_argument("--k", type=int, default=5)
+    search_parser.add_argument("query")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        try:
+            check_chunking(args.chunk_size, args.overlap)
+        except ValueError as e:
+            build_parser.error(str(e))
+        start = time.perf_counter()
+        manifest = build_index(
+            args.docs,
+            args.index,
+            create_embedder(args.model),
+            args.chunk_size,
+            args.overlap,
+        )
+        print(
+            f"Indexed {manifest['chunks']} chunks in {time.perf_counter() - start:.2f}s"
+        )
+    else:
+        index = LocalVectorIndex(args.index)
+        for passage in index.search(args.query, args.k):
+            print(
+                f"{passage['score']:.3f}  {passage['location']['localLocation']['uri']}"
+            )
+            print(f"    {passage['text'][:160]}")
+
+
+if __name__ == "__main__":
+    main()
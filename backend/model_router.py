@@ -0,0 +1,112 @@
+import re
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+COMPLEX_MARKERS = {
+    "analyze", "analyse", "better", "best", "calculate", "cheapest", "compare",
+    "comparison", "cons", "difference", "differences", "explain", "if", "pros",
+    "recommend", "summarise", "summarize", "versus", "vs", "why",
+}  # fmt: skip
+
+NO_ANSWER_MARKERS = (
+    "sorry, i am unable",
+    "i'm unable to",
+    "i am unable to",
+    "i could not find",
+    "i don't have",
+)
+
+
+def classify_query(query: str, max_simple_words: int = 12) -> Tuple[str, str]:
+    """Cheap heuristic: short single questions without reasoning cues are 'simple'."""
+    words = TOKEN_PATTERN.findall(query.lower())
+    if len(words) > max_simple_words:
+        return "complex", "long query"
+    if query.count("?") > 1:
+        return "complex", "multiple questions"
+    markers = COMPLEX_MARKERS.intersection(words)
+    if markers:
+        return "complex", f"reasoning cue: {sorted(markers)[0]}"
+    if sum(word.isdigit() for word in words) >= 2:
+        return "complex", "numeric comparison"
+    return "simple", "short factual query"
+
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class RouteMetrics:
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.no_answers = 0
+        self.citations_total = 0
+        self.answer_chars_total = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        successes = self.requests - self.errors
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": (
+                round(self.errors / self.requests, 4) if self.requests else 0.0
+            ),
+            "no_answer_rate": (
+                round(self.no_answers / successes, 4) if successes else 0.0
+            ),
+            "avg_citations": (
+                round(self.citations_total / successes, 2) if successes else 0.0
+            ),
+            "avg_answer_chars": (
+                round(self.answer_chars_total / successes, 1) if successes else 0.0
+            ),
+            "p50_latency_ms": round(percentile(self.latencies_ms, 0.5), 2),
+            "p95_latency_ms": round(percentile(self.latencies_ms, 0.95), 2),
+        }
+
+
+class ModelRouter:
+    """Picks a fast model for simple queries and the full model for hard ones."""
+
+    def __init__(
+        self, fast_model_id: str, full_model_id: str, max_simple_words: int = 12
+    ):
+        self.models = {"simple": fast_model_id, "complex": full_model_id}
+        self.max_simple_words = max_simple_words
+        self.metrics = {route: RouteMetrics() for route in self.models}
+        self._lock = threading.Lock()
+
+    def route(self, query: str) -> Tuple[str, str]:
+        """Return (route, model_id) for a query."""
+        route, _ = classify_query(query, self.max_simple_words)
+        return route, self.models[route]
+
+    def record(self, route: str, latency_ms: float, result: Dict[str, Any]) -> None:
+        """Record latency and quality proxies (errors, non-answers, citations) for a route."""
+        with self._lock:
+            metrics = self.metrics[route]
+            metrics.requests += 1
+            metrics.latencies_ms.append(latency_ms)
+            if not result.get("success"):
+                metrics.errors += 1
+                return
+            answer = result.get("answer") or ""
+            metrics.answer_chars_total += len(answer)
+            metrics.citations_total += len(result.get("citations") or [])
+            if not answer or any(m in answer.lower() for m in NO_ANSWER_MARKERS):
+                metrics.no_answers += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                route: {"model_id": self.models[route], **metrics.snapshot()}
+                for route, metrics in self.metrics.items()
+            }
@@ -0,0 +1,335 @@
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+# Words that flip or narrow a query's intent while barely moving its embedding
+POLARITY_WORDS = frozenset(
+    {
+        "no",
+        "not",
+        "never",
+        "without",
+        "cannot",
+        "don",
+        "doesn",
+        "didn",
+        "isn",
+        "aren",
+        "won",
+        "off",
+        "stop",
+        "cancel",
+        "deactivate",
+        "disable",
+        "unsubscribe",
+        "remove",
+    }
+)
+
+SparseVector = Dict[int, float]
+
+
+def embed_query(text: str, dims: int = 512) -> SparseVector:
+    """Cheap local query embedding: hashed word unigrams and character trigrams, L2-normalised."""
+    vector: SparseVector = {}
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        features = [f"w:{token}"]
+        padded = f" {token} "
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        for feature in features:
+            index = zlib.crc32(feature.encode("utf-8")) % dims
+            vector[index] = vector.get(index, 0.0) + 1.0
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if norm:
+        for index in vector:
+            vector[index] /= norm
+    return vector
+
+
+def query_signature(text: str) -> Tuple[frozenset, frozenset]:
+    """Numbers and polarity words of a query; queries that differ in either never share passages.
+
+    Hashed lexical similarity scores "activate roaming" vs "deactivate roaming" or
+    "5GB package" vs "10GB package" close to 0.9, so similarity alone cannot tell
+    them apart.
+    """
+    lowered = text.lower()
+    return (
+        frozenset(NUMBER_PATTERN.findall(lowered)),
+        POLARITY_WORDS.intersection(TOKEN_PATTERN.findall(lowered)),
+    )
+
+
+def cosine_similarity(a: SparseVector, b: SparseVector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+def estimate_size(passages: List[Dict[str, Any]]) -> int:
+    """Approximate memory footprint of a passage list in bytes."""
+    return sum(len(p.get("text", "")) + 256 for p in passages)
+
+
+class SemanticPassageCache:
+    """Bounded cache of retrieved passages, matched by query-embedding similarity."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 600.0,
+        similarity_threshold: float = 0.9,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        embedding: SparseVector,
+        number_of_results: int,
+        signature: Optional[Tuple[frozenset, frozenset]] = None,
+    ) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """Return (passages, similarity) for the closest fresh entry above the threshold.
+
+        When `signature` is given, only entries with the same numbers and polarity
+        words are considered.
+        """
+        now = time.monotonic()
+        best_key, best_score = None, 0.0
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["expires_at"] < now:
+                    self._evict(key)
+                    continue
+                if entry["number_of_results"] < number_of_results:
+                    continue
+                if signature is not None and entry["signature"] != signature:
+                    continue
+                score = cosine_similarity(embedding, entry["embedding"])
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None or best_score < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]["passages"][:number_of_results], best_score
+
+    def store(
+        self,
+        query: str,
+        embedding: SparseVector,
+        passages: List[Dict[str, Any]],
+        number_of_results: int,
+    ) -> None:
+        size = estimate_size(passages)
+        if size > self.max_bytes:
+            return
+        key = query.strip().lower()
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = {
+                "embedding": embedding,
+                "signature": query_signature(query),
+                "passages": passages,
+                "number_of_results": number_of_results,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+                "size": size,
+            }
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry["size"]
+
+    def evict_oldest(self) -> int:
+        """Drop the least recently used entry and return the bytes it freed."""
+        with self._lock:
+            if not self._entries:
+                return 0
+            key = next(iter(self._entries))
+            size = self._entries[key]["size"]
+            self._evict(key)
+            return size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self.bytes}
+
+
+class SessionPassageCache:
+    """Per-session passage caches backed by a shared global cache.
+
+    `max_bytes` bounds all entries together: the global cache may use up to half
+    of it, and sessions share the rest, least recently used sessions being
+    evicted first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        session_max_entries: int = 16,
+        global_max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 600.0,
+        similarity_threshold: float = 0.9,
+    ):
+        self.max_sessions = max_sessions
+        self.session_max_entries = session_max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.global_cache = SemanticPassageCache(
+            max_entries=global_max_entries,
+            max_bytes=max_bytes // 2,
+            ttl_seconds=ttl_seconds,
+            similarity_threshold=similarity_threshold,
+        )
+        self._sessions: "OrderedDict[str, SemanticPassageCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.session_hits = 0
+        self.global_hits = 0
+        self.misses = 0
+        self.hit_lookup_ms_total = 0.0
+        self.miss_retrieve_ms_total = 0.0
+        self.retrievals = 0
+
+    def _session_cache(
+        self, session_id: str, create: bool
+    ) -> Optional[SemanticPassageCache]:
+        with self._lock:
+            cache = self._sessions.get(session_id)
+            if cache is None and create:
+                cache = SemanticPassageCache(
+                    max_entries=self.session_max_entries,
+                    max_bytes=self.max_bytes - self.global_cache.max_bytes,
+                    ttl_seconds=self.ttl_seconds,
+                    similarity_threshold=self.similarity_threshold,
+                )
+                self._sessions[session_id] = cache
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            if cache is not None:
+                self._sessions.move_to_end(session_id)
+            return cache
+
+    def lookup(
+        self, query: str, number_of_results: int, session_id: Optional[str] = None
+    ) -> Tuple[Optional[List[Dict[str, Any]]], SparseVector, Optional[str]]:
+        """Return (passages or None, query embedding, hit scope)."""
+        start = time.perf_counter()
+        embedding = embed_query(query)
+        signature = query_signature(query)
+        scope = None
+        hit = None
+
+        if session_id:
+            session_cache = self._session_cache(session_id, create=False)
+            if session_cache is not None:
+                hit = session_cache.lookup(embedding, number_of_results, signature)
+                scope = "session" if hit else None
+        if hit is None:
+            hit = self.global_cache.lookup(embedding, number_of_results, signature)
+            scope = "global" if hit else None
+
+        if hit is None:
+            self.misses += 1
+            return None, embedding, None
+
+        if scope == "session":
+            self.session_hits += 1
+        else:
+            self.global_hits += 1
+        self.hit_lookup_ms_total += (time.perf_counter() - start) * 1000
+        return hit[0], embedding, scope
+
+    def store(
+        self,
+        query: str,
+        embedding: SparseVector,
+        passages: List[Dict[str, Any]],
+        number_of_results: int,
+        session_id: Optional[str] = None,
+        retrieve_ms: float = 0.0,
+    ) -> None:
+        self.miss_retrieve_ms_total += retrieve_ms
+        self.retrievals += 1
+        self.global_cache.store(query, embedding, passages, number_of_results)
+        if session_id:
+            self._session_cache(session_id, create=True).store(
+                query, embedding, passages, number_of_results
+            )
+            self._enforce_budget(session_id)
+
+    def _enforce_budget(self, keep: str) -> None:
+        """Evict whole sessions, least recently used first, then the oldest entries of
+        `keep`, until every cache together fits in max_bytes."""
+        with self._lock:
+            total = self.global_cache.bytes + sum(
+                cache.bytes for cache in self._sessions.values()
+            )
+            for session_id in list(self._sessions):
+                if total <= self.max_bytes:
+                    return
+                if session_id != keep:
+                    total -= self._sessions.pop(session_id).bytes
+            cache = self._sessions.get(keep)
+            while cache is not None and total > self.max_bytes and len(cache):
+                total -= cache.evict_oldest()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            sessions = sum(cache.bytes for cache in self._sessions.values())
+        return self.global_cache.bytes + sessions
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+        self.global_cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.session_hits + self.global_hits
+        total = hits + self.misses
+        avg_hit_ms = self.hit_lookup_ms_total / hits if hits else 0.0
+        avg_miss_ms = (
+            self.miss_retrieve_ms_total / self.retrievals if self.retrievals else 0.0
+        )
+        return {
+            "session_hits": self.session_hits,
+            "global_hits": self.global_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "avg_hit_lookup_ms": round(avg_hit_ms, 3),
+            "avg_miss_retrieve_ms": round(avg_miss_ms, 3),
+            "estimated_saved_ms": round(hits * max(avg_miss_ms - avg_hit_ms, 0.0), 2),
+            "sessions": len(self._sessions),
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "global": self.global_cache.stats(),
+        }
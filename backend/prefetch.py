@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from faq_router import STOPWORDS, TOKEN_PATTERN
+from hedging import HedgeBudget
+from prewarm import answer_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Follow-ups walk a service's lifecycle: what it costs, turning it on, turning it off
+FOLLOW_UP_TEMPLATES = {
+    "cost": "How much does {topic} cost?",
+    "activate": "How do I activate {topic}?",
+    "cancel": "How do I cancel {topic}?",
+}
+NEXT_STEPS = {
+    "cost": ("activate", "cancel"),
+    "activate": ("cost", "cancel"),
+    "cancel": (),
+}
+# Words that put a question on one of those steps. Questions on none of them
+# (checking a balance, contacting support, small talk) get no predictions, since
+# the templates would not make sense for their topic
+STEP_WORDS = {
+    "cost": {"cost", "costs", "price", "prices", "fee", "fees", "charge", "charged"},
+    "activate": {"activate", "buy", "subscribe", "enable", "order", "connect"},
+    "cancel": {"cancel", "deactivate", "disable", "unsubscribe", "stop"},
+}
+
+# Words that say what the user wants to do rather than what they are asking about
+INTENT_WORDS = set().union(*STEP_WORDS.values()) | {
+    "available", "change", "check", "does", "get", "have", "much", "need", "tell",
+    "use", "want", "work", "works", "about", "there", "any", "when", "why", "with",
+    "your", "be", "in", "or", "at", "from", "abroad", "offer",
+}  # fmt: skip
+
+SMALL_TALK = {
+    "hello", "hi", "hey", "salam", "thanks", "thank", "thx", "bye", "ok", "okay",
+    "yes", "no", "good", "morning", "afternoon", "evening", "help", "great", "u",
+    "lot", "very",
+}  # fmt: skip
+
+MIN_QUERY_WORDS = 3
+
+
+def extract_topic(query: str, max_words: int = 2) -> Optional[str]:
+    """What a question is about, e.g. 'roaming' or 'the unlimited plan'.
+
+    Greetings, small talk and queries shorter than MIN_QUERY_WORDS have no topic.
+    The topic is the first run of content words, so trailing qualifiers ("in
+    Europe") are not glued onto it; it keeps the query's casing and article.
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    if len(tokens) < MIN_QUERY_WORDS:
+        return None
+    run: List[str] = []
+    article = False
+    for token in tokens:
+        word = token.lower()
+        if (
+            word in STOPWORDS
+            or word in INTENT_WORDS
+            or word in SMALL_TALK
+            or word.isdigit()
+        ):
+            if run:
+                break
+            article = word == "the"
+            continue
+        run.append(token)
+    if not run:
+        return None
+    topic = " ".join(run[-max_words:])
+    return f"the {topic}" if article and len(run) <= max_words else topic
+
+
+def suggest_follow_ups(query: str, limit: int = 2) -> List[str]:
+    """Next lifecycle questions about the service `query` asks about, if any."""
+    words = set(TOKEN_PATTERN.findall(query.lower()))
+    step = next((s for s, step_words in STEP_WORDS.items() if words & step_words), None)
+    topic = extract_topic(query) if step else None
+    if not topic:
+        return []
+    return [
+        FOLLOW_UP_TEMPLATES[next_step].format(topic=topic)
+        for next_step in NEXT_STEPS[step]
+    ][:limit]
+
+
+class FollowUpPrefetcher:
+    """Answers likely follow-up questions in the background after each answer.
+
+    Predictions are kept per session until the user's next question: a matching
+    question is served from the prefetched (or still running) answer, anything
+    else cancels the session's outstanding prefetches. A token bucket caps the
+    number of prefetches at `budget_ratio` per live request.
+    """
+
+    def __init__(
+        self,
+        answer: Callable[[str, str], Awaitable[Dict[str, Any]]],
+        max_per_answer: int = 2,
+        budget_ratio: float = 1.0,
+        budget_burst: float = 10.0,
+        max_sessions: int = 1000,
+    ):
+        self.answer = answer
+        self.max_per_answer = max_per_answer
+        self.budget = HedgeBudget(ratio=budget_ratio, burst=budget_burst)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[Any, asyncio.Task]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats_counters = {
+            "scheduled": 0,
+            "budget_denied": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "hits": 0,
+            "inflight_misses": 0,
+            "misses": 0,
+            "unused": 0,
+        }
+        self.cost_usd = 0.0
+        self.saved_ms = 0.0
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats_counters[name] += amount
+
+    def _discard(self, session_id: str) -> None:
+        tasks = self._sessions.pop(session_id, {})
+        for task in tasks.values():
+            if task.done():
+                self._count("unused")
+            else:
+                task.cancel()
+                self._count("cancelled")
+
+    async def _run(self, question: str, session_id: str) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            result = await self.answer(question, session_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Prefetch failed for %r: %s", question, e)
+            self._count("failed")
+            return None
+        with self._lock:
+            self.cost_usd += (result.get("usage") or {}).get("cost_usd", 0.0)
+        if not result.get("success"):
+            self._count("failed")
+            return None
+        self._count("completed")
+        result["prefetch_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def schedule(self, session_id: str, query: str) -> List[str]:
+        """Start prefetching follow-ups to `query`, replacing earlier predictions.
+
+        Returns every predicted question, including any the budget did not allow
+        prefetching, so clients can offer them as suggestions.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._discard(session_id)
+        self.budget.on_request()
+        tasks: Dict[Any, asyncio.Task] = {}
+        predicted = suggest_follow_ups(query, self.max_per_answer)
+        for question in predicted:
+            if not self.budget.try_acquire():
+                self._count("budget_denied")
+                break
+            tasks[answer_cache_key(question)] = asyncio.create_task(
+                self._run(question, session_id)
+            )
+            self._count("scheduled")
+        if tasks:
+            self._sessions[session_id] = tasks
+            while len(self._sessions) > self.max_sessions:
+                self._discard(next(iter(self._sessions)))
+        return predicted
+
+    def take(self, session_id: Optional[str], query: str) -> Optional[Dict]:
+        """Return the prefetched answer for `query` if it is ready, cancelling the rest.
+
+        A prefetch still running is cancelled rather than awaited: it runs at bulk
+        priority and under its own timeout, so the live request is better served by
+        a normal interactive call.
+        """
+        if not session_id or session_id not in self._sessions:
+            return None
+        tasks = self._sessions.pop(session_id)
+        task = tasks.pop(answer_cache_key(query), None)
+        self._sessions[session_id] = tasks
+        self._discard(session_id)
+        if task is None:
+            self._count("misses")
+            return None
+        if not task.done():
+            task.cancel()
+            self._count("inflight_misses")
+            return None
+        result = None if task.cancelled() else task.result()
+        if result is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        with self._lock:
+            self.saved_ms += result["prefetch_ms"]
+        return result
+
+    def drop_session(self, session_id: str) -> None:
+        """Forget a deleted session; safe to call from worker threads."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._discard, session_id)
+
+    def _discard_all(self) -> None:
+        for session_id in list(self._sessions):
+            self._discard(session_id)
+
+    def clear(self) -> None:
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._discard_all)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.stats_counters)
+            hits = counters["hits"]
+            lookups = hits + counters["misses"] + counters["inflight_misses"]
+            return {
+                **counters,
+                "sessions": len(self._sessions),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "useful_rate": (
+                    round(hits / counters["scheduled"], 4)
+                    if counters["scheduled"]
+                    else 0.0
+                ),
+                "cost_usd": round(self.cost_usd, 6),
+                "estimated_saved_ms": round(self.saved_ms, 2),
+            }
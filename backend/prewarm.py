@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def answer_cache_key(query: str) -> Tuple[str, str]:
+    """Cache key for a first-turn question, insensitive to case, spacing and final punctuation."""
+    normalized = WHITESPACE_PATTERN.sub(" ", query.strip().lower()).rstrip("?!. ")
+    return ("question", normalized)
+
+
+class AnswerPrewarmer:
+    """Keeps answers to a curated question set warm in the answer cache.
+
+    Each pass only re-queries questions that are missing or within `refresh_margin`
+    of expiring, with at most `concurrency` calls in flight and calls started at
+    least `stagger_seconds` apart so a pass never bursts upstream traffic.
+    """
+
+    def __init__(
+        self,
+        questions: List[str],
+        answer: Callable[[str], Awaitable[Dict[str, Any]]],
+        cache: TTLCache,
+        concurrency: int = 4,
+        stagger_seconds: float = 0.5,
+        refresh_margin: float = 0.2,
+        ttl_jitter: float = 0.1,
+    ):
+        self.questions = questions
+        self.answer = answer
+        self.cache = cache
+        self.concurrency = concurrency
+        self.stagger_seconds = stagger_seconds
+        self.refresh_margin = refresh_margin
+        self.ttl_jitter = ttl_jitter
+        self.passes = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_pass_seconds: Optional[float] = None
+
+    @classmethod
+    def from_file(cls, path: str, *args, **kwargs) -> "AnswerPrewarmer":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["questions"], *args, **kwargs)
+
+    def due(self) -> List[str]:
+        """Questions that are missing from the cache or about to expire."""
+        threshold = self.cache.ttl_seconds * self.refresh_margin
+        due = []
+        for question in self.questions:
+            left = self.cache.ttl_remaining(answer_cache_key(question))
+            if left is None or left < threshold:
+                due.append(question)
+        return due
+
+    async def _refresh(self, question: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                result = await self.answer(question)
+            except Exception as e:
+                logger.warning("Prewarm failed for %r: %s", question, e)
+                self.failed += 1
+                return
+        if not result.get("success"):
+            self.failed += 1
+            return
+        # Jitter the TTL so entries warmed together do not all expire together
+        ttl = self.cache.ttl_seconds * (1 - random.uniform(0, self.ttl_jitter))
+        self.cache.set(answer_cache_key(question), result, ttl_seconds=ttl)
+        self.refreshed += 1
+
+    async def warm(self) -> int:
+        """Run one incremental pass and return the number of questions re-queried."""
+        start = time.perf_counter()
+        due = self.due()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        for position, question in enumerate(due):
+            if position:
+                await asyncio.sleep(self.stagger_seconds)
+            tasks.append(asyncio.ensure_future(self._refresh(question, semaphore)))
+        await asyncio.gather(*tasks)
+        self.passes += 1
+        self.last_pass_seconds = round(time.perf_counter() - start, 3)
+        logger.info(
+            "Prewarm pass refreshed %s/%s questions in %ss",
+            len(due),
+            len(self.questions),
+            self.last_pass_seconds,
+        )
+        return len(due)
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error("Prewarm pass failed: %s", e)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "questions": len(self.questions),
+            "due": len(self.due()),
+            "passes": self.passes,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_pass_seconds": self.last_pass_seconds,
+        }
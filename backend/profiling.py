@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        )
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over every thread, emitting folded stacks.
+
+    Nothing runs between profiles; a profile samples sys._current_frames() from a
+    short-lived thread, so the application does not need to be restarted or
+    instrumented. The output is Brendan Gregg's collapsed format, accepted by
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.005) -> Dict[str, Any]:
+        """Sample all threads for `seconds`. Raises RuntimeError if one is already running."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            own_thread = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    thread_name = names.get(thread_id, str(thread_id))
+                    stacks[";".join([thread_name] + _frame_stack(frame))] += 1
+                samples += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+        return {
+            "samples": samples,
+            "interval_ms": interval * 1000,
+            "folded": "\n".join(
+                f"{stack} {count}" for stack, count in stacks.most_common()
+            ),
+        }
+
+
+class SlowRequestLog:
+    """Records requests slower than a threshold, in memory and as JSON lines on disk."""
+
+    def __init__(
+        self, threshold_ms: float, path: Optional[str] = None, max_entries: int = 200
+    ):
+        self.threshold_ms = threshold_ms
+        self.path = path
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def maybe_record(self, latency_ms: float, entry: Dict[str, Any]) -> bool:
+        if latency_ms < self.threshold_ms:
+            return False
+        entry = {"latency_ms": round(latency_ms, 2), **entry}
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, default=str) + "\n")
+                except OSError as e:
+                    logger.warning("Failed to write slow request log: %s", e)
+        return True
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.entries)[-limit:]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "recorded": self.recorded,
+            "path": self.path,
+        }
@@ -0,0 +1,197 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# Used when no template file can be loaded
+DEFAULT_SYSTEM_PROMPT = (
+    "Answer the question using only the passages below. "
+    "If the passages do not contain the answer, say so."
+)
+
+# Settings every route gets unless its template overrides them
+BASE_SETTINGS = {
+    "max_tokens": 1024,
+    "temperature": None,
+    "top_p": None,
+    "number_of_results": 5,
+}
+
+
+class PromptTemplate:
+    """One version of the generation prompt and its per-route inference settings.
+
+    `system` is the static part of the prompt. It is sent first and never contains
+    request data, so every request with the same version shares the same prefix
+    and the model side can reuse its cached prefix computation.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        system: str,
+        generation: Optional[Dict[str, Dict[str, Any]]] = None,
+        description: str = "",
+        defaults: Optional[Dict[str, Any]] = None,
+    ):
+        self.version = version
+        self.system = system.strip()
+        self.generation = generation or {}
+        self.description = description
+        self.defaults = {**BASE_SETTINGS, **(defaults or {})}
+        self.prefix_digest = hashlib.sha256(self.system.encode("utf-8")).hexdigest()[
+            :12
+        ]
+
+    @property
+    def routes(self) -> List[str]:
+        return sorted(set(self.generation) | {"default"})
+
+    def settings(self, route: Optional[str] = None) -> Dict[str, Any]:
+        """Inference settings for `route`, falling back to the template's default route."""
+        return {
+            **self.defaults,
+            **self.generation.get("default", {}),
+            **self.generation.get(route or "default", {}),
+        }
+
+    def with_settings(self, settings: Dict[str, Any]) -> "PromptTemplate":
+        """Copy of this template with `settings` applied on top of every route."""
+        if not settings:
+            return self
+        return PromptTemplate(
+            self.version,
+            self.system,
+            {
+                route: {**self.generation.get(route, {}), **settings}
+                for route in self.routes
+            },
+            self.description,
+            self.defaults,
+        )
+
+    def rag_configuration(
+        self, route: Optional[str] = None, conversation: str = ""
+    ) -> Dict[str, Any]:
+        """Retrieval and generation config for a retrieve_and_generate request.
+
+        `conversation` goes into the generation prompt after the search results, so
+        the model sees the history while retrieval still runs on the bare question.
+        """
+        settings = self.settings(route)
+        # "$" delimits Bedrock prompt placeholders such as $search_results$
+        conversation_block = (
+            f"<conversation>\n{conversation.replace('$', '')}\n</conversation>\n\n"
+            if conversation
+            else ""
+        )
+        text_inference = {"maxTokens": settings["max_tokens"]}
+        if settings["temperature"] is not None:
+            text_inference["temperature"] = settings["temperature"]
+        if settings["top_p"] is not None:
+            text_inference["topP"] = settings["top_p"]
+        return {
+            "retrievalConfiguration": {
+                "vectorSearchConfiguration": {
+                    "numberOfResults": settings["number_of_results"]
+                }
+            },
+            "generationConfiguration": {
+                "promptTemplate": {
+                    "textPromptTemplate": (
+                        f"{self.system}\n\n"
+                        "<search_results>\n$search_results$\n</search_results>\n\n"
+                        f"{conversation_block}"
+                        "$output_format_instructions$"
+                    )
+                },
+                "inferenceConfig": {"textInferenceConfig": text_inference},
+            },
+        }
+
+    def messages_body(
+        self, user_content: str, route: Optional[str] = None, cache_prefix: bool = False
+    ) -> Dict[str, Any]:
+        """Anthropic messages body for invoke_model, with the static prefix as the system prompt."""
+        settings = self.settings(route)
+        system_block: Dict[str, Any] = {"type": "text", "text": self.system}
+        if cache_prefix:
+            system_block["cache_control"] = {"type": "ephemeral"}
+        body: Dict[str, Any] = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": settings["max_tokens"],
+            "system": [system_block],
+            "messages": [{"role": "user", "content": user_content}],
+        }
+        if settings["temperature"] is not None:
+            body["temperature"] = settings["temperature"]
+        if settings["top_p"] is not None:
+            body["top_p"] = settings["top_p"]
+        return body
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "description": self.description,
+            "prefix_digest": self.prefix_digest,
+            "prefix_chars": len(self.system),
+            "routes": {route: self.settings(route) for route in self.routes},
+        }
+
+
+class PromptLibrary:
+    """Versioned prompt templates loaded from JSON, with one active version."""
+
+    def __init__(self, templates: Dict[str, PromptTemplate], active: str):
+        if active not in templates:
+            raise ValueError(f"Unknown prompt template version: {active}")
+        self.templates = templates
+        self.active = active
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        version: Optional[str] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> "PromptLibrary":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        templates = {
+            name: PromptTemplate(
+                name,
+                spec["system"],
+                spec.get("generation"),
+                spec.get("description", ""),
+                defaults,
+            )
+            for name, spec in data["templates"].items()
+        }
+        return cls(templates, version or data["active"])
+
+    def get(self, version: Optional[str] = None) -> PromptTemplate:
+        return self.templates[version or self.active]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "versions": sorted(self.templates),
+            "template": self.get().describe(),
+        }
+
+
+def build_generation_prompt(
+    query: str, passages: List[Dict[str, Any]], conversation: str = ""
+) -> str:
+    """Assemble the per-request part of the prompt; the template's system prefix precedes it."""
+    context = "\n\n".join(
+        f"<passage id=\"{i + 1}\">\n{passage['text']}\n</passage>"
+        for i, passage in enumerate(passages)
+    )
+    conversation_block = (
+        f"<conversation>\n{conversation}\n</conversation>\n\n" if conversation else ""
+    )
+    return (
+        f"<passages>\n{context}\n</passages>\n\n"
+        f"{conversation_block}"
+        f"Question: {query}"
+    )
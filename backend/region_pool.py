@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class RegionEndpoint:
+    """Bedrock clients and knowledge base replica for one region, with health state."""
+
+    def __init__(
+        self,
+        region: str,
+        knowledge_base_id: str,
+        agent_client: Any,
+        runtime_client: Any = None,
+    ):
+        self.region = region
+        self.knowledge_base_id = knowledge_base_id
+        self.agent_client = agent_client
+        self.runtime_client = runtime_client
+        self.latency_ewma_ms: Optional[float] = None
+        self.error_ewma = 0.0
+        self.last_error_at = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+
+class RegionPool:
+    """Ranks regions by an EWMA of latency plus a decaying error penalty.
+
+    A region that fails `failure_threshold` times in a row is taken out of rotation
+    for `cooldown_seconds`; its error penalty halves every `error_half_life` seconds
+    so a recovered region is eventually preferred again.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[RegionEndpoint],
+        alpha: float = 0.2,
+        error_penalty_ms: float = 10000.0,
+        error_half_life: float = 60.0,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+    ):
+        if not endpoints:
+            raise ValueError("RegionPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.alpha = alpha
+        self.error_penalty_ms = error_penalty_ms
+        self.error_half_life = error_half_life
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._by_region = {endpoint.region: endpoint for endpoint in endpoints}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def get(self, region: str) -> Optional[RegionEndpoint]:
+        return self._by_region.get(region)
+
+    def _score(self, endpoint: RegionEndpoint, now: float) -> float:
+        # Regions without latency samples score zero so they get probed early
+        error = endpoint.error_ewma * 0.5 ** (
+            (now - endpoint.last_error_at) / self.error_half_life
+        )
+        return (endpoint.latency_ewma_ms or 0.0) + error * self.error_penalty_ms
+
+    def ranked(self) -> List[RegionEndpoint]:
+        """Endpoints from best to worst; regions in cooldown go last."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(
+                self.endpoints,
+                key=lambda e: (e.open_until > now, self._score(e, now)),
+            )
+
+    def record(self, region: str, latency_ms: float, ok: bool) -> None:
+        endpoint = self._by_region[region]
+        now = time.monotonic()
+        with self._lock:
+            endpoint.requests += 1
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.error_ewma *= 1 - self.alpha
+                endpoint.latency_ewma_ms = (
+                    latency_ms
+                    if endpoint.latency_ewma_ms is None
+                    else self.alpha * latency_ms
+                    + (1 - self.alpha) * endpoint.latency_ewma_ms
+                )
+                return
+            endpoint.errors += 1
+            endpoint.consecutive_failures += 1
+            endpoint.error_ewma = self.alpha + (1 - self.alpha) * endpoint.error_ewma
+            endpoint.last_error_at = now
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.open_until = now + self.cooldown_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint.region: {
+                    "knowledge_base_id": endpoint.knowledge_base_id,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "latency_ewma_ms": (
+                        round(endpoint.latency_ewma_ms, 2)
+                        if endpoint.latency_ewma_ms is not None
+                        else None
+                    ),
+                    "error_ewma": round(endpoint.error_ewma, 4),
+                    "score": round(self._score(endpoint, now), 2),
+                    "cooling_down": endpoint.open_until > now,
+                }
+                for endpoint in self.endpoints
+            }
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+PRIORITIES = ("interactive", "background", "bulk")
+
+# Priority class and fairness key (usually the session) of the request being served
+request_priority: ContextVar[Tuple[str, Optional[str]]] = ContextVar(
+    "request_priority", default=("interactive", None)
+)
+
+
+class ClassQueue:
+    """Weighted fair queue across keys: each waiter gets a virtual finish tag."""
+
+    def __init__(self, window: int = 1000):
+        self.heap: List[Tuple[float, int, asyncio.Future]] = []
+        self.virtual_time = 0.0
+        self.last_finish: Dict[Optional[str], float] = {}
+        self.running = 0
+        self.admitted = 0
+        self.max_depth = 0
+        self.waits_ms: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class PriorityScheduler:
+    """Admits upstream calls by priority class, fairly across sessions within a class.
+
+    Interactive work is always admitted first. Background and bulk work only run
+    when no interactive request is waiting, and can never take the last
+    `reserved_interactive` slots; bulk is further capped at `bulk_share` of the rest.
+
+    Calls run in the scheduler's own worker threads via run_in_slot, and a slot is
+    only freed when its thread returns: a thread cannot be interrupted, so a call
+    abandoned at the request deadline still counts against the upstream limit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        reserved_interactive: int = 4,
+        bulk_share: float = 0.5,
+    ):
+        self.max_concurrency = max_concurrency
+        shared = max(1, max_concurrency - reserved_interactive)
+        self.limits = {
+            "interactive": max_concurrency,
+            "background": shared,
+            "bulk": max(1, int(shared * bulk_share)),
+        }
+        self.queues = {priority: ClassQueue() for priority in PRIORITIES}
+        self._running = 0
+        self._sequence = itertools.count()
+        self._enqueued_at: Dict[asyncio.Future, float] = {}
+        # One worker per slot, since every running worker holds one
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="upstream"
+        )
+        self.abandoned = 0
+
+    def _can_admit(self, priority: str) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        if self.queues[priority].running >= self.limits[priority]:
+            return False
+        return priority == "interactive" or not self.queues["interactive"]
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self.queues[priority]
+            while queue.heap and self._can_admit(priority):
+                finish, _, future = heapq.heappop(queue.heap)
+                if future.done():
+                    continue
+                queue.virtual_time = finish
+                self._admit(priority, future)
+                future.set_result(None)
+            if priority == "interactive" and queue.heap:
+                # Interactive requests are still waiting: hold back lower classes
+                return
+
+    def _admit(self, priority: str, future: Optional[asyncio.Future]) -> None:
+        queue = self.queues[priority]
+        queue.running += 1
+        queue.admitted += 1
+        self._running += 1
+        enqueued_at = self._enqueued_at.pop(future, None) if future else None
+        queue.waits_ms.append(
+            (time.perf_counter() - enqueued_at) * 1000 if enqueued_at else 0.0
+        )
+
+    def try_acquire(self, priority: str = "interactive") -> bool:
+        """Take a slot only if one is free now and none of this class is queued."""
+        if self.queues[priority].heap or not self._can_admit(priority):
+            return False
+        self._admit(priority, None)
+        return True
+
+    async def acquire(self, priority: str = "interactive", key: Optional[str] = None):
+        """Wait for a slot; the caller must release(priority) once done, or hand the
+        slot to run_in_slot."""
+        queue = self.queues[priority]
+        if self.try_acquire(priority):
+            return
+
+        start = max(queue.virtual_time, queue.last_finish.get(key, 0.0))
+        finish = start + 1.0
+        queue.last_finish[key] = finish
+        if len(queue.last_finish) > 10000:
+            queue.last_finish = {
+                k: v for k, v in queue.last_finish.items() if v > queue.virtual_time
+            }
+        future = asyncio.get_running_loop().create_future()
+        self._enqueued_at[future] = time.perf_counter()
+        heapq.heappush(queue.heap, (finish, next(self._sequence), future))
+        queue.max_depth = max(queue.max_depth, len(queue.heap))
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._enqueued_at.pop(future, None)
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled: hand it back
+                self.release(priority)
+            else:
+                future.cancel()
+                queue.heap = [entry for entry in queue.heap if entry[2] is not future]
+                heapq.heapify(queue.heap)
+                self._dispatch()
+            raise
+
+    def release(self, priority: str) -> None:
+        self.queues[priority].running -= 1
+        self._running -= 1
+        self._dispatch()
+
+    def run_in_slot(self, priority: str, function: Callable[[], Any]) -> asyncio.Future:
+        """Run `function` in a worker thread that holds an acquired `priority` slot.
+
+        The slot is released once the thread returns (or if it never started).
+        Cancelling the returned future only abandons the result.
+        """
+        loop = asyncio.get_running_loop()
+
+        def release_from_worker(_: Future) -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self.release, priority)
+
+        def count_abandoned(result: asyncio.Future) -> None:
+            if result.cancelled() and not work.done():
+                self.abandoned += 1
+
+        work = self._executor.submit(copy_context().run, function)
+        work.add_done_callback(release_from_worker)
+        result = asyncio.wrap_future(work, loop=loop)
+        result.add_done_callback(count_abandoned)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"running": self._running, "abandoned": self.abandoned}
+        for priority, queue in self.queues.items():
+            waits = sorted(queue.waits_ms)
+            stats[priority] = {
+                "queued": len(queue),
+                "max_queued": queue.max_depth,
+                "running": queue.running,
+                "limit": self.limits[priority],
+                "admitted": queue.admitted,
+                "avg_wait_ms": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                "p95_wait_ms": (
+                    round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 2)
+                    if waits
+                    else 0.0
+                ),
+            }
+        return stats
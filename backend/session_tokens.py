@@ -0,0 +1,22 @@
+import hashlib
+import hmac
+from typing import Optional
+
+
+class SessionTokens:
+    """HMAC tokens that let a client read back its own session's transcript.
+
+    /chat hands the token out with the session ID, and the transcript endpoint only
+    serves a session to callers presenting its token, so knowing another session's
+    ID (from a shared URL or a log line) is not enough to read it.
+    """
+
+    def __init__(self, secret: bytes):
+        self.secret = secret
+
+    def issue(self, session_id: str) -> str:
+        message = f"session\n{session_id}".encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()[:32]
+
+    def verify(self, session_id: str, token: Optional[str]) -> bool:
+        return hmac.compare_digest(token or "", self.issue(session_id))
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from model_router import TOKEN_PATTERN, percentile
+from passage_cache import cosine_similarity, embed_query
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowConfig:
+    """Alternative model, prompt version and generation settings to evaluate."""
+
+    def __init__(
+        self,
+        model_id: Optional[str] = None,
+        prompt_version: Optional[str] = None,
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        self.model_id = model_id
+        self.prompt_version = prompt_version
+        self.settings = settings or {}
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "prompt_version": self.prompt_version,
+            "settings": self.settings,
+        }
+
+
+# Configuration override of the request being served; only shadow requests set it
+config_override: ContextVar[Optional[ShadowConfig]] = ContextVar(
+    "config_override", default=None
+)
+# Live session context as it was when a shadow request was mirrored
+shadow_conversation: ContextVar[Optional[str]] = ContextVar(
+    "shadow_conversation", default=None
+)
+
+
+def answer_similarity(a: str, b: str) -> Dict[str, float]:
+    """Word-set Jaccard and hashed n-gram cosine similarity of two answers."""
+    words_a = set(TOKEN_PATTERN.findall(a.lower()))
+    words_b = set(TOKEN_PATTERN.findall(b.lower()))
+    union = words_a | words_b
+    return {
+        "jaccard": round(len(words_a & words_b) / len(union), 4) if union else 1.0,
+        "cosine": round(cosine_similarity(embed_query(a), embed_query(b)), 4),
+    }
+
+
+def summarize(result: Dict[str, Any], latency_ms: float) -> Dict[str, Any]:
+    usage = result.get("usage") or {}
+    return {
+        "success": result.get("success", False),
+        "error": result.get("error"),
+        "model": usage.get("model"),
+        "prompt_version": usage.get("prompt_version"),
+        "latency_ms": round(latency_ms, 2),
+        "timings": result.get("timings"),
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cost_usd": usage.get("cost_usd", 0.0),
+        "answer_chars": len(result.get("answer") or ""),
+        "citations": len(result.get("citations") or []),
+    }
+
+
+class ShadowRunner:
+    """Mirrors a sample of live requests to an alternative configuration.
+
+    Mirrored requests run as background tasks after the live answer is ready and
+    never block it. At most `max_concurrency` run at once; a sampled request that
+    finds every slot busy is dropped rather than queued. Each comparison is kept in
+    memory for /metrics and appended as a JSON line to `path`.
+    """
+
+    def __init__(
+        self,
+        answer: Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]],
+        config: ShadowConfig,
+        sample_rate: float,
+        max_concurrency: int = 2,
+        path: Optional[str] = None,
+        record_answers: bool = False,
+        window: int = 1000,
+    ):
+        self.answer = answer
+        self.config = config
+        self.sample_rate = sample_rate
+        self.max_concurrency = max_concurrency
+        self.path = path
+        self.record_answers = record_answers
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.sampled = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_deltas_ms: Deque[float] = deque(maxlen=window)
+        self.similarities: Deque[float] = deque(maxlen=window)
+        self.output_token_deltas: Deque[int] = deque(maxlen=window)
+
+    def maybe_mirror(
+        self,
+        query: str,
+        live: Dict[str, Any],
+        live_latency_ms: float,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Start a shadow request for a sample of live ones. Never waits."""
+        if random.random() >= self.sample_rate:
+            return False
+        self.sampled += 1
+        if len(self._tasks) >= self.max_concurrency:
+            self.dropped += 1
+            return False
+        task = asyncio.create_task(
+            self._run(query, live, live_latency_ms, context or {})
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(
+        self,
+        query: str,
+        live: Dict[str, Any],
+        live_latency_ms: float,
+        context: Dict[str, Any],
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            shadow = await self.answer(query, context.get("session_id"))
+        except Exception as e:
+            logger.warning("Shadow request failed: %s", e)
+            shadow = {"success": False, "error": str(e)}
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        entry = {
+            **context,
+            "config": self.config.describe(),
+            "live": summarize(live, live_latency_ms),
+            "shadow": summarize(shadow, latency_ms),
+            "similarity": None,
+        }
+        if not shadow.get("success"):
+            self.failed += 1
+        else:
+            self.completed += 1
+            similarity = answer_similarity(
+                live.get("answer") or "", shadow.get("answer") or ""
+            )
+            entry["similarity"] = similarity
+            self.similarities.append(similarity["cosine"])
+            self.latency_deltas_ms.append(latency_ms - live_latency_ms)
+            self.output_token_deltas.append(
+                entry["shadow"]["output_tokens"] - entry["live"]["output_tokens"]
+            )
+        if self.record_answers:
+            entry["live"]["answer"] = live.get("answer")
+            entry["shadow"]["answer"] = shadow.get("answer")
+        if self.path:
+            await asyncio.to_thread(self._write, entry)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError as e:
+                logger.warning("Failed to write shadow result: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        deltas = list(self.latency_deltas_ms)
+        similarities = list(self.similarities)
+        tokens = list(self.output_token_deltas)
+        return {
+            "config": self.config.describe(),
+            "sample_rate": self.sample_rate,
+            "max_concurrency": self.max_concurrency,
+            "inflight": len(self._tasks),
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "p50_latency_delta_ms": round(percentile(deltas, 0.5), 2),
+            "p95_latency_delta_ms": round(percentile(deltas, 0.95), 2),
+            "avg_output_token_delta": (
+                round(sum(tokens) / len(tokens), 1) if tokens else 0.0
+            ),
+            "avg_similarity": (
+                round(sum(similarities) / len(similarities), 4)
+                if similarities
+                else None
+            ),
+            "path": self.path,
+        }
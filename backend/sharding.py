@@ -0,0 +1,110 @@
+import bisect
+import functools
+import hashlib
+import json
+import socket
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes.
+
+    Adding or removing a node only moves the keys in the arcs that node owns,
+    roughly 1/N of them, instead of reshuffling every session.
+    """
+
+    def __init__(self, nodes: List[str], vnodes: int = 128):
+        self.vnodes = vnodes
+        self._lock = threading.Lock()
+        self._hashes: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def _rebuild(self, nodes: List[str]) -> None:
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(self.vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+        self.nodes = nodes
+
+    def add_node(self, node: str) -> None:
+        with self._lock:
+            if node not in self.nodes:
+                self._rebuild(self.nodes + [node])
+
+    def remove_node(self, node: str) -> None:
+        with self._lock:
+            if node in self.nodes:
+                self._rebuild([n for n in self.nodes if n != node])
+
+    def set_nodes(self, nodes: List[str]) -> None:
+        with self._lock:
+            self._rebuild(list(dict.fromkeys(nodes)))
+
+    def node_for(self, key: str) -> Optional[str]:
+        with self._lock:
+            if not self._hashes:
+                return None
+            index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+            return self._owners[index]
+
+
+def forward_request(
+    url: str,
+    method: str,
+    body: Optional[Dict[str, Any]],
+    headers: Dict[str, str],
+    timeout: float,
+) -> Tuple[int, Dict[str, Any]]:
+    """Send a JSON request to the owning node and return (status, JSON body).
+
+    Raises OSError when the node is unreachable and ValueError when a successful
+    reply is not JSON (e.g. an HTML page from a proxy in front of the node).
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(
+        url,
+        data=data,
+        method=method,
+        headers={"Content-Type": "application/json", **headers},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        try:
+            return e.code, json.loads(payload or b"{}")
+        except ValueError:
+            return e.code, {"detail": payload.decode("utf-8", "replace")}
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve(host: str) -> Tuple[str, ...]:
+    try:
+        return tuple({info[4][0] for info in socket.getaddrinfo(host, None)})
+    except OSError:
+        return ()
+
+
+def node_addresses(nodes: List[str]) -> Set[str]:
+    """IP addresses of the ring's nodes, to tell peer traffic from client traffic."""
+    addresses: Set[str] = set()
+    for node in nodes:
+        host = urllib.parse.urlparse(node).hostname
+        if host:
+            addresses.update(_resolve(host))
+    return addresses
@@ -0,0 +1,307 @@
+import hashlib
+import hmac
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from cache import SizedLRUCache
+
+WORD_PATTERN = re.compile(rb"\S+")
+WHITESPACE = b" \t\r\n"
+
+
+class SourceNotFound(Exception):
+    pass
+
+
+class SourceAccessDenied(Exception):
+    pass
+
+
+def parse_source_uri(uri: str) -> Tuple[str, Any]:
+    """Split a citation URI into its scheme and a store-specific location."""
+    parsed = urlparse(uri)
+    if parsed.scheme == "s3":
+        if not parsed.netloc or not parsed.path.lstrip("/"):
+            raise ValueError(f"Invalid S3 URI: {uri}")
+        return "s3", (parsed.netloc, unquote(parsed.path.lstrip("/")))
+    if parsed.scheme == "file":
+        return "file", unquote(parsed.path)
+    raise ValueError(f"Unsupported source URI scheme: {parsed.scheme or uri}")
+
+
+class LocalObjectStore:
+    """Reads file:// sources, as written by the local index, from under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, location: str) -> Path:
+        path = Path(location).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise SourceAccessDenied(f"{location} is outside the source root")
+        if not path.is_file():
+            raise SourceNotFound(location)
+        return path
+
+    def stat(self, location: str) -> Tuple[int, str]:
+        """Return (size in bytes, version string that changes when the file does)."""
+        info = self._path(location).stat()
+        return info.st_size, f"{info.st_mtime_ns}-{info.st_size}"
+
+    def read_range(self, location: str, start: int, end: int) -> bytes:
+        with open(self._path(location), "rb") as f:
+            f.seek(start)
+            return f.read(max(0, end - start))
+
+
+class S3ObjectStore:
+    """Reads s3:// sources with ranged GETs; works with any S3-compatible endpoint.
+
+    Only the allowlisted buckets are readable: the credentials usually reach far
+    more than the knowledge base's documents.
+    """
+
+    def __init__(self, client, buckets: List[str]):
+        if not buckets:
+            raise ValueError("S3 source previews need an explicit bucket allowlist")
+        self.client = client
+        self.buckets = set(buckets)
+
+    def _check(self, bucket: str) -> None:
+        if bucket not in self.buckets:
+            raise SourceAccessDenied(f"Bucket {bucket} is not allowed")
+
+    @staticmethod
+    def _translate(error: Exception, location: Tuple[str, str]) -> Exception:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        if code in ("NoSuchKey", "NoSuchBucket", "NotFound", "404"):
+            return SourceNotFound("/".join(location))
+        if code in ("AccessDenied", "Forbidden", "403"):
+            return SourceAccessDenied("/".join(location))
+        return error
+
+    def stat(self, location: Tuple[str, str]) -> Tuple[int, str]:
+        bucket, key = location
+        self._check(bucket)
+        try:
+            head = self.client.head_object(Bucket=bucket, Key=key)
+        except Exception as e:
+            raise self._translate(e, location) from e
+        return head["ContentLength"], head.get("ETag", "").strip('"')
+
+    def read_range(self, location: Tuple[str, str], start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        bucket, key = location
+        self._check(bucket)
+        try:
+            response = self.client.get_object(
+                Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}"
+            )
+        except Exception as e:
+            raise self._translate(e, location) from e
+        return response["Body"].read()
+
+
+def snippet_pattern(text: str, max_words: int = 12) -> Optional[re.Pattern]:
+    """Whitespace-insensitive byte pattern for the first words of a cited passage."""
+    words = WORD_PATTERN.findall(text.encode("utf-8"))[:max_words]
+    if not words:
+        return None
+    return re.compile(rb"\s+".join(re.escape(word) for word in words))
+
+
+class SourcePreviewer:
+    """Renders a window of a source document around a cited span.
+
+    Only the bytes needed are read: the window around `offset` when the caller
+    knows it, otherwise the document is scanned block by block with ranged reads
+    until the cited text is found (at most `max_scan_bytes`). Rendered previews
+    are cached by URI, document version and span.
+    """
+
+    def __init__(
+        self,
+        stores: Dict[str, Any],
+        cache: SizedLRUCache,
+        context_bytes: int = 1500,
+        block_bytes: int = 64 * 1024,
+        max_scan_bytes: int = 4 * 1024 * 1024,
+    ):
+        self.stores = stores
+        self.cache = cache
+        self.context_bytes = context_bytes
+        self.block_bytes = block_bytes
+        self.max_scan_bytes = max_scan_bytes
+        self.bytes_read = 0
+
+    def _read(self, store, location, start: int, end: int) -> bytes:
+        data = store.read_range(location, start, end)
+        self.bytes_read += len(data)
+        return data
+
+    def _find(
+        self, store, location, size: int, pattern: re.Pattern, text_bytes: int
+    ) -> Optional[Tuple[int, int]]:
+        overlap = min(self.block_bytes, 2 * text_bytes + 256)
+        position = 0
+        limit = min(size, self.max_scan_bytes)
+        while position < limit:
+            block = self._read(
+                store,
+                location,
+                position,
+                min(size, position + self.block_bytes + overlap),
+            )
+            match = pattern.search(block)
+            if match:
+                return position + match.start(), position + match.end()
+            position += self.block_bytes
+        return None
+
+    def preview(
+        self,
+        uri: str,
+        text: Optional[str] = None,
+        offset: Optional[int] = None,
+        context_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        scheme, location = parse_source_uri(uri)
+        store = self.stores.get(scheme)
+        if store is None:
+            raise ValueError(f"No object store configured for {scheme}:// sources")
+        context_bytes = self.context_bytes if context_bytes is None else context_bytes
+        size, version = store.stat(location)
+
+        text_digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+        key = (uri, version, text_digest, offset, context_bytes)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        text_bytes = len(text.encode("utf-8")) if text else 0
+        span = None
+        if offset is not None:
+            start = min(offset, size)
+            span = (start, min(size, start + text_bytes))
+        elif text:
+            pattern = snippet_pattern(text)
+            if pattern is not None:
+                span = self._find(store, location, size, pattern, text_bytes)
+                if span is not None:
+                    # The pattern only covers the first words; highlight the whole passage
+                    span = (span[0], min(size, max(span[1], span[0] + text_bytes)))
+
+        # Without a located span, preview the start of the document
+        span_start, span_end = span if span is not None else (0, 0)
+        window_start = max(0, span_start - context_bytes)
+        window_end = min(size, max(span_end, span_start) + context_bytes)
+        data = self._read(store, location, window_start, window_end)
+
+        before = data[: span_start - window_start]
+        match = data[span_start - window_start : span_end - window_start]
+        after = data[span_end - window_start :]
+        # Do not show the partial words at the edges of a window cut mid-document
+        if window_start > 0:
+            cut = next((i for i, b in enumerate(before) if b in WHITESPACE), None)
+            before = before[cut + 1 :] if cut is not None else before
+        if window_end < size:
+            cut = max(after.rfind(b" "), after.rfind(b"\n"))
+            after = after[:cut] if cut > 0 else after
+
+        before_text = before.decode("utf-8", errors="ignore")
+        match_text = match.decode("utf-8", errors="ignore")
+        preview = {
+            "uri": uri,
+            "size": size,
+            "start": window_start,
+            "end": window_end,
+            "text": before_text + match_text + after.decode("utf-8", errors="ignore"),
+            "highlight": (
+                {
+                    "start": len(before_text),
+                    "end": len(before_text) + len(match_text),
+                }
+                if span is not None and match_text
+                else None
+            ),
+            "found": span is not None,
+            "truncated_before": window_start > 0,
+            "truncated_after": window_end < size,
+        }
+        self.cache.set(key, preview, size=len(preview["text"].encode("utf-8")) + 256)
+        return {**preview, "cached": False}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stores": sorted(self.stores),
+            "bytes_read": self.bytes_read,
+            "cache": self.cache.stats(),
+        }
+
+
+class PreviewSigner:
+    """HMAC tokens binding a source URI to the session it was cited in.
+
+    /sources/preview only serves a URI with a valid token for the caller's session,
+    so clients can open the documents the chatbot cited to them and nothing else.
+    """
+
+    def __init__(self, secret: bytes, ttl_seconds: float = 24 * 3600):
+        self.secret = secret
+        self.ttl_seconds = ttl_seconds
+
+    def _mac(self, session_id: str, uri: str, expires: int) -> str:
+        message = f"{session_id}\n{uri}\n{expires}".encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()[:32]
+
+    def sign(self, session_id: str, uri: str) -> str:
+        expires = int(time.time() + self.ttl_seconds)
+        return f"{expires}.{self._mac(session_id, uri, expires)}"
+
+    def verify(self, session_id: str, uri: str, token: str) -> bool:
+        expires, _, mac = token.partition(".")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(mac, self._mac(session_id, uri, int(expires)))
+
+
+def reference_uri(reference: Dict[str, Any]) -> Optional[str]:
+    """Source URI of a retrieved reference (S3 or local index location)."""
+    location = reference.get("location") or {}
+    return (location.get("s3Location") or location.get("localLocation") or {}).get(
+        "uri"
+    )
+
+
+def trim_citations(
+    citations: List[Dict[str, Any]],
+    max_chars: int,
+    sign: Optional[Callable[[str], str]] = None,
+) -> List[Dict[str, Any]]:
+    """Cut each reference's text to a snippet; clients fetch more via /sources/preview.
+
+    With `sign`, each reference with a source URI gets the `previewToken` that
+    /sources/preview requires for it.
+    """
+    if max_chars <= 0 and sign is None:
+        return citations
+    trimmed = []
+    for citation in citations:
+        references = []
+        for reference in citation.get("retrievedReferences", []):
+            text = reference.get("content", {}).get("text", "")
+            if 0 < max_chars < len(text):
+                reference = {
+                    **reference,
+                    "content": {**reference["content"], "text": text[:max_chars]},
+                }
+            uri = reference_uri(reference) if sign is not None else None
+            if uri:
+                reference = {**reference, "previewToken": sign(uri)}
+            references.append(reference)
+        trimmed.append({**citation, "retrievedReferences": references})
+    return trimmed
@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import Any, Dict
+
+from botocore.exceptions import ClientError
+
+
+class StubAgentClient:
+    """bedrock-agent-runtime stand-in for one region, with injected latency and errors.
+
+    `fail_next` calls raise a ServiceUnavailableException ClientError; set `failing`
+    to fail every call until it is cleared.
+    """
+
+    def __init__(self, region: str, latency: float = 0.0, fail_next: int = 0):
+        self.region = region
+        self.latency = latency
+        self.fail_next = fail_next
+        self.failing = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.calls += 1
+            fail = self.failing or self.fail_next > 0
+            if self.fail_next > 0:
+                self.fail_next -= 1
+        time.sleep(self.latency)
+        if fail:
+            raise ClientError(
+                {
+                    "Error": {
+                        "Code": "ServiceUnavailableException",
+                        "Message": f"{self.region} is degraded",
+                    }
+                },
+                operation,
+            )
+
+    def retrieve_and_generate(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("RetrieveAndGenerate")
+        return {
+            "sessionId": kwargs.get("sessionId", f"{self.region}-session"),
+            "output": {"text": f"Answer from {self.region}"},
+            "citations": [],
+        }
+
+    def retrieve(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("Retrieve")
+        return {"retrievalResults": []}
@@ -0,0 +1,49 @@
+from context_manager import ContextManager
+from prompts import PromptTemplate
+
+
+def test_older_turns_fold_into_summary():
+    manager = ContextManager(budget_tokens=60, keep_recent_turns=1)
+    for i in range(4):
+        manager.record_exchange("s1", f"Question {i}?", f"Answer {i}. " + "x" * 40)
+    assert manager.compact_if_needed("s1")
+    usage = manager.usage("s1")
+    assert usage["turns"] == 2
+    assert usage["summarized_turns"] == 6
+    assert "User asked: Question 0?" in manager.render("s1")
+
+
+def test_oversized_recent_turns_are_truncated_once():
+    manager = ContextManager(budget_tokens=100, keep_recent_turns=4)
+    manager.record_exchange("s1", "Tell me everything", "y" * 4000)
+    assert manager.compact_if_needed("s1")
+    assert manager.usage("s1")["context_tokens"] <= 100
+    # Nothing left to shrink: no compaction is reported on the next turn
+    assert not manager.compact_if_needed("s1")
+
+
+def test_restore_pairs_stored_messages_and_skips_errors():
+    manager = ContextManager()
+    restored = manager.restore(
+        "s1",
+        [
+            {"role": "user", "content": "How do I check my balance?"},
+            {"role": "assistant", "content": "Dial *100#."},
+            {"role": "user", "content": "And roaming?"},
+            {"role": "assistant", "content": "Timed out", "is_error": True},
+            {"role": "user", "content": "Roaming prices?"},
+            {"role": "assistant", "content": "5 AZN per day."},
+        ],
+    )
+    assert restored == 2
+    rendered = manager.render("s1")
+    assert "Dial *100#." in rendered and "Timed out" not in rendered
+
+
+def test_conversation_goes_to_prompt_template_not_query():
+    template = PromptTemplate("v", "Answer from the results.")
+    config = template.rag_configuration(conversation="User: costs $5?")
+    prompt = config["generationConfiguration"]["promptTemplate"]["textPromptTemplate"]
+    assert prompt.startswith("Answer from the results.")
+    assert "<conversation>\nUser: costs 5?\n</conversation>" in prompt
+    assert "<conversation>" not in str(template.rag_configuration())
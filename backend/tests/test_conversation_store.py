@@ -0,0 +1,57 @@
+import threading
+
+from conversation_store import ConversationStore
+
+NOW = "2026-01-01T00:00:00"
+
+
+def flush(store, timeout=5):
+    """flush() in a helper thread so a dead writer fails the test instead of hanging."""
+    done = threading.Thread(target=store.flush, daemon=True)
+    done.start()
+    done.join(timeout)
+    return not done.is_alive()
+
+
+def test_pages_messages_oldest_first(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.db"))
+    for i in range(5):
+        store.append_message("s1", "user", f"message {i}", NOW)
+    assert flush(store)
+    page = store.get_messages("s1", limit=3)
+    assert [m["content"] for m in page["messages"]] == [
+        "message 2",
+        "message 3",
+        "message 4",
+    ]
+    older = store.get_messages("s1", limit=3, before_id=page["next_before_id"])
+    assert [m["content"] for m in older["messages"]] == ["message 0", "message 1"]
+    assert not older["has_more"]
+    store.close()
+
+
+def test_writer_survives_failed_rollback(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.db"), flush_interval=0.2)
+    # Ends the batch transaction early, so both COMMIT and ROLLBACK then raise
+    store._submit("ROLLBACK", ())
+    store.append_message("s1", "user", "in the failed batch", NOW)
+    assert flush(store)
+    assert store.stats()["batches_failed"] == 1
+
+    store.append_message("s1", "user", "written after the failure", NOW)
+    assert flush(store)
+    contents = [m["content"] for m in store.get_messages("s1")["messages"]]
+    assert "written after the failure" in contents
+    store.close()
+
+
+def test_wait_for_session_sees_own_queued_writes(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.db"), flush_interval=0.2)
+    store.append_message("s1", "assistant", "just answered", NOW)
+    assert store.get_messages("s1")["messages"] == []
+    assert store.wait_for_session("s1", timeout=5)
+    assert [m["content"] for m in store.get_messages("s1")["messages"]] == [
+        "just answered"
+    ]
+    assert store.wait_for_session("other", timeout=0)
+    store.close()
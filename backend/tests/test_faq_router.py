@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from faq_router import AhoCorasick, FaqRouter
+
+ROUTES_FILE = os.path.join(os.path.dirname(__file__), "..", "faq_routes.json")
+
+
+@pytest.fixture
+def router():
+    return FaqRouter.from_file(ROUTES_FILE, min_coverage=0.5)
+
+
+@pytest.mark.parametrize(
+    "query, intent",
+    [
+        ("Hello!", "greeting"),
+        ("thank you", "thanks"),
+        ("How do I check my balance?", "balance"),
+        ("roaming", "roaming"),
+    ],
+)
+def test_routes_clear_intents(router, query, intent):
+    assert router.match(query)["intent"] == intent
+
+
+def test_two_matching_intents_fall_through(router):
+    # "roaming" and "tariff" each cover half the query; neither may win by id order
+    assert router.match("what is the roaming tariff") is None
+    assert router.stats()["ambiguous"] == 1
+
+
+def test_coverage_must_exceed_threshold(router):
+    assert router.match("roaming Turkey") is None
+    assert router.match("roaming prices for Turkey in summer") is None
+
+
+def test_whole_words_only(router):
+    assert router.match("this is highly unusual") is None
+
+
+def test_stats_count_hits(router):
+    router.match("hi")
+    router.match("how do I port my number to another operator")
+    stats = router.stats()
+    assert stats["lookups"] == 2
+    assert stats["hits"] == 1
+    assert stats["intent_hits"]["greeting"] == 1
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "hers"])
+    matches = sorted(
+        (start, end, automaton.patterns[i])
+        for start, end, i in automaton.iter_matches("ushers")
+    )
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+@pytest.mark.parametrize(
+    "query, intent",
+    [
+        ("Hello, can u help me?", "hello"),  # the README example
+        ("latest status", "status"),
+        ("contest", "test"),
+    ],
+)
+def test_mock_router_takes_first_keyword_in_order(query, intent):
+    pytest.importorskip("fastapi")
+    os.environ.setdefault("CONVERSATION_STORE_ENABLED", "False")
+    import app
+
+    assert app.mock_router.match(query)["intent"] == intent
+    assert app.create_mock_chat_response(query)["answer"] == app.MOCK_RESPONSES[intent]
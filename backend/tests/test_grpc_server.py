@@ -0,0 +1,92 @@
+import asyncio
+import socket
+
+import pytest
+
+grpc = pytest.importorskip("grpc")
+
+import chatbot_pb2  # noqa: E402
+import chatbot_pb2_grpc  # noqa: E402
+from grpc_server import (  # noqa: E402
+    ChatbotService,
+    citations_to_proto,
+    create_server,
+    is_loopback,
+)
+
+
+async def answer_turn(message, session_id, priority, run):
+    return "session-1", {"success": True, "answer": f"Echo: {message}"}
+
+
+def make_service(auth_token=None):
+    return ChatbotService(
+        answer_turn,
+        lambda session_id: None,
+        ("interactive",),
+        max_timeout=5.0,
+        auth_token=auth_token,
+    )
+
+
+async def call_chat(service, metadata=None):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = create_server(service, "127.0.0.1", port)
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = chatbot_pb2_grpc.ChatbotStub(channel)
+            return await stub.Chat(
+                chatbot_pb2.ChatRequest(message="hi"), metadata=metadata
+            )
+    finally:
+        await server.stop(grace=None)
+
+
+@pytest.mark.parametrize(
+    "host, loopback",
+    [("127.0.0.1", True), ("::1", True), ("localhost", True), ("0.0.0.0", False)],
+)
+def test_is_loopback(host, loopback):
+    assert is_loopback(host) is loopback
+
+
+def test_refuses_public_bind_without_tls_or_token():
+    with pytest.raises(ValueError):
+        create_server(make_service(), "::", 0)
+    create_server(make_service(auth_token="secret"), "::", 0)
+
+
+def test_token_is_required_when_configured():
+    service = make_service(auth_token="secret")
+    with pytest.raises(grpc.aio.AioRpcError) as error:
+        asyncio.run(call_chat(service, (("authorization", "Bearer wrong"),)))
+    assert error.value.code() == grpc.StatusCode.UNAUTHENTICATED
+    assert service.stats()["unauthenticated"] == 1
+
+    reply = asyncio.run(call_chat(service, (("authorization", "Bearer secret"),)))
+    assert reply.answer == "Echo: hi"
+
+
+def test_no_token_needed_on_loopback_by_default():
+    assert asyncio.run(call_chat(make_service())).success
+
+
+def test_citations_carry_preview_tokens():
+    citations = [
+        {
+            "retrievedReferences": [
+                {
+                    "content": {"text": "Roaming costs 5 AZN per day."},
+                    "location": {"s3Location": {"uri": "s3://kb/roaming.txt"}},
+                }
+            ]
+        }
+    ]
+    (signed,) = citations_to_proto(citations, 7, lambda uri: f"token:{uri}")
+    assert signed.text == "Roaming"
+    assert signed.preview_token == "token:s3://kb/roaming.txt"
+    (unsigned,) = citations_to_proto(citations, 0)
+    assert unsigned.preview_token == ""
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ingest import ingest  # noqa: E402
+from local_index import (  # noqa: E402
+    CHUNKS_FILE,
+    CURRENT_FILE,
+    MANIFEST_FILE,
+    VECTORS_FILE,
+    VERSIONS_DIR,
+    HashingEmbedder,
+    LocalVectorIndex,
+    resolve_index_dir,
+    write_index,
+)
+
+
+def write_docs(docs, **files):
+    docs.mkdir(exist_ok=True)
+    for name, text in files.items():
+        (docs / f"{name}.txt").write_text(text, encoding="utf-8")
+
+
+def test_write_swaps_versions_and_refresh_reloads(tmp_path):
+    docs, index_dir = tmp_path / "docs", str(tmp_path / "index")
+    write_docs(docs, roaming="Roaming in Turkey costs 5 AZN per day.")
+    ingest(str(docs), index_dir)
+    index = LocalVectorIndex(index_dir)
+    assert len(index) == 1
+    assert not index.refresh()
+
+    write_docs(docs, balance="Dial *100# to check your balance.")
+    ingest(str(docs), index_dir)
+    assert index.refresh()
+    assert len(index) == 2
+    assert index.search("check balance", k=1)[0]["text"].startswith("Dial *100#")
+
+
+def test_only_recent_versions_are_kept(tmp_path):
+    docs, index_dir = tmp_path / "docs", str(tmp_path / "index")
+    for i in range(4):
+        write_docs(docs, **{f"doc{i}": f"Document number {i}."})
+        ingest(str(docs), index_dir)
+    versions = os.listdir(os.path.join(index_dir, VERSIONS_DIR))
+    assert len(versions) == 2
+    with open(os.path.join(index_dir, CURRENT_FILE), encoding="utf-8") as f:
+        assert f.read() in versions
+
+
+def test_each_version_is_self_consistent(tmp_path):
+    index_dir = str(tmp_path / "index")
+    embedder = HashingEmbedder()
+    for count in (1, 3):
+        chunks = [
+            {"text": f"chunk {i}", "uri": "file:///doc", "chunk_index": i}
+            for i in range(count)
+        ]
+        write_index(
+            index_dir, chunks, embedder.embed([c["text"] for c in chunks]), embedder
+        )
+        path = resolve_index_dir(index_dir)
+        vectors = np.load(os.path.join(path, VECTORS_FILE))
+        with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+            assert len(f.readlines()) == len(vectors) == count
+
+
+def test_loads_unversioned_layout(tmp_path):
+    embedder = HashingEmbedder()
+    chunk = {"text": "legacy chunk", "uri": "file:///doc", "chunk_index": 0}
+    np.save(tmp_path / VECTORS_FILE, embedder.embed([chunk["text"]]))
+    (tmp_path / CHUNKS_FILE).write_text(json.dumps(chunk) + "\n", encoding="utf-8")
+    (tmp_path / MANIFEST_FILE).write_text(
+        json.dumps({"embedder": embedder.name, "dims": embedder.dims, "chunks": 1}),
+        encoding="utf-8",
+    )
+    assert len(LocalVectorIndex(str(tmp_path))) == 1
+
+
+def test_unchanged_source_does_not_publish_a_new_version(tmp_path):
+    docs, index_dir = tmp_path / "docs", str(tmp_path / "index")
+    write_docs(docs, roaming="Roaming in Turkey costs 5 AZN per day.")
+    assert ingest(str(docs), index_dir)["written"]
+    version = resolve_index_dir(index_dir)
+
+    stats = ingest(str(docs), index_dir)
+    assert not stats["written"]
+    assert stats["chunks_reused"] == 1
+    assert resolve_index_dir(index_dir) == version
+
+
+def test_overlap_must_be_smaller_than_chunk_size(tmp_path):
+    with pytest.raises(ValueError):
+        ingest(str(tmp_path), str(tmp_path / "index"), chunk_size=100, overlap=100)
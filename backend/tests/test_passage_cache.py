@@ -0,0 +1,74 @@
+from passage_cache import SessionPassageCache, embed_query, query_signature
+
+
+def passages(label, count=3, size=100):
+    return [{"text": f"{label} {i} " + "x" * size} for i in range(count)]
+
+
+def fill(cache, query, session_id=None, **kwargs):
+    embedding = embed_query(query)
+    cache.store(query, embedding, passages(query, **kwargs), 3, session_id)
+
+
+def test_paraphrase_hits_global_cache():
+    cache = SessionPassageCache()
+    fill(cache, "How much does roaming cost")
+    hit, _, scope = cache.lookup("how much does roaming cost?", 3)
+    assert scope == "global"
+    assert hit[0]["text"].startswith("How much does roaming cost 0")
+
+
+def test_session_cache_preferred_over_global():
+    cache = SessionPassageCache()
+    fill(cache, "roaming prices in Turkey", session_id="s1")
+    _, _, scope = cache.lookup("roaming prices in Turkey", 3, session_id="s1")
+    assert scope == "session"
+    _, _, scope = cache.lookup("roaming prices in Turkey", 3, session_id="s2")
+    assert scope == "global"
+
+
+def test_opposite_intent_does_not_hit():
+    cache = SessionPassageCache(similarity_threshold=0.5)
+    fill(cache, "How do I activate roaming?")
+    hit, _, scope = cache.lookup("How do I deactivate roaming?", 3)
+    assert hit is None and scope is None
+
+
+def test_different_numbers_do_not_hit():
+    cache = SessionPassageCache(similarity_threshold=0.5)
+    fill(cache, "How much is the 5GB package?")
+    assert cache.lookup("How much is the 10GB package?", 3)[0] is None
+    assert cache.lookup("how much is the 5GB package", 3)[0] is not None
+
+
+def test_query_signature():
+    assert query_signature("Turn off roaming") != query_signature("Turn on roaming")
+    assert query_signature("5 GB for 10 AZN") == (frozenset({"5", "10"}), frozenset())
+
+
+def test_more_results_than_cached_is_a_miss():
+    cache = SessionPassageCache()
+    fill(cache, "roaming in Georgia")
+    assert cache.lookup("roaming in Georgia", 5)[0] is None
+
+
+def test_byte_budget_bounds_all_sessions():
+    max_bytes = 16 * 1024
+    cache = SessionPassageCache(max_sessions=1000, max_bytes=max_bytes)
+    for i in range(200):
+        fill(cache, f"question number {i}", session_id=f"s{i}", size=500)
+        assert cache.total_bytes() <= max_bytes
+    # The most recent sessions survive eviction
+    _, _, scope = cache.lookup("question number 199", 3, session_id="s199")
+    assert scope == "session"
+    assert cache.stats()["sessions"] < 200
+
+
+def test_drop_session_and_clear():
+    cache = SessionPassageCache()
+    fill(cache, "balance check", session_id="s1")
+    cache.drop_session("s1")
+    assert cache.lookup("balance check", 3, session_id="s1")[2] == "global"
+    cache.clear()
+    assert cache.lookup("balance check", 3)[0] is None
+    assert cache.total_bytes() == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from prefetch import FollowUpPrefetcher, extract_topic, suggest_follow_ups
+from prewarm import answer_cache_key
+
+
+@pytest.mark.parametrize(
+    "query", ["hello", "Hello, can u help me?", "thanks a lot!", "roaming?"]
+)
+def test_small_talk_and_short_queries_have_no_topic(query):
+    assert extract_topic(query) is None
+    assert suggest_follow_ups(query) == []
+
+
+def test_topic_stops_at_qualifiers_and_keeps_article():
+    assert extract_topic("How much does roaming cost in Europe?") == "roaming"
+    assert extract_topic("How do I buy the unlimited plan") == "the unlimited plan"
+
+
+def test_questions_outside_the_service_lifecycle_get_no_predictions():
+    assert suggest_follow_ups("How do I check my balance?") == []
+    assert suggest_follow_ups("How do I contact customer support?") == []
+
+
+def test_follow_ups_are_the_other_lifecycle_steps():
+    assert suggest_follow_ups("How do I activate roaming?") == [
+        "How much does roaming cost?",
+        "How do I cancel roaming?",
+    ]
+    assert suggest_follow_ups("What is the price of the Hədiyyə package?") == [
+        "How do I activate the Hədiyyə package?",
+        "How do I cancel the Hədiyyə package?",
+    ]
+    assert suggest_follow_ups("How do I cancel roaming?") == []
+
+
+def test_prefetched_answer_serves_the_matching_question():
+    calls = []
+
+    async def answer(question, session_id):
+        calls.append(question)
+        return {"success": True, "answer": f"About: {question}"}
+
+    async def scenario():
+        prefetcher = FollowUpPrefetcher(answer, budget_ratio=1.0)
+        predicted = prefetcher.schedule("s1", "How do I activate roaming?")
+        await asyncio.sleep(0)
+        hit = prefetcher.take("s1", "how do i cancel roaming")
+        miss = prefetcher.take("s1", "How much does roaming cost?")
+        return predicted, hit, miss, prefetcher.stats()
+
+    predicted, hit, miss, stats = asyncio.run(scenario())
+    assert predicted == ["How much does roaming cost?", "How do I cancel roaming?"]
+    assert hit["answer"] == "About: How do I cancel roaming?"
+    # Taking one prediction discards the rest
+    assert miss is None
+    assert stats["scheduled"] == 2
+    assert stats["hits"] == 1
+
+
+def test_prefetch_still_running_is_cancelled_not_awaited():
+    async def answer(question, session_id):
+        await asyncio.sleep(60)
+
+    async def scenario():
+        prefetcher = FollowUpPrefetcher(answer, budget_ratio=1.0)
+        prefetcher.schedule("s1", "How do I activate roaming?")
+        task = prefetcher._sessions["s1"][answer_cache_key("How do I cancel roaming?")]
+        taken = prefetcher.take("s1", "How do I cancel roaming?")
+        await asyncio.sleep(0)
+        return taken, task, prefetcher.stats()
+
+    taken, task, stats = asyncio.run(scenario())
+    assert taken is None
+    assert task.cancelled()
+    assert stats["inflight_misses"] == 1
+    assert stats["cancelled"] == 1
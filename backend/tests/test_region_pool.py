@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("botocore")
+os.environ.setdefault("CONVERSATION_STORE_ENABLED", "False")
+
+import app  # noqa: E402
+from region_pool import RegionEndpoint, RegionPool  # noqa: E402
+from stubs import StubAgentClient  # noqa: E402
+
+
+def make_pool(*clients, **kwargs):
+    return RegionPool(
+        [RegionEndpoint(c.region, f"kb-{c.region}", c) for c in clients], **kwargs
+    )
+
+
+def call_ranked(pool):
+    """One call against the best-ranked region, recording the outcome like the app."""
+    endpoint = pool.ranked()[0]
+    start = time.perf_counter()
+    try:
+        endpoint.agent_client.retrieve_and_generate(input={"text": "q"})
+        ok = True
+    except Exception:
+        ok = False
+    pool.record(endpoint.region, (time.perf_counter() - start) * 1000, ok)
+    return endpoint.region
+
+
+def test_slow_region_is_demoted_by_latency_ewma():
+    slow = StubAgentClient("eu-central-1", latency=0.03)
+    fast = StubAgentClient("us-east-1", latency=0.001)
+    pool = make_pool(slow, fast)
+    regions = [call_ranked(pool) for _ in range(10)]
+    assert regions[:2] == ["eu-central-1", "us-east-1"]
+    assert set(regions[2:]) == {"us-east-1"}
+    assert pool.ranked()[0].region == "us-east-1"
+
+
+def test_failing_region_cools_down_then_recovers():
+    flaky = StubAgentClient("eu-central-1")
+    steady = StubAgentClient("us-east-1", latency=0.005)
+    pool = make_pool(
+        flaky, steady, failure_threshold=3, cooldown_seconds=0.05, error_half_life=0.01
+    )
+    for _ in range(3):
+        pool.record("eu-central-1", 1.0, ok=False)
+    assert pool.stats()["eu-central-1"]["cooling_down"]
+    assert call_ranked(pool) == "us-east-1"
+
+    # Once the cooldown passes and the error penalty has decayed, the region
+    # without latency samples is probed again
+    time.sleep(0.2)
+    assert pool.ranked()[0].region == "eu-central-1"
+
+
+def test_call_fails_over_without_backoff(monkeypatch):
+    degraded = StubAgentClient("eu-central-1", fail_next=1)
+    healthy = StubAgentClient("us-east-1")
+    monkeypatch.setattr(app, "region_pool", make_pool(degraded, healthy))
+    monkeypatch.setattr(app, "hedger", None)
+    monkeypatch.setattr(app, "RETRY_DELAY", 30)
+
+    def operation(endpoint):
+        return endpoint.agent_client.retrieve_and_generate(input={"text": "q"})
+
+    start = time.perf_counter()
+    response, error = asyncio.run(
+        app.call_bedrock_with_retry(operation, "retrieve_and_generate")
+    )
+    assert error is None
+    assert response["output"]["text"] == "Answer from us-east-1"
+    assert (degraded.calls, healthy.calls) == (1, 1)
+    assert time.perf_counter() - start < 5
+    assert app.region_pool.stats()["eu-central-1"]["errors"] == 1
+
+
+def test_pinned_region_is_retried_not_failed_over(monkeypatch):
+    session_region = StubAgentClient("eu-central-1", fail_next=1)
+    other = StubAgentClient("us-east-1")
+    monkeypatch.setattr(app, "region_pool", make_pool(session_region, other))
+    monkeypatch.setattr(app, "hedger", None)
+    monkeypatch.setattr(app, "RETRY_DELAY", 0)
+
+    response, error = asyncio.run(
+        app.call_bedrock_with_retry(
+            lambda e: e.agent_client.retrieve_and_generate(input={"text": "q"}),
+            "retrieve_and_generate",
+            region="eu-central-1",
+        )
+    )
+    assert error is None
+    assert response["output"]["text"] == "Answer from eu-central-1"
+    assert other.calls == 0
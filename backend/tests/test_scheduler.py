@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+from hedging import HedgeBudget, RequestHedger
+from scheduler import PriorityScheduler
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def admit_in_order(scheduler, requests):
+    """Queue (priority, key) requests behind a full scheduler and record grant order."""
+    order = []
+
+    async def waiter(priority, key):
+        await scheduler.acquire(priority, key)
+        order.append((priority, key))
+
+    tasks = [asyncio.create_task(waiter(*request)) for request in requests]
+    await asyncio.sleep(0)
+    return order, tasks
+
+
+def test_interactive_admitted_before_lower_classes():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1, reserved_interactive=0)
+        await scheduler.acquire("interactive")
+        order, tasks = await admit_in_order(
+            scheduler, [("bulk", "a"), ("background", "b"), ("interactive", "c")]
+        )
+        for _ in range(3):
+            scheduler.release(order[-1][0] if order else "interactive")
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert [priority for priority, _ in run(scenario())] == [
+        "interactive",
+        "background",
+        "bulk",
+    ]
+
+
+def test_sessions_share_a_class_fairly():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        await scheduler.acquire("interactive", "busy")
+        order, tasks = await admit_in_order(
+            scheduler,
+            [("interactive", "busy")] * 3 + [("interactive", "quiet")],
+        )
+        for _ in range(4):
+            scheduler.release("interactive")
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return [key for _, key in order]
+
+    # The quiet session is served second, not behind the busy session's backlog
+    assert run(scenario())[:2] == ["busy", "quiet"]
+
+
+def test_reserved_slots_only_serve_interactive():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=4, reserved_interactive=2)
+        assert scheduler.try_acquire("background")
+        assert scheduler.try_acquire("background")
+        assert not scheduler.try_acquire("background")
+        assert scheduler.try_acquire("interactive")
+        return scheduler.stats()
+
+    stats = run(scenario())
+    assert stats["running"] == 3
+    assert stats["background"]["limit"] == 2
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        await scheduler.acquire("interactive")
+        waiter = asyncio.create_task(scheduler.acquire("interactive", "s1"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release("interactive")
+        return scheduler.stats()
+
+    stats = run(scenario())
+    assert stats["running"] == 0
+    assert stats["interactive"]["queued"] == 0
+
+
+def test_abandoned_call_keeps_its_slot_until_the_thread_returns():
+    finish = threading.Event()
+
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        await scheduler.acquire("interactive")
+        call = scheduler.run_in_slot("interactive", finish.wait)
+        try:
+            await asyncio.wait_for(call, timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        held = scheduler.stats()["running"]
+        assert not scheduler.try_acquire("interactive")
+        finish.set()
+        await asyncio.sleep(0.05)
+        return held, scheduler.stats()
+
+    held, stats = run(scenario())
+    assert held == 1
+    assert stats["running"] == 0
+    assert stats["abandoned"] == 1
+
+
+def test_hedge_is_skipped_without_a_free_slot():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        hedger = RequestHedger(min_delay_ms=10, budget=HedgeBudget(burst=5))
+        hedger.hedge_delay_ms = lambda label: 10.0
+        await scheduler.acquire("interactive")
+        primary = scheduler.run_in_slot(
+            "interactive", lambda: time.sleep(0.05) or "primary"
+        )
+
+        def start_hedge():
+            if not scheduler.try_acquire("interactive"):
+                return None
+            return scheduler.run_in_slot("interactive", lambda: "hedge")
+
+        result = await hedger.run("op", primary, start_hedge)
+        return result, hedger.stats()["op"]
+
+    result, counters = run(scenario())
+    assert result == "primary"
+    assert counters["slot_denied"] == 1
+    assert counters["hedged"] == 0
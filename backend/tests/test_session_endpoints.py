@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+os.environ.setdefault("CONVERSATION_STORE_ENABLED", "False")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+from conversation_store import ConversationStore  # noqa: E402
+
+NOW = "2026-01-01T00:00:00"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ConversationStore(str(tmp_path / "c.db"), flush_interval=0.2)
+    monkeypatch.setattr(app, "conversation_store", store)
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "admin")
+    store.upsert_session(
+        "s1", {"created_at": NOW, "last_activity": NOW, "message_count": 1}
+    )
+    store.append_message("s1", "assistant", "just answered", NOW)
+    yield store
+    store.close()
+
+
+def test_transcript_needs_the_session_token(store):
+    client = TestClient(app.app)
+    url = "/sessions/s1/messages"
+    assert client.get(url).status_code == 403
+    assert client.get(url, headers={"X-Session-Token": "wrong"}).status_code == 403
+
+    token = app.session_tokens.issue("s1")
+    response = client.get(url, headers={"X-Session-Token": token})
+    # Queued writes for the session are waited for, not skipped
+    assert [m["content"] for m in response.json()["messages"]] == ["just answered"]
+    assert client.get(url, headers={"X-Admin-Token": "admin"}).status_code == 200
+
+
+def test_clearing_sessions_keeps_transcripts_unless_admin(store):
+    client = TestClient(app.app)
+    assert client.delete("/sessions").status_code == 200
+    assert store.wait_for_session("s1", timeout=5) and store.has_session("s1")
+    assert client.delete("/sessions", params={"persisted": "true"}).status_code == 403
+
+
+def test_deletes_sessions_that_are_only_in_the_store(store):
+    client = TestClient(app.app)
+    store.flush()
+    assert "s1" not in app.chat_sessions
+    assert client.delete("/sessions/s1").status_code == 200
+    store.flush()
+    assert not store.has_session("s1")
+
+
+def test_source_preview_is_routed_to_the_session_owner(monkeypatch):
+    monkeypatch.setattr(app, "SHARD_MODE", "redirect")
+    monkeypatch.setattr(app, "session_owner", lambda session_id: "http://node-b")
+    client = TestClient(app.app, follow_redirects=False)
+    response = client.get(
+        "/sources/preview",
+        params={"uri": "s3://kb/doc.txt", "session_id": "s1", "token": "t"},
+    )
+    assert response.status_code == 307
+    assert response.headers["location"].startswith("http://node-b/sources/preview?")
@@ -0,0 +1,77 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from sharding import HashRing, forward_request, node_addresses
+
+NODES = [f"http://node-{i}:8000" for i in range(4)]
+KEYS = [f"session-{i}" for i in range(4000)]
+
+
+def owners(ring):
+    return {key: ring.node_for(key) for key in KEYS}
+
+
+def test_keys_spread_across_nodes():
+    counts = {}
+    for node in owners(HashRing(NODES)).values():
+        counts[node] = counts.get(node, 0) + 1
+    assert set(counts) == set(NODES)
+    # 128 virtual nodes keep every node within ~35% of an even share
+    assert all(abs(count - 1000) < 350 for count in counts.values())
+
+
+def test_adding_a_node_only_moves_its_share():
+    ring = HashRing(NODES)
+    before = owners(ring)
+    ring.add_node("http://node-4:8000")
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == "http://node-4:8000" for key in moved)
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(NODES)
+    before = owners(ring)
+    ring.remove_node("http://node-0:8000")
+    after = owners(ring)
+    for key in KEYS:
+        if before[key] != "http://node-0:8000":
+            assert after[key] == before[key]
+    assert "http://node-0:8000" not in after.values()
+
+
+def test_ring_is_deterministic_and_empty_ring_has_no_owner():
+    assert owners(HashRing(NODES)) == owners(HashRing(list(reversed(NODES))))
+    assert HashRing([]).node_for("session-1") is None
+
+
+@pytest.fixture
+def peer():
+    """Local node that answers every request with an HTML page."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b"<html>maintenance</html>")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_non_json_reply_raises_value_error(peer):
+    with pytest.raises(ValueError):
+        forward_request(f"{peer}/chat", "POST", {"message": "hi"}, {}, 5)
+
+
+def test_node_addresses_resolve_hosts():
+    assert "127.0.0.1" in node_addresses(["http://127.0.0.1:8000", "not a url"])
@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+from cache import SizedLRUCache
+from source_preview import (
+    LocalObjectStore,
+    PreviewSigner,
+    S3ObjectStore,
+    SourcePreviewer,
+    snippet_pattern,
+    trim_citations,
+)
+
+
+class CountingStore:
+    """In-memory object store that records every ranged read."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.reads = []
+
+    def stat(self, location):
+        return len(self.data), "v1"
+
+    def read_range(self, location, start, end):
+        self.reads.append((start, end))
+        return self.data[start:end]
+
+
+def test_sized_cache_evicts_least_recently_used_by_bytes():
+    cache = SizedLRUCache(max_bytes=100)
+    cache.set("a", "A", size=40)
+    cache.set("b", "B", size=40)
+    assert cache.get("a") == "A"  # "b" is now the least recently used
+    cache.set("c", "C", size=40)
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sized_cache_skips_values_larger_than_the_cache():
+    cache = SizedLRUCache(max_bytes=100)
+    cache.set("a", "A", size=40)
+    assert not cache.set("big", "B", size=101)
+    assert cache.get("a") == "A"
+    assert len(cache) == 1
+
+
+def test_sized_cache_replaces_and_expires_entries(monkeypatch):
+    cache = SizedLRUCache(max_bytes=100, ttl_seconds=10)
+    cache.set("a", "old", size=30)
+    cache.set("a", "new", size=50)
+    assert cache.get("a") == "new"
+    assert cache.stats()["bytes"] == 50
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.parametrize("boundary_offset", [-10, -3, -1, 0, 1])
+def test_find_matches_text_split_across_blocks(boundary_offset):
+    snippet = b"roaming costs five AZN"
+    start = 64 + boundary_offset
+    data = b"x" * start + snippet + b"y" * 200
+    store = CountingStore(data)
+    previewer = SourcePreviewer({}, SizedLRUCache(), block_bytes=64)
+
+    span = previewer._find(
+        store, "doc", len(data), snippet_pattern(snippet.decode()), len(snippet)
+    )
+    assert span == (start, start + len(snippet))
+
+
+def test_find_matches_across_reflowed_whitespace_and_stops_at_scan_limit():
+    data = b"." * 200 + b"roaming\n  costs five AZN" + b"." * 400
+    store = CountingStore(data)
+    previewer = SourcePreviewer({}, SizedLRUCache(), block_bytes=64)
+    pattern = snippet_pattern("roaming costs five AZN")
+    assert previewer._find(store, "doc", len(data), pattern, 22) == (200, 224)
+
+    limited = SourcePreviewer({}, SizedLRUCache(), block_bytes=64, max_scan_bytes=64)
+    store.reads.clear()
+    assert limited._find(store, "doc", len(data), pattern, 22) is None
+    assert len(store.reads) == 1
+
+
+def test_preview_reads_only_the_window_around_the_citation(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(
+        b"filler " * 2000 + b"Dial *100# to check your balance." + b" end" * 500
+    )
+    previewer = SourcePreviewer(
+        {"file": LocalObjectStore(str(tmp_path))},
+        SizedLRUCache(),
+        context_bytes=100,
+        block_bytes=4096,
+    )
+    preview = previewer.preview(path.as_uri(), text="Dial *100# to check")
+    highlight = preview["highlight"]
+    assert preview["found"]
+    assert preview["text"][highlight["start"] : highlight["end"]].startswith(
+        "Dial *100#"
+    )
+    assert previewer.preview(path.as_uri(), text="Dial *100# to check")["cached"]
+
+
+def test_s3_store_requires_a_bucket_allowlist():
+    with pytest.raises(ValueError):
+        S3ObjectStore(client=object(), buckets=[])
+
+
+def test_preview_tokens_are_bound_to_session_and_uri():
+    signer = PreviewSigner(b"secret")
+    token = signer.sign("session-1", "s3://kb/doc.txt")
+    assert signer.verify("session-1", "s3://kb/doc.txt", token)
+    assert not signer.verify("session-2", "s3://kb/doc.txt", token)
+    assert not signer.verify("session-1", "s3://other/secrets.txt", token)
+    assert not signer.verify("session-1", "s3://kb/doc.txt", "garbage")
+    assert not PreviewSigner(b"other").verify("session-1", "s3://kb/doc.txt", token)
+
+    expired = PreviewSigner(b"secret", ttl_seconds=-1)
+    assert not expired.verify(
+        "session-1", "s3://kb/doc.txt", expired.sign("session-1", "s3://kb/doc.txt")
+    )
+
+
+def test_trim_citations_attaches_preview_tokens():
+    citations = [
+        {
+            "retrievedReferences": [
+                {
+                    "content": {"text": "a" * 50},
+                    "location": {"s3Location": {"uri": "s3://kb/doc.txt"}},
+                },
+                {"content": {"text": "no location"}},
+            ]
+        }
+    ]
+    trimmed = trim_citations(citations, 10, lambda uri: f"token:{uri}")
+    with_uri, without_uri = trimmed[0]["retrievedReferences"]
+    assert with_uri["content"]["text"] == "a" * 10
+    assert with_uri["previewToken"] == "token:s3://kb/doc.txt"
+    assert "previewToken" not in without_uri
+    assert "previewToken" not in citations[0]["retrievedReferences"][0]
@@ -0,0 +1,19 @@
+import logging
+import queue
+
+from structured_logging import JsonFormatter, LazyQueueHandler
+
+
+def test_lazy_queue_handler_merges_args_before_enqueueing():
+    log_queue: "queue.Queue" = queue.Queue()
+    logger = logging.getLogger("tests.lazy_queue")
+    logger.propagate = False
+    logger.handlers = [LazyQueueHandler(log_queue)]
+    attempts = [1]
+    logger.warning("attempts so far: %s (%d%%)", attempts, 50, extra={"region": "eu"})
+    attempts.append(2)
+
+    record = log_queue.get_nowait()
+    assert record.msg == "attempts so far: [1] (50%)"
+    assert record.args is None
+    assert '"region": "eu"' in JsonFormatter().format(record)
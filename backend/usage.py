@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K tokens (input, output); override with MODEL_PRICING_JSON
+DEFAULT_MODEL_PRICING = {
+    "anthropic.claude-3-sonnet-20240229-v1:0": (0.003, 0.015),
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": (0.003, 0.015),
+    "anthropic.claude-3-haiku-20240307-v1:0": (0.00025, 0.00125),
+}
+
+COUNTER_FIELDS = (
+    "requests",
+    "input_tokens",
+    "output_tokens",
+    "estimated_requests",
+    "retrieval_calls",
+    "retries",
+)
+
+
+def new_usage(model: str) -> Dict[str, Any]:
+    """Per-request usage accumulator threaded through the query path."""
+    return {
+        "model": model,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "estimated": False,
+        "retrieval_calls": 0,
+        "retries": 0,
+    }
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals: Dict[str, Any] = {field: 0 for field in COUNTER_FIELDS}
+    totals["cost_usd"] = 0.0
+    return totals
+
+
+class UsageTracker:
+    """In-memory usage counters per session, model and day, flushed periodically to a file."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        flush_interval: float = 60.0,
+        pricing: Optional[Dict[str, tuple]] = None,
+        max_sessions: int = 10000,
+        max_days: int = 90,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pricing = pricing or DEFAULT_MODEL_PRICING
+        self.max_sessions = max_sessions
+        self.max_days = max_days
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.days: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._load()
+        self._flusher = None
+        if path and flush_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="usage-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        input_price, output_price = self.pricing.get(model, (0.0, 0.0))
+        return input_tokens / 1000 * input_price + output_tokens / 1000 * output_price
+
+    def record(
+        self, usage: Dict[str, Any], session_id: Optional[str], day: str
+    ) -> float:
+        """Add one request's usage to the session, model and day totals. Returns its cost."""
+        cost = self.cost(usage["model"], usage["input_tokens"], usage["output_tokens"])
+        with self._lock:
+            buckets = [
+                self.models.setdefault(usage["model"], _empty_totals()),
+                self._bucket(self.days, day, self.max_days),
+            ]
+            if session_id:
+                buckets.append(
+                    self._bucket(self.sessions, session_id, self.max_sessions)
+                )
+            for totals in buckets:
+                totals["requests"] += 1
+                totals["input_tokens"] += usage["input_tokens"]
+                totals["output_tokens"] += usage["output_tokens"]
+                totals["estimated_requests"] += int(usage["estimated"])
+                totals["retrieval_calls"] += usage["retrieval_calls"]
+                totals["retries"] += usage["retries"]
+                totals["cost_usd"] += cost
+            self._dirty = True
+        return cost
+
+    @staticmethod
+    def _bucket(buckets: "OrderedDict[str, Dict[str, Any]]", key: str, limit: int):
+        totals = buckets.get(key)
+        if totals is None:
+            totals = buckets[key] = _empty_totals()
+            while len(buckets) > limit:
+                buckets.popitem(last=False)
+        buckets.move_to_end(key)
+        return totals
+
+    def report(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if session_id:
+                totals = self.sessions.get(session_id) or _empty_totals()
+                return {"session_id": session_id, "totals": dict(totals)}
+            return {
+                "per_model": {k: dict(v) for k, v in self.models.items()},
+                "per_day": {k: dict(v) for k, v in self.days.items()},
+                "per_session": {k: dict(v) for k, v in self.sessions.items()},
+            }
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.models.update(data.get("per_model", {}))
+            self.days.update(data.get("per_day", {}))
+            self.sessions.update(data.get("per_session", {}))
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load usage file %s: %s", self.path, e)
+
+    def flush(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        snapshot = self.report()
+        self._dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self._dirty = True
+            logger.error("Failed to flush usage to %s: %s", self.path, e)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
@@ -1,8 +1,13 @@
-from typing import Any, Dict
+import hashlib
+import html
+import os
+from typing import Any, Dict, Optional
 
 import requests
 import streamlit as st
 
+from build_static import SOURCE, TARGET, minify_css
+
 # Configure page
 st.set_page_config(
     page_title="AIsha Chatbot",
@@ -11,371 +16,38 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Minimal CSS for sidebar and core styling
-st.markdown(
-    """
-<style>
-    /* Import Inter font */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Global styles */
-    .stApp {
-        background:  #233d4d ;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Sidebar styling */
-    [data-testid="stSidebar"] {
-        background: #14718D !important;
-        border-right: 1px solid rgba(99, 102, 241, 0.2) !important;
-        width: 280px !important;
-        display: block !important;
-        min-height: 100vh !important;
-        color: #ffffff !important;
-    }
-    
-    [data-testid="stSidebar"] * {
-        color: #ffffff !important;
-    }
-    
-    .sidebar-header {
-        padding: 10px 16px;
-        border-bottom: 1px solid rgba(99, 102, 241, 0.2);
-    }
-    
-    .new-chat-btn {
-        background: rgb(2, 54, 74) !important;
-        color: #ffffff !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 8px 16px !important;
-        width: 100% !important;
-        font-weight: 600 !important;
-        margin-bottom: 10px !important;
-        display: flex !important;
-        align-items: center !important;
-        gap: 8px !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .chat-item {
-        background: rgba(30, 41, 59, 0.6);
-        border: 1px solid rgba(99, 102, 241, 0.2);
-        border-radius: 8px;
-        padding: 8px;
-        margin-bottom: 8px;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-    }
-    
-    .chat-item:hover {
-        background: rgba(99, 102, 241, 0.15);
-        border-color: rgba(99, 102, 241, 0.4);
-    }
-    
-    .chat-item.active {
-        background: rgba(99, 102, 241, 0.2);
-        border-color: #6366f1;
-    }
-    
-    .chat-title {
-        font-size: 14px;
-        font-weight: 500;
-        overflow: hidden;
-        text-overflow: ellipsis;
-        white-space: nowrap;
-        max-width: 180px;
-    }
-    
-    .delete-btn {
-        color: #ef4444 !important;
-        background: none;
-        border: none;
-        cursor: pointer;
-        padding: 4px;
-        border-radius: 4px;
-        transition: all 0.3s ease;
-        font-size: 12px;
-    }
-    
-    .delete-btn:hover {
-        background: rgba(239, 68, 68, 0.2);
-    }
-    
-    /* Custom header */
-    .custom-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 10px 20px;
-        border-bottom: 1px solid rgba(99, 102, 241, 0.2);
-    }
-    
-    .logo {
-        display: flex;
-        align-items: center;
-        gap: 10px;
-        font-size: 24px;
-        font-weight: 600;
-        color: #60a5fa;
-    }
-    
-    .model-badge {
-        background: rgba(99, 102, 241, 0.15);
-        color: #a5b4fc;
-        padding: 6px 12px;
-        border-radius: 20px;
-        font-size: 14px;
-        border: 1px solid rgba(99, 102, 241, 0.3);
-    }
-    
-    .status-badge {
-        padding: 4px 8px;
-        border-radius: 12px;
-        font-size: 12px;
-        font-weight: 500;
-    }
-    
-    .status-online {
-        background: rgba(34, 197, 94, 0.2);
-        color: #22c55e;
-        border: 1px solid rgba(34, 197, 94, 0.3);
-    }
-    
-    .status-offline {
-        background: rgba(239, 68, 68, 0.2);
-        color: #ef4444;
-        border: 1px solid rgba(239, 68, 68, 0.3);
-    }
-    
-    .status-mock {
-        background: rgba(251, 191, 36, 0.2);
-        color: #fbbf24;
-        border: 1px solid rgba(251, 191, 36, 0.3);
-    }
-    
-    /* Welcome screen */
-    .welcome-container {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        justify-content: center;
-        min-height: 40vh;
-        text-align: center;
-    }
-    
-    .welcome-title {
-        font-size: 3.5rem;
-        font-weight: 700;
-        background: linear-gradient(135deg, #E3CCDC, #f472b6);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        margin-bottom: 10px;
-        animation: glow 2s ease-in-out infinite alternate;
-    }
-    
-    @keyframes glow {
-        from { filter: drop-shadow(0 0 20px rgba(96, 165, 250, 0.3)); }
-        to { filter: drop-shadow(0 0 30px rgba(167, 139, 250, 0.5)); }
-    }
-    
-    .welcome-subtitle {
-        font-size: 1.2rem;
-        color: #94a3b8;
-        margin-bottom: 20px;
-        max-width: 600px;
-    }
-    
-    /* Chat interface */
-    .chat-container {
-        max-width: 800px;
-        margin: 0 auto;
-    }
-    
-    .message {
-        margin: 10px 0;
-        padding: 15px;
-        border-radius: 16px;
-        animation: fadeIn 0.5s ease-in;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .user-message {
-        background: rgba(99, 102, 241, 0.15);
-        border: 1px solid rgba(99, 102, 241, 0.3);
-        margin-left: 60px;
-    }
-    
-    .assistant-message {
-        background: rgba(34, 197, 94, 0.15);
-        border: 1px solid rgba(34, 197, 94, 0.3);
-        margin-right: 60px;
-    }
-    
-    .error-message {
-        background: rgba(239, 68, 68, 0.15);
-        border: 1px solid rgba(239, 68, 68, 0.3);
-        margin-right: 60px;
-    }
-    
-    .message-header {
-        display: flex;
-        align-items: center;
-        gap: 10px;
-        margin-bottom: 5px;
-        font-weight: 600;
-    }
-    
-    .user-avatar {
-        width: 32px;
-        height: 32px;
-        background: rgb(2, 54, 74);
-        border-radius: 50%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-size: 14px;
-    }
-    
-    .assistant-avatar {
-        width: 32px;
-        height: 32px;
-        background: linear-gradient(135deg, #10b981, #059669);
-        border-radius: 50%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-size: 16px;
-    }
-    
-    .error-avatar {
-        width: 32px;
-        height: 32px;
-        background: linear-gradient(135deg, #ef4444, #dc2626);
-        border-radius: 50%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-size: 16px;
-    }
-    
-    /* Citation styling */
-    .citations {
-        margin-top: 10px;
-        padding: 10px;
-        background: rgba(30, 41, 59, 0.5);
-        border-radius: 8px;
-        border-left: 3px solid #6366f1;
-    }
-    
-    .citation {
-        font-size: 12px;
-        color: #94a3b8;
-        margin: 2px 0;
-    }
-    
-    /* Input styling */
-    .stTextInput > div > div > input {
-        background: white !important;
-        border: 2px solid rgba(99, 102, 241, 0.3) !important;
-        border-radius: 12px !important;
-        color: #ffffff !important;
-        font-size: 16px !important;
-        padding: 12px !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #6366f1 !important;
-        box-shadow: 0 0 20px rgba(99, 102, 241, 0.3) !important;
-        color: #ffffff !important;
-    }
-    
-    .stTextInput > div > div > input::placeholder {
-        color: #94a3b8 !important;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(135deg, #B3446C, #32127A) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 10px 20px !important;
-        font-weight: 600 !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 4px 20px rgba(99, 102, 241, 0.3) !important;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 25px rgba(99, 102, 241, 0.4) !important;
-    }
-    
-    /* Loading animation */
-    .loading {
-        display: inline-block;
-        width: 20px;
-        height: 20px;
-        border: 3px solid rgba(99, 102, 241, 0.3);
-        border-radius: 50%;
-        border-top-color: #6366f1;
-        animation: spin 1s ease-in-out infinite;
-    }
-    
-    @keyframes spin {
-        to { transform: rotate(360deg); }
-    }
-    
-    /* Responsive design */
-    @media (max-width: 768px) {
-        .welcome-title {
-            font-size: 2.5rem;
-        }
-        
-        .user-message {
-            margin-left: 20px;
-        }
-        
-        .assistant-message {
-            margin-right: 20px;
-        }
-        
-        .error-message {
-            margin-right: 20px;
-        }
-    }
-    
-    .stTextInput input {
-        color: #ffffff !important;
-        caret-color: #ffffff !important;
-    }
+# Styling lives in static/style.css. build_static.py minifies it into
+# static/style.min.css at image build time; when that file is present and current it
+# is linked from Streamlit's static server, so reruns send a short <link> tag instead
+# of the whole stylesheet. Otherwise (or with FRONTEND_INLINE_CSS=true) the minified
+# CSS is inlined from memory; the app never writes into static/.
+INLINE_CSS = os.getenv("FRONTEND_INLINE_CSS", "False").lower() == "true"
 
-    .stTextInput input::placeholder {
-        color: #ffffff !important;
-        opacity: 0.6 !important;
-    }
 
-    .message {
-        color: #ffffff !important;
+@st.cache_resource
+def build_stylesheet() -> Dict[str, Optional[str]]:
+    """Minify the stylesheet once per process and return the tags that load it"""
+    css = minify_css(SOURCE.read_text(encoding="utf-8"))
+    built = TARGET.read_text(encoding="utf-8") if TARGET.exists() else None
+    # A ?v= query argument makes the static handler send a long-lived Cache-Control
+    version = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return {
+        "link": (
+            f'<link rel="stylesheet" href="app/static/{TARGET.name}?v={version}">'
+            if built == css
+            else None
+        ),
+        "inline": f"<style>{css}</style>",
     }
 
-    .user-avatar, .assistant-avatar, .error-avatar {
-        color: #ffffff !important;
-    }
-</style>
-""",
+
+stylesheet = build_stylesheet()
+st.markdown(
+    (
+        stylesheet["link"]
+        if stylesheet["link"] and not INLINE_CSS
+        else stylesheet["inline"]
+    ),
     unsafe_allow_html=True,
 )
 
@@ -392,12 +64,27 @@ if "chat_counter" not in st.session_state:
     st.session_state.chat_counter = 0
 if "session_id" not in st.session_state:
     st.session_state.session_id = None
+if "session_token" not in st.session_state:
+    st.session_state.session_token = None
 if "backend_status" not in st.session_state:
     st.session_state.backend_status = None
+if "has_more_history" not in st.session_state:
+    st.session_state.has_more_history = False
+if "chat_page" not in st.session_state:
+    st.session_state.chat_page = 0
+if "source_previews" not in st.session_state:
+    st.session_state.source_previews = {}
 
 # Backend API configuration
 BACKEND_URL = "http://52.3.105.20:8001"
 
+# Number of messages kept in memory and fetched per history page
+HISTORY_PAGE_SIZE = 20
+CHAT_TIMEOUT = 30  # seconds
+
+# Number of chats listed per sidebar page
+CHATS_PAGE_SIZE = 10
+
 
 def check_backend_status() -> Dict[str, Any]:
     """Check if the backend is available and get its status"""
@@ -432,13 +119,23 @@ def call_rag_api(message: str) -> Dict[str, Any]:
     try:
         payload = {"message": message, "session_id": st.session_state.session_id}
 
-        response = requests.post(f"{BACKEND_URL}/chat", json=payload, timeout=30)
+        # Give the backend slightly less than our own timeout so it gives up first
+        response = requests.post(
+            f"{BACKEND_URL}/chat",
+            json=payload,
+            headers={"X-Request-Timeout-Ms": str(int(CHAT_TIMEOUT * 1000) - 1000)},
+            timeout=CHAT_TIMEOUT,
+        )
 
         if response.status_code == 200:
             data = response.json()
             # Update session ID if provided by backend
             if data.get("session_id"):
                 st.session_state.session_id = data["session_id"]
+                st.session_state.session_token = data.get("session_token")
+                st.query_params["session_id"] = data["session_id"]
+                if data.get("session_token"):
+                    st.query_params["session_token"] = data["session_token"]
             return data
         else:
             return {
@@ -467,36 +164,203 @@ def call_rag_api(message: str) -> Dict[str, Any]:
         }
 
 
+def fetch_session_messages(
+    session_id: str, session_token: str, before_id: int = None
+) -> Dict[str, Any]:
+    """Fetch one page of persisted messages for a backend session"""
+    try:
+        params = {"limit": HISTORY_PAGE_SIZE}
+        if before_id is not None:
+            params["before_id"] = before_id
+        response = requests.get(
+            f"{BACKEND_URL}/sessions/{session_id}/messages",
+            params=params,
+            headers={"X-Session-Token": session_token or ""},
+            timeout=5,
+        )
+        if response.status_code == 200:
+            return response.json()
+    except requests.exceptions.RequestException:
+        pass
+    return {"messages": [], "has_more": False, "next_before_id": None}
+
+
+def fetch_source_preview(uri: str, text: str, token: str) -> Dict[str, Any]:
+    """Fetch the part of a cited document around the citation snippet"""
+    try:
+        response = requests.get(
+            f"{BACKEND_URL}/sources/preview",
+            params={
+                "uri": uri,
+                "text": text,
+                "session_id": st.session_state.session_id,
+                "token": token,
+            },
+            timeout=10,
+        )
+        if response.status_code == 200:
+            return response.json()
+        return {"error": response.json().get("detail", f"HTTP {response.status_code}")}
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Could not load preview: {e}"}
+    except ValueError:
+        return {"error": "Invalid preview response"}
+
+
+def citation_sources(citations: list) -> list:
+    """(uri, snippet, token) for the citations the backend issued a preview token for"""
+    sources = []
+    for citation in (citations or [])[:3]:
+        if not isinstance(citation, dict):
+            continue
+        for ref in citation.get("retrievedReferences", [])[:1]:
+            location = ref.get("location", {}) if isinstance(ref, dict) else {}
+            uri = (
+                location.get("s3Location") or location.get("localLocation") or {}
+            ).get("uri")
+            token = ref.get("previewToken") if isinstance(ref, dict) else None
+            if uri and token:
+                sources.append((uri, ref.get("content", {}).get("text", ""), token))
+    return sources
+
+
+def render_source_previews(citations: list, key: str):
+    """Offer a preview of each cited document, fetched only when asked for"""
+    previews = st.session_state.source_previews
+    for n, (uri, text, token) in enumerate(citation_sources(citations)):
+        preview_key = (uri, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        if preview_key not in previews:
+            if not st.button(f"📄 Preview source {n + 1}", key=f"{key}_source_{n}"):
+                continue
+            previews[preview_key] = fetch_source_preview(uri, text, token)
+
+        preview = previews[preview_key]
+        with st.expander(f"Source {n + 1}: {uri.rsplit('/', 1)[-1]}", expanded=True):
+            if preview.get("error"):
+                st.caption(preview["error"])
+                continue
+            body = preview["text"]
+            highlight = preview.get("highlight")
+            if highlight:
+                body_html = (
+                    html.escape(body[: highlight["start"]])
+                    + "<mark>"
+                    + html.escape(body[highlight["start"] : highlight["end"]])
+                    + "</mark>"
+                    + html.escape(body[highlight["end"] :])
+                )
+            else:
+                body_html = html.escape(body)
+            prefix = "… " if preview.get("truncated_before") else ""
+            suffix = " …" if preview.get("truncated_after") else ""
+            st.markdown(
+                f'<div class="source-preview">{prefix}{body_html}{suffix}</div>',
+                unsafe_allow_html=True,
+            )
+
+
+def save_current_chat():
+    """Save the visible tail of the current chat to the history"""
+    if not (st.session_state.messages and st.session_state.current_chat_id):
+        return
+    existing = st.session_state.chats.get(st.session_state.current_chat_id, {})
+    st.session_state.chats[st.session_state.current_chat_id] = {
+        "title": existing.get("title")
+        or get_chat_title(st.session_state.messages[0]["content"]),
+        "messages": st.session_state.messages[-HISTORY_PAGE_SIZE:],
+        "session_id": st.session_state.session_id,
+        "session_token": st.session_state.session_token,
+    }
+    if (
+        len(st.session_state.messages) > 2 * HISTORY_PAGE_SIZE
+        and st.session_state.session_id
+        and st.session_state.messages[-1]["role"] == "assistant"
+    ):
+        # Older messages are persisted by the backend and can be paged back in on demand
+        page = fetch_session_messages(
+            st.session_state.session_id, st.session_state.session_token
+        )
+        # Keep the local messages unless the page ends with the reply just shown
+        latest = page["messages"][-1] if page["messages"] else {}
+        if latest.get("content") == st.session_state.messages[-1]["content"]:
+            st.session_state.messages = page["messages"]
+            st.session_state.has_more_history = page["has_more"]
+
+
+def load_earlier_messages():
+    """Prepend the previous page of persisted messages to the current chat"""
+    before_id = (
+        st.session_state.messages[0].get("id") if st.session_state.messages else None
+    )
+    if before_id is None:
+        return
+    page = fetch_session_messages(
+        st.session_state.session_id,
+        st.session_state.session_token,
+        before_id=before_id,
+    )
+    st.session_state.messages = page["messages"] + st.session_state.messages
+    st.session_state.has_more_history = page["has_more"]
+
+
 def create_new_chat():
     """Create a new chat and switch to it"""
-    if st.session_state.messages and st.session_state.current_chat_id:
-        st.session_state.chats[st.session_state.current_chat_id] = {
-            "title": get_chat_title(st.session_state.messages[0]["content"]),
-            "messages": st.session_state.messages.copy(),
-            "session_id": st.session_state.session_id,
-        }
+    save_current_chat()
     st.session_state.chat_counter += 1
     new_id = f"chat_{st.session_state.chat_counter}"
     st.session_state.current_chat_id = new_id
     st.session_state.messages = []
     st.session_state.first_interaction = True
     st.session_state.session_id = None  # Reset session for new chat
+    st.session_state.session_token = None
+    st.session_state.has_more_history = False
 
 
 def load_chat(chat_id: str):
     """Load a specific chat"""
     if chat_id in st.session_state.chats:
-        if st.session_state.messages and st.session_state.current_chat_id:
-            st.session_state.chats[st.session_state.current_chat_id] = {
-                "title": get_chat_title(st.session_state.messages[0]["content"]),
-                "messages": st.session_state.messages.copy(),
-                "session_id": st.session_state.session_id,
-            }
+        save_current_chat()
         st.session_state.current_chat_id = chat_id
         chat_data = st.session_state.chats[chat_id]
         st.session_state.messages = chat_data["messages"].copy()
         st.session_state.session_id = chat_data.get("session_id")
+        st.session_state.session_token = chat_data.get("session_token")
         st.session_state.first_interaction = False
+        st.session_state.has_more_history = False
+
+        # Prefer the persisted tail from the backend, it survives browser refreshes
+        if st.session_state.session_id:
+            page = fetch_session_messages(
+                st.session_state.session_id, st.session_state.session_token
+            )
+            if page["messages"]:
+                st.session_state.messages = page["messages"]
+                st.session_state.has_more_history = page["has_more"]
+
+
+def restore_chat_from_url():
+    """Reopen the conversation referenced in the URL after a browser refresh"""
+    session_id = st.query_params.get("session_id")
+    session_token = st.query_params.get("session_token")
+    if not (session_id and session_token) or st.session_state.chats:
+        return
+    page = fetch_session_messages(session_id, session_token)
+    if not page["messages"]:
+        return
+    st.session_state.chat_counter += 1
+    chat_id = f"chat_{st.session_state.chat_counter}"
+    st.session_state.chats[chat_id] = {
+        "title": get_chat_title(page["messages"][0]["content"]),
+        "messages": page["messages"],
+        "session_id": session_id,
+        "session_token": session_token,
+    }
+    st.session_state.current_chat_id = chat_id
+    st.session_state.messages = page["messages"]
+    st.session_state.session_id = session_id
+    st.session_state.session_token = session_token
+    st.session_state.has_more_history = page["has_more"]
+    st.session_state.first_interaction = False
 
 
 def delete_chat(chat_id: str):
@@ -623,6 +487,142 @@ def render_message(
         )
 
 
+def send_suggestion(question: str):
+    """Send a suggested follow-up as the user's next message"""
+    st.session_state.messages.append({"role": "user", "content": question})
+    save_current_chat()
+
+
+def render_suggestions(suggestions: list, key: str):
+    """Offer the backend's predicted follow-ups as one-click questions"""
+    if not suggestions:
+        return
+    columns = st.columns(len(suggestions))
+    for j, (column, question) in enumerate(zip(columns, suggestions)):
+        with column:
+            st.button(
+                question,
+                key=f"suggestion_{key}_{j}",
+                on_click=send_suggestion,
+                args=(question,),
+                use_container_width=True,
+            )
+
+
+def refresh_backend_status():
+    """Check the backend and pre-render the sidebar status panels for it"""
+    status = check_backend_status()
+    st.session_state.backend_status = status
+
+    if status["available"]:
+        if status.get("data", {}).get("bedrock_available"):
+            status_class = "status-online"
+            status_text = "🟢 Backend Online (Bedrock)"
+        else:
+            status_class = "status-mock"
+            status_text = "🟡 Backend Online (Mock Mode)"
+    else:
+        status_class = "status-offline"
+        status_text = "🔴 Backend Offline"
+    st.session_state.status_badge_html = f"""
+        <div class="{status_class} status-badge" style="margin-bottom: 10px; text-align: center;">
+            {status_text}
+        </div>
+        """
+
+    if status["available"] and "data" in status:
+        data = status["data"]
+        st.session_state.system_info_markdown = f"""
+            - **Status**: {'✅ Online' if status['available'] else '❌ Offline'}
+            - **Bedrock**: {'✅ Available' if data.get('bedrock_available') else '❌ Mock Mode'}
+            - **Sessions**: {data.get('active_sessions', 0)}
+            - **Region**: {data.get('aws_region', 'N/A')}
+            """
+    else:
+        st.session_state.system_info_markdown = f"""
+            - **Status**: ❌ Offline
+            - **Error**: {status.get('error', 'Unknown')}
+            """
+
+
+def change_chat_page(delta: int):
+    st.session_state.chat_page += delta
+
+
+def reset_chat_page():
+    st.session_state.chat_page = 0
+
+
+@st.fragment
+def render_chat_history():
+    """Render one searchable page of chats; paging and searching rerun only this pane"""
+    st.markdown("### 💬 Chat History")
+    if not st.session_state.chats:
+        st.markdown("*No previous chats*")
+        return
+
+    search = st.text_input(
+        "Search chats",
+        key="chat_search",
+        placeholder="🔍 Search chats",
+        label_visibility="collapsed",
+        on_change=reset_chat_page,
+    )
+    chat_ids = list(reversed(st.session_state.chats))
+    if search:
+        needle = search.lower()
+        chat_ids = [
+            chat_id
+            for chat_id in chat_ids
+            if needle in st.session_state.chats[chat_id]["title"].lower()
+        ]
+    if not chat_ids:
+        st.markdown("*No matching chats*")
+        return
+
+    page_count = (len(chat_ids) + CHATS_PAGE_SIZE - 1) // CHATS_PAGE_SIZE
+    page = min(st.session_state.chat_page, page_count - 1)
+    st.session_state.chat_page = page
+    for chat_id in chat_ids[page * CHATS_PAGE_SIZE : (page + 1) * CHATS_PAGE_SIZE]:
+        chat_data = st.session_state.chats[chat_id]
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            is_active = chat_id == st.session_state.current_chat_id
+            button_style = "🔵 " if is_active else "💬 "
+            if st.button(
+                f"{button_style}{chat_data['title']}",
+                key=f"load_{chat_id}",
+                use_container_width=True,
+            ):
+                load_chat(chat_id)
+                st.rerun()
+        with col2:
+            if st.button("🗑️", key=f"delete_{chat_id}", help="Delete chat"):
+                delete_chat(chat_id)
+                st.rerun()
+
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button(
+                "◀",
+                key="chat_page_prev",
+                disabled=page == 0,
+                on_click=change_chat_page,
+                args=(-1,),
+            )
+        with col2:
+            st.markdown(f"Page {page + 1} of {page_count}")
+        with col3:
+            st.button(
+                "▶",
+                key="chat_page_next",
+                disabled=page >= page_count - 1,
+                on_click=change_chat_page,
+                args=(1,),
+            )
+
+
 def render_sidebar():
     """Render the sidebar with chat management and backend status"""
     with st.sidebar:
@@ -635,33 +635,14 @@ def render_sidebar():
             unsafe_allow_html=True,
         )
 
-        # Backend status
+        # Backend status, checked once and re-rendered from the cached panels
         if st.session_state.backend_status is None:
-            st.session_state.backend_status = check_backend_status()
+            refresh_backend_status()
 
-        status = st.session_state.backend_status
-        if status["available"]:
-            if status.get("data", {}).get("bedrock_available"):
-                status_class = "status-online"
-                status_text = "🟢 Backend Online (Bedrock)"
-            else:
-                status_class = "status-mock"
-                status_text = "🟡 Backend Online (Mock Mode)"
-        else:
-            status_class = "status-offline"
-            status_text = "🔴 Backend Offline"
-
-        st.markdown(
-            f"""
-        <div class="{status_class} status-badge" style="margin-bottom: 10px; text-align: center;">
-            {status_text}
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(st.session_state.status_badge_html, unsafe_allow_html=True)
 
         if st.button("🔄 Check Status", key="check_status", use_container_width=True):
-            st.session_state.backend_status = check_backend_status()
+            refresh_backend_status()
             st.rerun()
 
         st.markdown("---")
@@ -670,50 +651,16 @@ def render_sidebar():
             create_new_chat()
             st.rerun()
 
-        if st.session_state.chats:
-            st.markdown("### 💬 Chat History")
-            for chat_id, chat_data in reversed(list(st.session_state.chats.items())):
-                col1, col2 = st.columns([4, 1])
-                with col1:
-                    is_active = chat_id == st.session_state.current_chat_id
-                    button_style = "🔵 " if is_active else "💬 "
-                    if st.button(
-                        f"{button_style}{chat_data['title']}",
-                        key=f"load_{chat_id}",
-                        use_container_width=True,
-                    ):
-                        load_chat(chat_id)
-                        st.rerun()
-                with col2:
-                    if st.button("🗑️", key=f"delete_{chat_id}", help="Delete chat"):
-                        delete_chat(chat_id)
-                        st.rerun()
-        else:
-            st.markdown("### 💬 Chat History")
-            st.markdown("*No previous chats*")
+        render_chat_history()
 
         st.markdown("---")
         st.markdown("### 📊 System Info")
-        if status["available"] and "data" in status:
-            data = status["data"]
-            st.markdown(
-                f"""
-            - **Status**: {'✅ Online' if status['available'] else '❌ Offline'}
-            - **Bedrock**: {'✅ Available' if data.get('bedrock_available') else '❌ Mock Mode'}
-            - **Sessions**: {data.get('active_sessions', 0)}
-            - **Region**: {data.get('aws_region', 'N/A')}
-            """
-            )
-        else:
-            st.markdown(
-                f"""
-            - **Status**: ❌ Offline
-            - **Error**: {status.get('error', 'Unknown')}
-            """
-            )
+        st.markdown(st.session_state.system_info_markdown)
 
 
 def main():
+    restore_chat_from_url()
+
     # Render sidebar (always visible)
     render_sidebar()
 
@@ -773,17 +720,17 @@ def main():
                         {"role": "user", "content": user_input}
                     )
                     # Save chat to history immediately
-                    if st.session_state.current_chat_id:
-                        st.session_state.chats[st.session_state.current_chat_id] = {
-                            "title": get_chat_title(user_input),
-                            "messages": st.session_state.messages.copy(),
-                            "session_id": st.session_state.session_id,
-                        }
+                    save_current_chat()
                     st.rerun()
 
     else:
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
+        if st.session_state.has_more_history:
+            if st.button("⬆️ Load earlier messages", key="load_earlier"):
+                load_earlier_messages()
+                st.rerun()
+
         # Display chat history
         for i, message in enumerate(st.session_state.messages):
             if message["role"] == "user":
@@ -797,6 +744,13 @@ def main():
                     is_error=is_error,
                     citations=citations,
                 )
+                if not is_error:
+                    render_source_previews(citations, key=f"message_{i}")
+                    # Only the latest answer's follow-ups are still relevant
+                    if i == len(st.session_state.messages) - 1:
+                        render_suggestions(
+                            message.get("suggestions"), key=f"message_{i}"
+                        )
 
         # Handle new user message
         if (
@@ -816,13 +770,21 @@ def main():
             if response["success"]:
                 full_response = response["answer"] or "No response received"
                 citations = response.get("citations", [])
+                suggestions = response.get("suggestions") or []
                 with response_placeholder.container():
                     render_message("assistant", full_response, citations=citations)
+                    render_source_previews(
+                        citations, key=f"message_{len(st.session_state.messages)}"
+                    )
+                    render_suggestions(
+                        suggestions, key=f"message_{len(st.session_state.messages)}"
+                    )
                 st.session_state.messages.append(
                     {
                         "role": "assistant",
                         "content": full_response,
                         "citations": citations,
+                        "suggestions": suggestions,
                         "is_error": False,
                     }
                 )
@@ -835,12 +797,7 @@ def main():
                 )
 
             # Update chat in history after assistant response
-            if st.session_state.current_chat_id:
-                st.session_state.chats[st.session_state.current_chat_id] = {
-                    "title": get_chat_title(st.session_state.messages[0]["content"]),
-                    "messages": st.session_state.messages.copy(),
-                    "session_id": st.session_state.session_id,
-                }
+            save_current_chat()
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -859,12 +816,7 @@ def main():
         if send_button and user_input.strip():
             st.session_state.messages.append({"role": "user", "content": user_input})
             # Save chat to history immediately
-            if st.session_state.current_chat_id:
-                st.session_state.chats[st.session_state.current_chat_id] = {
-                    "title": get_chat_title(st.session_state.messages[0]["content"]),
-                    "messages": st.session_state.messages.copy(),
-                    "session_id": st.session_state.session_id,
-                }
+            save_current_chat()
             st.rerun()
 
 
@@ -0,0 +1,38 @@
+"""Build static/style.min.css from static/style.css.
+
+Run at image build time and again when the container starts, since compose
+bind-mounts the source tree over the built copy (see the Dockerfile). The app links
+the minified file when it is present and current, and otherwise inlines the
+stylesheet from memory, so the server itself never writes into its source tree.
+"""
+
+import re
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).parent / "static"
+SOURCE = STATIC_DIR / "style.css"
+TARGET = STATIC_DIR / "style.min.css"
+
+DECLARATION_BLOCK = re.compile(r"\{[^{}]*\}")
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # A space before ":" is significant in selectors ("div :hover" is not
+    # "div:hover"), so colons are only tightened inside declaration blocks
+    css = DECLARATION_BLOCK.sub(lambda m: re.sub(r"\s*:\s*", ":", m.group(0)), css)
+    return css.replace(";}", "}").strip()
+
+
+def build() -> str:
+    css = minify_css(SOURCE.read_text(encoding="utf-8"))
+    TARGET.write_text(css, encoding="utf-8")
+    return css
+
+
+if __name__ == "__main__":
+    css = build()
+    print(f"Wrote {TARGET} ({len(css)} bytes)")
@@ -0,0 +1,81 @@
+"""Measure first paint of the running frontend in a headless browser.
+
+Start the app with and without FRONTEND_INLINE_CSS=true and compare, e.g.:
+
+    python measure_first_paint.py --url http://localhost:8501 --runs 10
+
+Needs the optional `playwright` package and its Chromium build
+(`pip install playwright && playwright install chromium`).
+"""
+
+import argparse
+import json
+import statistics
+
+try:
+    from playwright.sync_api import sync_playwright
+
+    HAS_PLAYWRIGHT = True
+except ImportError:
+    HAS_PLAYWRIGHT = False
+
+PAINT_TIMINGS = """() => {
+    const paint = Object.fromEntries(
+        performance.getEntriesByType('paint').map(e => [e.name, e.startTime]));
+    const css = performance.getEntriesByType('resource')
+        .filter(e => e.initiatorType === 'link' || e.name.includes('.css'));
+    return {
+        first_paint_ms: paint['first-paint'] ?? null,
+        first_contentful_paint_ms: paint['first-contentful-paint'] ?? null,
+        stylesheet_bytes: css.reduce((total, e) => total + e.transferSize, 0),
+    };
+}"""
+
+
+def measure(url: str, runs: int, selector: str) -> dict:
+    """Load the page `runs` times in fresh contexts (cold cache) and once more warm."""
+    samples, styled_ms = [], []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        for _ in range(runs):
+            context = browser.new_context()
+            page = context.new_page()
+            page.goto(url, wait_until="load")
+            # Streamlit paints its shell first; the app's own styled content follows
+            page.wait_for_selector(selector)
+            styled_ms.append(page.evaluate("() => performance.now()"))
+            samples.append(page.evaluate(PAINT_TIMINGS))
+            context.close()
+        browser.close()
+
+    def median(key):
+        values = [s[key] for s in samples if s[key] is not None]
+        return round(statistics.median(values), 1) if values else None
+
+    return {
+        "url": url,
+        "runs": runs,
+        "first_paint_ms": median("first_paint_ms"),
+        "first_contentful_paint_ms": median("first_contentful_paint_ms"),
+        "styled_content_ms": round(statistics.median(styled_ms), 1),
+        "stylesheet_bytes": median("stylesheet_bytes"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8501")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--selector",
+        default=".sidebar-header",
+        help="Element that only renders once the app's stylesheet is applied",
+    )
+    args = parser.parse_args()
+    if not HAS_PLAYWRIGHT:
+        raise SystemExit("playwright is not installed: pip install playwright")
+    print(json.dumps(measure(args.url, args.runs, args.selector), indent=2))
+
+
+if __name__ == "__main__":
+    main()